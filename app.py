@@ -1,11 +1,52 @@
-import pandas as pd
+import os
+import re
+from datetime import timedelta
+
 import streamlit as st
-from PIL import Image
-import numpy as np
-from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from sensor_analytics.config import STORE_DIR
+from sensor_analytics.instrument import Profiler, attach, stage
+
+# pandas, plotly and the analysis modules are imported where a view first
+# needs them, so the welcome screen of a new server process loads none of them
+STYLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'estilo.css')
+
+CORRELATION_MESSAGES = {
+    'fuerte': (st.success, "🟢 Correlación fuerte detectada"),
+    'moderada': (st.warning, "🟡 Correlación moderada"),
+    'débil': (st.info, "🔵 Correlación débil"),
+}
+
+
+def show_figure(fig, target=st):
+    # Plotly serializes the figure inside plotly_chart; timed apart from building it
+    with stage('plotly_chart'):
+        target.plotly_chart(fig, width='stretch')
+
+
+def show_correlation_strength(correlation):
+    from sensor_analytics.analysis import correlation_strength
+
+    show, message = CORRELATION_MESSAGES[correlation_strength(correlation)]
+    show(message)
+
+
+@st.cache_resource
+def page_style():
+    """The theme stylesheet, read once per process and sent as one compact line."""
+    with open(STYLE_FILE, encoding='utf-8') as f:
+        css = re.sub(r'/\*.*?\*/', '', f.read(), flags=re.S)
+    return '<style>' + re.sub(r'\s*([{};,>])\s*', r'\1', ' '.join(css.split())) + '</style>'
+
+
+def show_sensor_map(sensors):
+    from sensor_analytics.sensors import sensor_locations
+
+    with map_section.container():
+        st.subheader("🗺️ Ubicación de los Sensores Ambientales")
+        st.map(sensor_locations(sensors), zoom=15)
+
 
 # Page configuration
 st.set_page_config(
@@ -14,155 +55,15 @@ st.set_page_config(
     layout="wide"
 )
 
-# Custom CSS for natural theme (greens and blues)
-st.markdown("""
-    <style>
-    .main {
-        padding: 2rem;
-        background: linear-gradient(135deg, #E8F6F3 0%, #D5F4E6 50%, #FDEBD0 100%);
-        min-height: 100vh;
-    }
-    
-    .stApp {
-        background: linear-gradient(135deg, #E8F6F3 0%, #D5F4E6 50%, #FDEBD0 100%);
-    }
-    
-    .stAlert {
-        margin-top: 1rem;
-        background-color: rgba(46, 125, 50, 0.1);
-        border-left: 4px solid #2E7D32;
-    }
-    
-    h1, h2, h3 {
-        color: #000000;
-        text-shadow: 1px 1px 2px rgba(255,255,255,0.5);
-    }
-    
-    h1 {
-        color: #000000;
-        text-shadow: 1px 1px 2px rgba(255,255,255,0.5);
-    }
-    
-    /* Ensure all text is black and readable */
-    .stMarkdown, .stMarkdown p, .stMarkdown div, .stMarkdown span,
-    .stDataFrame, .stDataFrame td, .stDataFrame th,
-    .element-container, .element-container p, .element-container div,
-    .stText, .stWrite, div[data-testid="stMarkdownContainer"] p,
-    div[data-testid="stMarkdownContainer"] div, 
-    div[data-testid="stMarkdownContainer"] span,
-    .stMetric .metric-container, .stMetric label, .stMetric div {
-        color: #000000 !important;
-    }
-    
-    .stButton>button {
-        background: linear-gradient(45deg, #2D6A4F, #40916C);
-        color: white;
-        border-radius: 15px;
-        border: none;
-        box-shadow: 0 4px 15px rgba(45, 106, 79, 0.3);
-        transition: all 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background: linear-gradient(45deg, #1B4332, #2D6A4F);
-        transform: translateY(-2px);
-        box-shadow: 0 6px 20px rgba(45, 106, 79, 0.4);
-    }
-    
-    .stSelectbox>div>div {
-        background: rgba(255, 255, 255, 0.9);
-        border-radius: 10px;
-        border: 2px solid #74C69D;
-        backdrop-filter: blur(10px);
-    }
-    
-    .stSlider>div>div>div {
-        background-color: #74C69D;
-    }
-    
-    .stRadio>div {
-        background: rgba(255, 255, 255, 0.8);
-        border-radius: 10px;
-        padding: 1rem;
-        border: 1px solid #74C69D;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        background: rgba(255, 255, 255, 0.7);
-        color: #000000;
-        border-radius: 10px 10px 0 0;
-        margin-right: 5px;
-        font-weight: bold;
-    }
-    
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        background: linear-gradient(135deg, #74C69D, #95D5B2);
-        color: #000000;
-        border-bottom: 3px solid #2D6A4F;
-    }
-    
-    .stDataFrame {
-        background: rgba(255, 255, 255, 0.9);
-        border-radius: 10px;
-        border: 1px solid #74C69D;
-        backdrop-filter: blur(5px);
-    }
-    
-    .metric-card {
-        background: rgba(255, 255, 255, 0.9);
-        border-radius: 15px;
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-left: 4px solid #40916C;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        backdrop-filter: blur(10px);
-    }
-    
-    .info-box {
-        background: linear-gradient(135deg, rgba(116, 198, 157, 0.2), rgba(149, 213, 178, 0.2));
-        border-radius: 15px;
-        padding: 1.5rem;
-        border: 1px solid #74C69D;
-        margin: 1rem 0;
-        backdrop-filter: blur(5px);
-        color: #000000 !important;
-    }
-    
-    .info-box h3, .info-box p, .info-box ul, .info-box li {
-        color: #000000 !important;
-    }
-    
-    .stCheckbox>label {
-        background: rgba(255, 255, 255, 0.8);
-        border-radius: 8px;
-        padding: 0.5rem;
-        border: 1px solid #95D5B2;
-    }
-    
-    .sidebar .stSelectbox>div>div {
-        background: rgba(255, 255, 255, 0.95);
-    }
-    
-    /* Custom scrollbar */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    ::-webkit-scrollbar-track {
-        background: rgba(116, 198, 157, 0.1);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb {
-        background: linear-gradient(45deg, #74C69D, #40916C);
-        border-radius: 10px;
-    }
-    
-    ::-webkit-scrollbar-thumb:hover {
-        background: linear-gradient(45deg, #40916C, #2D6A4F);
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Custom CSS for natural theme (greens and blues), kept in estilo.css
+st.markdown(page_style(), unsafe_allow_html=True)
+
+# Per-rerun stage timings; off by default, shown at the end of the run
+perf_panel = st.sidebar.expander("⏱️ Rendimiento")
+profiling = perf_panel.toggle("Medir etapas de cada ejecución", key='profiling')
+profile_memory = perf_panel.checkbox("Incluir memoria (tracemalloc, más lento)", disabled=not profiling)
+profiler = attach(Profiler(memory=profile_memory) if profiling else None, get_script_run_ctx())
+perf_report = perf_panel.empty()
 
 # Title and description with nature emojis
 st.title('🌿 Análisis de Datos de Sensores Ambientales 🌍')
@@ -174,296 +75,225 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Create map data for EAFIT
-eafit_location = pd.DataFrame({
-    'lat': [6.2479],
-    'lon': [-75.6081],
-    'location': ['🌿 Sensor Ambiental']
-})
-
-# Display map with nature styling
-st.subheader("🗺️ Ubicación de los Sensores Ambientales")
-st.map(eafit_location, zoom=15)
+# Sensor map, drawn once there is data to place (see show_sensor_map)
+map_section = st.empty()
 
 # File uploader with natural styling
 uploaded_file = st.file_uploader('🌱 Seleccione archivo CSV con datos ambientales', type=['csv'])
 
-if uploaded_file is not None:
+# Streaming mode aggregates the file chunk by chunk instead of loading it whole
+streaming_mode = st.sidebar.checkbox(
+    '⚡ Modo streaming (archivos grandes)',
+    help="Calcula estadísticas, patrones horarios, correlación y confort sin cargar todo el archivo en memoria."
+)
+stream_path = ''
+if streaming_mode:
+    stream_path = st.sidebar.text_input('📂 Ruta local del CSV (opcional)').strip()
+
+# Live mode follows a growing file or a local socket fed by the gateways
+live_mode = st.sidebar.checkbox(
+    '📡 Modo en vivo',
+    help="Sigue un archivo CSV/JSONL que crece o escucha lecturas en un puerto UDP/TCP local."
+)
+live_spec = ''
+if live_mode:
+    from sensor_analytics.live import POLL_SECONDS
+
+    live_spec = st.sidebar.text_input('🔌 Fuente en vivo',
+                                      help="Ruta .csv/.jsonl, udp://host:puerto o tcp://host:puerto").strip()
+    live_interval = st.sidebar.slider('⏱️ Actualizar cada (segundos)', 1, 30, int(POLL_SECONDS))
+
+# Datasets previously ingested into the local partitioned Parquet store
+stored_name = None
+stored_range = (None, None)
+stored_names = []
+if not streaming_mode and os.path.isdir(STORE_DIR):
+    from sensor_analytics.store import DatasetStore
+
+    store = DatasetStore()
+    stored_names = store.names()
+if stored_names:
+    st.sidebar.subheader("📦 Almacén local")
+    choice = st.sidebar.selectbox("Conjunto de datos", ["(archivo subido)", *stored_names])
+    if choice != "(archivo subido)":
+        import pandas as pd
+
+        stored_name = choice
+        manifest = store.manifest(stored_name)
+        first_day = pd.Timestamp(manifest['start']).date()
+        last_day = pd.Timestamp(manifest['end']).date()
+        days = st.sidebar.date_input("📅 Rango de fechas", value=(first_day, last_day),
+                                     min_value=first_day, max_value=last_day)
+        if len(days) == 2:
+            # Whole days: from the first midnight up to the end of the last day
+            stored_range = (pd.Timestamp(days[0]),
+                            pd.Timestamp(days[1]) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns'))
+        st.sidebar.caption(f"{manifest['rows']:,} registros en {len(manifest['partitions'])} particiones")
+
+if not (live_mode and live_spec) and st.session_state.get('live_subscription') is not None:
+    # Leaving live mode frees the source for everyone else
+    st.session_state.live_subscription.close()
+    st.session_state.live_subscription = None
+
+if live_mode and live_spec:
+    import pandas as pd
+
+    from sensor_analytics.downsample import DEFAULT_POINTS, downsample_series
+    from sensor_analytics.ingest import SENSOR_COL
+    from sensor_analytics.live import RING_CAPACITY, LiveSubscription
+
     try:
-        # Load and process data
-        df1 = pd.read_csv(uploaded_file)
-        
-        # Renombrar columnas para simplificar - detectar automáticamente
-        # Buscar columnas que contengan 'temperatura' y 'humedad'
-        temp_col = None
-        hum_col = None
-        
-        for col in df1.columns:
-            if 'temperatura' in col.lower():
-                temp_col = col
-            elif 'humedad' in col.lower():
-                hum_col = col
-        
-        if temp_col and hum_col:
-            column_mapping = {
-                temp_col: 'temperatura',
-                hum_col: 'humedad'
-            }
-            df1 = df1.rename(columns=column_mapping)
-        else:
-            st.error("No se encontraron las columnas de temperatura y humedad en el archivo CSV")
-            st.stop()
-        
-        df1['Time'] = pd.to_datetime(df1['Time'])
-        df1 = df1.set_index('Time')
+        subscription = st.session_state.get('live_subscription')
+        if subscription is None or subscription.spec != live_spec:
+            if subscription is not None:
+                subscription.close()
+                st.session_state.live_subscription = None
+            # Shared with every session on the same source; released with this session
+            st.session_state.live_subscription = LiveSubscription(live_spec, RING_CAPACITY)
+        live_session = st.session_state.live_subscription.session
 
-        # Create tabs for different analyses
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "📈 Visualización", 
-            "📊 Estadísticas", 
-            "🔍 Filtros", 
-            "🧠 Análisis Avanzado",
-            "🗺️ Información del Sitio"
-        ])
+        if live_session.accumulators:
+            # Nodes known so far; the map sits outside the refreshing fragment
+            show_sensor_map(list(live_session.accumulators))
 
-        with tab1:
-            st.subheader('🌊 Visualización de Datos Ambientales')
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Variable selector
-                variable = st.selectbox(
-                    "🌿 Seleccione variable a visualizar",
-                    ["temperatura", "humedad", "Ambas variables", "Humedad < 30%"]
-                )
-            
-            with col2:
-                # Chart type selector
-                chart_type = st.selectbox(
-                    "📊 Seleccione tipo de gráfico",
-                    ["Línea", "Área", "Barra", "Interactivo (Plotly)"]
-                )
-            
-            # Create plot based on selection
-            if variable == "Ambas variables":
-                if chart_type == "Interactivo (Plotly)":
-                    fig = make_subplots(
-                        rows=2, cols=1,
-                        subplot_titles=('🌡️ Temperatura', '💧 Humedad'),
-                        vertical_spacing=0.08
-                    )
-                    
-                    fig.add_trace(
-                        go.Scatter(x=df1.index, y=df1["temperatura"], 
-                                 name="Temperatura", line=dict(color='#FF6B6B')),
-                        row=1, col=1
-                    )
-                    
-                    fig.add_trace(
-                        go.Scatter(x=df1.index, y=df1["humedad"], 
-                                 name="Humedad", line=dict(color='#4ECDC4')),
-                        row=2, col=1
-                    )
-                    
-                    fig.update_layout(height=600, showlegend=True,
-                                    paper_bgcolor='rgba(0,0,0,0)',
-                                    plot_bgcolor='rgba(255,255,255,0.9)')
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.write("### 🌡️ Temperatura")
-                    if chart_type == "Línea":
-                        st.line_chart(df1["temperatura"])
-                    elif chart_type == "Área":
-                        st.area_chart(df1["temperatura"])
-                    else:
-                        st.bar_chart(df1["temperatura"])
-                        
-                    st.write("### 💧 Humedad")
-                    if chart_type == "Línea":
-                        st.line_chart(df1["humedad"])
-                    elif chart_type == "Área":
-                        st.area_chart(df1["humedad"])
-                    else:
-                        st.bar_chart(df1["humedad"])
-                        
-            elif variable == "Humedad < 30%":
-                st.write("### 🏜️ Condiciones de Baja Humedad (< 30%)")
-                low_humidity_df = df1[df1["humedad"] < 30]
-                if low_humidity_df.empty:
-                    st.warning("🌿 ¡Excelente! No hay registros con humedad crítica menor a 30%")
-                else:
-                    if chart_type == "Interactivo (Plotly)":
-                        fig = px.line(x=low_humidity_df.index, y=low_humidity_df["humedad"],
-                                    title="Períodos de Baja Humedad",
-                                    color_discrete_sequence=['#FF6B6B'])
-                        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
-                                        plot_bgcolor='rgba(255,255,255,0.9)')
-                        st.plotly_chart(fig, use_container_width=True)
-                    elif chart_type == "Línea":
-                        st.line_chart(low_humidity_df["humedad"])
-                    elif chart_type == "Área":
-                        st.area_chart(low_humidity_df["humedad"])
-                    else:
-                        st.bar_chart(low_humidity_df["humedad"])
+        # Only this fragment reruns on the timer; each run reads just the new readings
+        @st.fragment(run_every=live_interval)
+        def live_panel():
+            session = st.session_state.live_subscription.session
+            new_rows = session.poll()
+            buffer = session.buffer
+            st.info(f"📡 {buffer.total:,} lecturas recibidas (+{new_rows:,}); "
+                    f"{len(buffer):,} de {buffer.capacity:,} en memoria ({buffer.nbytes / 1e6:.1f} MB)")
+            if not session.accumulators:
+                st.warning("⏳ Esperando lecturas de la fuente...")
+                return
+
+            sensor = st.selectbox("📡 Sensor", list(session.accumulators), key='live_sensor')
+            acc = session.accumulators[sensor]
+            recent = buffer.frame()
+            recent = recent[recent[SENSOR_COL] == sensor].drop(columns=SENSOR_COL).sort_index()
+
+            col1, col2, col3, col4 = st.columns(4)
+            last = recent.iloc[-1] if len(recent) else None
+            col1.metric("🌡️ Temperatura Actual",
+                        f"{last['temperatura']:.2f}°C" if last is not None else "-",
+                        f"{last['temperatura'] - acc.stats['temperatura'].mean:+.2f} vs promedio"
+                        if last is not None else None)
+            col2.metric("💧 Humedad Actual",
+                        f"{last['humedad']:.2f}%" if last is not None else "-",
+                        f"{last['humedad'] - acc.stats['humedad'].mean:+.2f} vs promedio"
+                        if last is not None else None)
+            col3.metric("🔗 Correlación Temperatura-Humedad", f"{acc.correlation:.3f}")
+            col4.metric("🌿 Confort Total", f"{acc.comfort_percentages()['confort_total']:.1f}%")
+
+            st.write("### 🌊 Lecturas Recientes")
+            st.line_chart(pd.DataFrame({
+                var: downsample_series(recent[var], DEFAULT_POINTS) for var in ('temperatura', 'humedad')
+            }))
+            st.write("### 📊 Estadísticas desde el inicio")
+            st.dataframe(pd.DataFrame({var: acc.describe(var) for var in ('temperatura', 'humedad')}))
+
+            st.write("### 🚨 Anomalías Recientes")
+            events = pd.concat(
+                {var: intervals.frame().tail(10) for var, intervals in session.anomalies[sensor].intervals.items()},
+                names=['variable'],
+            ).reset_index(level=0).sort_values('inicio', ascending=False)
+            if events.empty:
+                st.success("🟢 Sin anomalías detectadas")
             else:
-                if chart_type == "Interactivo (Plotly)":
-                    color = '#FF6B6B' if variable == 'temperatura' else '#4ECDC4'
-                    title = f"{'🌡️ Temperatura' if variable == 'temperatura' else '💧 Humedad'} - Serie Temporal"
-                    
-                    fig = px.line(x=df1.index, y=df1[variable], 
-                                title=title,
-                                color_discrete_sequence=[color])
-                    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
-                                    plot_bgcolor='rgba(255,255,255,0.9)')
-                    st.plotly_chart(fig, use_container_width=True)
-                elif chart_type == "Línea":
-                    st.line_chart(df1[variable])
-                elif chart_type == "Área":
-                    st.area_chart(df1[variable])
-                else:
-                    st.bar_chart(df1[variable])
+                st.dataframe(events, hide_index=True)
+
+        live_panel()
+
+    except Exception as e:
+        st.error(f'❌ Error en el modo en vivo: {str(e)}')
+        st.info("🔧 Verifique la ruta del archivo o que el puerto esté libre.")
+elif streaming_mode and (uploaded_file is not None or stream_path):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    from sensor_analytics.ingest import MissingColumnsError
+    from sensor_analytics.regression import format_p_value, ols_from_pair
+    from sensor_analytics.streaming import stream_sensor_csv
+
+    try:
+        source = stream_path or uploaded_file
+        if stream_path:
+            stream_key = (stream_path, os.path.getmtime(stream_path))
+        else:
+            stream_key = uploaded_file.file_id
+        if st.session_state.get('stream_key') != stream_key:
+            if not stream_path:
+                uploaded_file.seek(0)
+            with st.spinner('⏳ Procesando el archivo por bloques...'):
+                with stage('stream_csv'):
+                    st.session_state.stream_acc = stream_sensor_csv(source)
+            st.session_state.stream_key = stream_key
+        accumulators = st.session_state.stream_acc
+        show_sensor_map(list(accumulators))
+        sensor = st.sidebar.selectbox("📡 Sensor", list(accumulators))
+        acc = accumulators[sensor]
+
+        st.info(f"⚡ Modo streaming: {acc.rows:,} registros agregados entre {acc.start} y {acc.end}")
 
-            # Raw data display with toggle
-            if st.checkbox('🗂️ Mostrar datos crudos'):
-                st.write(df1)
+        tab2, tab4 = st.tabs(["📊 Estadísticas", "🧠 Análisis Avanzado"])
 
-        with tab2:
+        with tab2, stage('tab_estadisticas'):
             st.subheader('📊 Análisis Estadístico Ambiental')
-            
-            # Variable selector for statistics
+
             stat_variable = st.radio(
                 "🌿 Seleccione variable para estadísticas",
                 ["temperatura", "humedad"]
             )
-            
-            # Statistical summary
-            stats_df = df1[stat_variable].describe()
-            
+            stats_df = acc.describe(stat_variable)
+            unit = '°C' if stat_variable == 'temperatura' else '%'
+
             col1, col2, col3 = st.columns(3)
-            
+
             with col1:
                 st.write("### 📈 Estadísticas Descriptivas")
                 st.dataframe(stats_df)
-            
+                st.caption("Los cuartiles se aproximan a partir del histograma.")
+
             with col2:
-                # Additional statistics
-                if stat_variable == "temperatura":
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    st.metric("🌡️ Temperatura Promedio", f"{stats_df['mean']:.2f}°C")
-                    st.metric("🔥 Temperatura Máxima", f"{stats_df['max']:.2f}°C")
-                    st.metric("❄️ Temperatura Mínima", f"{stats_df['min']:.2f}°C")
-                    st.metric("📏 Desviación Estándar", f"{stats_df['std']:.2f}°C")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                    st.metric("💧 Humedad Promedio", f"{stats_df['mean']:.2f}%")
-                    st.metric("🌊 Humedad Máxima", f"{stats_df['max']:.2f}%")
-                    st.metric("🏜️ Humedad Mínima", f"{stats_df['min']:.2f}%")
-                    st.metric("📏 Desviación Estándar", f"{stats_df['std']:.2f}%")
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
+                st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                st.metric("📊 Promedio", f"{stats_df['mean']:.2f}{unit}")
+                st.metric("🔥 Máximo", f"{stats_df['max']:.2f}{unit}")
+                st.metric("❄️ Mínimo", f"{stats_df['min']:.2f}{unit}")
+                st.metric("📏 Desviación Estándar", f"{stats_df['std']:.2f}{unit}")
+                st.markdown('</div>', unsafe_allow_html=True)
+
             with col3:
-                # Histogram
-                fig = px.histogram(df1, x=stat_variable, nbins=20,
-                                title=f"Distribución de {'Temperatura' if stat_variable == 'temperatura' else 'Humedad'}",
-                                color_discrete_sequence=['#74C69D'])
-                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(255,255,255,0.9)')
-                st.plotly_chart(fig, use_container_width=True)
-
-        with tab3:
-            st.subheader('🔍 Filtros y Análisis de Rangos')
-            
-            # Variable selector for filtering
-            filter_variable = st.selectbox(
-                "🌿 Seleccione variable para filtrar",
-                ["temperatura", "humedad"]
-            )
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Minimum value filter
-                min_val = st.slider(
-                    f'🔽 Valor mínimo de {filter_variable}',
-                    float(df1[filter_variable].min()),
-                    float(df1[filter_variable].max()),
-                    float(df1[filter_variable].mean()),
-                    key="min_val"
-                )
-                
-                filtrado_df_min = df1[df1[filter_variable] > min_val]
-                st.write(f"📊 Registros con {filter_variable} superior a", 
-                        f"{min_val}{'°C' if filter_variable == 'temperatura' else '%'}:")
-                st.dataframe(filtrado_df_min)
-                
-            with col2:
-                # Maximum value filter
-                max_val = st.slider(
-                    f'🔼 Valor máximo de {filter_variable}',
-                    float(df1[filter_variable].min()),
-                    float(df1[filter_variable].max()),
-                    float(df1[filter_variable].mean()),
-                    key="max_val"
-                )
-                
-                filtrado_df_max = df1[df1[filter_variable] < max_val]
-                st.write(f"📊 Registros con {filter_variable} inferior a",
-                        f"{max_val}{'°C' if filter_variable == 'temperatura' else '%'}:")
-                st.dataframe(filtrado_df_max)
-
-            # Download filtered data
-            if st.button('💾 Descargar datos filtrados'):
-                csv = filtrado_df_min.to_csv().encode('utf-8')
-                st.download_button(
-                    label="📁 Descargar CSV",
-                    data=csv,
-                    file_name='datos_ambientales_filtrados.csv',
-                    mime='text/csv',
-                )
+                hist_df = acc.histogram_frame(stat_variable)
+                fig = px.bar(hist_df, x=stat_variable, y='count',
+                             title=f"Distribución de {'Temperatura' if stat_variable == 'temperatura' else 'Humedad'}",
+                             color_discrete_sequence=['#74C69D'])
+                fig.update_layout(bargap=0, paper_bgcolor='rgba(0,0,0,0)',
+                                  plot_bgcolor='rgba(255,255,255,0.9)')
+                show_figure(fig)
 
-        with tab4:
+        with tab4, stage('tab_analisis_avanzado'):
             st.subheader('🧠 Análisis Avanzado y Correlaciones')
-            
-            # Correlation analysis
-            st.write("### 🔗 Análisis de Correlación")
-            correlation = df1['temperatura'].corr(df1['humedad'])
-            
+
             col1, col2 = st.columns(2)
-            
+
             with col1:
+                st.write("### 🔗 Análisis de Correlación")
+                correlation = acc.correlation
                 st.metric("🔗 Correlación Temperatura-Humedad", f"{correlation:.3f}")
-                
-                if abs(correlation) > 0.7:
-                    st.success("🟢 Correlación fuerte detectada")
-                elif abs(correlation) > 0.3:
-                    st.warning("🟡 Correlación moderada")
-                else:
-                    st.info("🔵 Correlación débil")
-                    
-                # Scatter plot
-                fig = px.scatter(df1, x='temperatura', y='humedad',
-                               title="Relación Temperatura vs Humedad",
-                               trendline="ols",
-                               color_discrete_sequence=['#40916C'])
-                fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
-                                plot_bgcolor='rgba(255,255,255,0.9)')
-                st.plotly_chart(fig, use_container_width=True)
-            
+
+                show_correlation_strength(correlation)
+
+                fit = ols_from_pair(acc.pair)
+                col_a, col_b, col_c = st.columns(3)
+                col_a.metric("📐 Pendiente", f"{fit.slope:.3f} %/°C")
+                col_b.metric("📊 R²", f"{fit.r2:.3f}")
+                col_c.metric("🎯 Valor p", format_p_value(fit.p_value))
+
             with col2:
-                # Time-based analysis
                 st.write("### ⏰ Análisis Temporal")
-                
-                # Add hour column for analysis
-                df_temp = df1.copy()
-                df_temp['hora'] = df_temp.index.hour
-                df_temp['dia_semana'] = df_temp.index.dayofweek
-                df_temp['mes'] = df_temp.index.month
-                
-                # Hourly patterns
-                hourly_avg = df_temp.groupby('hora')[['temperatura', 'humedad']].mean()
-                
+                hourly_avg = acc.hourly_mean()
+
                 fig = go.Figure()
                 fig.add_trace(go.Scatter(x=hourly_avg.index, y=hourly_avg['temperatura'],
                                        mode='lines+markers', name='Temperatura',
@@ -471,7 +301,6 @@ if uploaded_file is not None:
                 fig.add_trace(go.Scatter(x=hourly_avg.index, y=hourly_avg['humedad'],
                                        mode='lines+markers', name='Humedad',
                                        line=dict(color='#4ECDC4'), yaxis='y2'))
-                
                 fig.update_layout(
                     title="Patrones Horarios Promedio",
                     xaxis_title="Hora del día",
@@ -480,136 +309,652 @@ if uploaded_file is not None:
                     paper_bgcolor='rgba(0,0,0,0)',
                     plot_bgcolor='rgba(255,255,255,0.9)'
                 )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Anomaly detection
-            st.write("### 🚨 Detección de Anomalías")
-            
-            col1, col2 = st.columns(2)
-            
+                show_figure(fig)
+
+            st.write("### 🌿 Análisis de Confort Ambiental")
+            comfort = acc.comfort_percentages()
+
+            col1, col2, col3 = st.columns(3)
+
             with col1:
-                # Temperature anomalies
-                temp_mean = df1['temperatura'].mean()
-                temp_std = df1['temperatura'].std()
-                temp_anomalies = df1[
-                    (df1['temperatura'] > temp_mean + 2*temp_std) | 
-                    (df1['temperatura'] < temp_mean - 2*temp_std)
-                ]
-                
-                st.metric("🌡️ Anomalías de Temperatura", len(temp_anomalies))
-                if len(temp_anomalies) > 0:
-                    st.write("Valores anómalos de temperatura:")
-                    st.dataframe(temp_anomalies[['temperatura']])
-            
+                st.metric("🌡️ Confort Térmico", f"{comfort['confort_temp']:.1f}%")
+
             with col2:
-                # Humidity anomalies
-                hum_mean = df1['humedad'].mean()
-                hum_std = df1['humedad'].std()
-                hum_anomalies = df1[
-                    (df1['humedad'] > hum_mean + 2*hum_std) | 
-                    (df1['humedad'] < hum_mean - 2*hum_std)
-                ]
-                
-                st.metric("💧 Anomalías de Humedad", len(hum_anomalies))
-                if len(hum_anomalies) > 0:
-                    st.write("Valores anómalos de humedad:")
-                    st.dataframe(hum_anomalies[['humedad']])
+                st.metric("💧 Confort de Humedad", f"{comfort['confort_hum']:.1f}%")
+
+            with col3:
+                st.metric("🌿 Confort Total", f"{comfort['confort_total']:.1f}%")
+
+    except MissingColumnsError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f'❌ Error al procesar el archivo: {str(e)}')
+        st.info("🔧 Verifique que el archivo CSV tenga el formato correcto y las columnas esperadas.")
+elif uploaded_file is not None or stored_name:
+    from sensor_analytics.loader import DATASETS, MissingColumnsError
+    from sensor_analytics.store import DatasetStore
+
+    store = DatasetStore()
+    try:
+        # Load and process data (parsed once per file, shared by reruns and sessions)
+        if stored_name:
+            # Only the partitions overlapping the date range are read
+            store_key = f"store:{stored_name}:{manifest['digest']}:{stored_range}"
+            with stage('load_store'):
+                source_dataset = DATASETS.get_or_build(
+                    store_key, lambda: store.open(stored_name, *stored_range)
+                )
+        else:
+            try:
+                with stage('load_dataset'):
+                    source_dataset = DATASETS.load(uploaded_file)
+            except MissingColumnsError as e:
+                st.error(str(e))
+                st.stop()
+
+            st.sidebar.subheader("📦 Almacén local")
+            store_as = st.sidebar.text_input("Nombre en el almacén",
+                                             os.path.splitext(uploaded_file.name)[0])
+            if st.sidebar.button("📦 Guardar en almacén local"):
+                with st.spinner('⏳ Guardando particiones Parquet...'):
+                    saved = store.ingest(store_as, source_dataset)
+                st.sidebar.success(f"✅ {saved['rows']:,} registros guardados en "
+                                   f"{len(saved['partitions'])} particiones")
+
+        cache_stats = DATASETS.stats()
+        perf_panel.caption(
+            f"Caché compartida: {cache_stats['datasets']} conjunto(s), "
+            f"{cache_stats['resident_bytes'] / 1024 ** 2:.1f} MB "
+            f"(+{cache_stats['task_bytes'] / 1024 ** 2:.1f} MB en resultados) "
+            f"de {cache_stats['max_bytes'] / 1024 ** 2:.0f} MB; "
+            f"{cache_stats['hits']} aciertos, {cache_stats['misses']} fallos, "
+            f"{cache_stats['evictions']} desalojos"
+            + (" (almacenamiento compacto)" if cache_stats['compact'] else "")
+        )
+
+        # Every tab works on one sensor; the map and comparison show them all
+        show_sensor_map(source_dataset.sensors)
+        sensor = st.sidebar.selectbox("📡 Sensor", source_dataset.sensors)
+        dataset = source_dataset.for_sensor(sensor)
+        df1 = dataset.frame
+        summary = dataset.summary
+
+        # Create tabs for different analyses
+        # Only the selected tab runs: switching tabs triggers a rerun
+        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+            "📈 Visualización", 
+            "📊 Estadísticas", 
+            "🔍 Filtros", 
+            "🧠 Análisis Avanzado",
+            "🗺️ Información del Sitio"
+        ], key='vista', on_change='rerun')
+
+        with tab1, stage('tab_visualizacion'):
+            if tab1.open:
+                import plotly.express as px
+                import plotly.graph_objects as go
+                from plotly.subplots import make_subplots
+
+                from sensor_analytics.downsample import DEFAULT_POINTS, downsample_series, time_window
+                from sensor_analytics.rollups import LEVEL_LABELS
+
+                st.subheader('🌊 Visualización de Datos Ambientales')
             
-            # Environmental comfort analysis
-            st.write("### 🌿 Análisis de Confort Ambiental")
+                col1, col2 = st.columns(2)
             
-            # Define comfort zones
-            comfort_temp_min, comfort_temp_max = 18, 26
-            comfort_hum_min, comfort_hum_max = 30, 70
+                with col1:
+                    # Variable selector
+                    variable = st.selectbox(
+                        "🌿 Seleccione variable a visualizar",
+                        ["temperatura", "humedad", "Ambas variables", "Humedad < 30%"]
+                    )
             
-            df1['confort_temp'] = (df1['temperatura'] >= comfort_temp_min) & (df1['temperatura'] <= comfort_temp_max)
-            df1['confort_hum'] = (df1['humedad'] >= comfort_hum_min) & (df1['humedad'] <= comfort_hum_max)
-            df1['confort_total'] = df1['confort_temp'] & df1['confort_hum']
+                with col2:
+                    # Chart type selector
+                    chart_type = st.selectbox(
+                        "📊 Seleccione tipo de gráfico",
+                        ["Línea", "Área", "Barra", "Interactivo (Plotly)"]
+                    )
             
-            comfort_percentage = (df1['confort_total'].sum() / len(df1)) * 100
+                # Zoom window and point budget: charts only receive the reduced series
+                with st.expander("🔎 Rango de tiempo y resolución"):
+                    t_min = df1.index.min().to_pydatetime()
+                    t_max = df1.index.max().to_pydatetime()
+                    if t_min < t_max:
+                        t_start, t_end = st.slider(
+                            "🕒 Rango de tiempo",
+                            min_value=t_min,
+                            max_value=t_max,
+                            value=(t_min, t_max),
+                            step=max((t_max - t_min) / 1000, timedelta(seconds=1)),
+                            format="YYYY-MM-DD HH:mm"
+                        )
+                    else:
+                        t_start, t_end = t_min, t_max
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        max_points = st.slider("📍 Puntos máximos por gráfico", 500, 10000, DEFAULT_POINTS, step=500)
+                    with col2:
+                        method_label = st.selectbox("🧮 Método de reducción",
+                                                    ["LTTB", "Mín/Máx por bloque"])
+                    method = 'lttb' if method_label == "LTTB" else 'minmax'
+
+                plot_df = time_window(df1, t_start, t_end)
+                # Long ranges are drawn from the coarsest rollup that still fills the chart
+                rollup_level = dataset.rollups.choose(t_start, t_end, max_points, len(plot_df))
+                if rollup_level is None:
+                    series_df = plot_df
+                    st.caption(f"📉 {len(plot_df):,} registros en el rango; cada serie se reduce a un máximo de {max_points:,} puntos.")
+                else:
+                    series_df = dataset.rollups.means(rollup_level, t_start, t_end)
+                    st.caption(f"📉 {len(plot_df):,} registros en el rango, graficados como {len(series_df):,} "
+                               f"promedios de {LEVEL_LABELS[rollup_level]} (máximo {max_points:,} puntos por serie).")
+
+                def reduce_points(series):
+                    return downsample_series(series, max_points, method)
+
+                # Create plot based on selection
+                if variable == "Ambas variables":
+                    if chart_type == "Interactivo (Plotly)":
+                        fig = make_subplots(
+                            rows=2, cols=1,
+                            subplot_titles=('🌡️ Temperatura', '💧 Humedad'),
+                            vertical_spacing=0.08
+                        )
+                    
+                        temp_series = reduce_points(series_df["temperatura"])
+                        hum_series = reduce_points(series_df["humedad"])
+                        fig.add_trace(
+                            go.Scatter(x=temp_series.index, y=temp_series, 
+                                     name="Temperatura", line=dict(color='#FF6B6B')),
+                            row=1, col=1
+                        )
+                    
+                        fig.add_trace(
+                            go.Scatter(x=hum_series.index, y=hum_series, 
+                                     name="Humedad", line=dict(color='#4ECDC4')),
+                            row=2, col=1
+                        )
+                    
+                        fig.update_layout(height=600, showlegend=True,
+                                        paper_bgcolor='rgba(0,0,0,0)',
+                                        plot_bgcolor='rgba(255,255,255,0.9)')
+                        show_figure(fig)
+                    else:
+                        st.write("### 🌡️ Temperatura")
+                        if chart_type == "Línea":
+                            st.line_chart(reduce_points(series_df["temperatura"]))
+                        elif chart_type == "Área":
+                            st.area_chart(reduce_points(series_df["temperatura"]))
+                        else:
+                            st.bar_chart(reduce_points(series_df["temperatura"]))
+                        
+                        st.write("### 💧 Humedad")
+                        if chart_type == "Línea":
+                            st.line_chart(reduce_points(series_df["humedad"]))
+                        elif chart_type == "Área":
+                            st.area_chart(reduce_points(series_df["humedad"]))
+                        else:
+                            st.bar_chart(reduce_points(series_df["humedad"]))
+                        
+                elif variable == "Humedad < 30%":
+                    st.write("### 🏜️ Condiciones de Baja Humedad (< 30%)")
+                    low_humidity_df = plot_df[plot_df["humedad"] < 30]
+                    if low_humidity_df.empty:
+                        st.warning("🌿 ¡Excelente! No hay registros con humedad crítica menor a 30%")
+                    else:
+                        if chart_type == "Interactivo (Plotly)":
+                            low_series = reduce_points(low_humidity_df["humedad"])
+                            fig = px.line(x=low_series.index, y=low_series,
+                                        title="Períodos de Baja Humedad",
+                                        color_discrete_sequence=['#FF6B6B'])
+                            fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
+                                            plot_bgcolor='rgba(255,255,255,0.9)')
+                            show_figure(fig)
+                        elif chart_type == "Línea":
+                            st.line_chart(reduce_points(low_humidity_df["humedad"]))
+                        elif chart_type == "Área":
+                            st.area_chart(reduce_points(low_humidity_df["humedad"]))
+                        else:
+                            st.bar_chart(reduce_points(low_humidity_df["humedad"]))
+                else:
+                    if chart_type == "Interactivo (Plotly)":
+                        color = '#FF6B6B' if variable == 'temperatura' else '#4ECDC4'
+                        title = f"{'🌡️ Temperatura' if variable == 'temperatura' else '💧 Humedad'} - Serie Temporal"
+                    
+                        series = reduce_points(series_df[variable])
+                        fig = px.line(x=series.index, y=series,
+                                    title=title,
+                                    color_discrete_sequence=[color])
+                        fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
+                                        plot_bgcolor='rgba(255,255,255,0.9)')
+                        show_figure(fig)
+                    elif chart_type == "Línea":
+                        st.line_chart(reduce_points(series_df[variable]))
+                    elif chart_type == "Área":
+                        st.area_chart(reduce_points(series_df[variable]))
+                    else:
+                        st.bar_chart(reduce_points(series_df[variable]))
+
+                # Raw data display with toggle
+                if st.checkbox('🗂️ Mostrar datos crudos'):
+                    st.write(df1)
+
+        with tab2, stage('tab_estadisticas'):
+            if tab2.open:
+                import pandas as pd
+                import plotly.express as px
+
+                from sensor_analytics.export import export_file
+                from sensor_analytics.quality import FILL_LABELS, MAX_GRID
+
+                st.subheader('📊 Análisis Estadístico Ambiental')
             
-            col1, col2, col3 = st.columns(3)
+                # Variable selector for statistics
+                stat_variable = st.radio(
+                    "🌿 Seleccione variable para estadísticas",
+                    ["temperatura", "humedad"]
+                )
             
-            with col1:
-                st.metric("🌡️ Confort Térmico", f"{(df1['confort_temp'].sum() / len(df1)) * 100:.1f}%")
+                # Statistical summary
+                stats_df = summary[stat_variable].describe(stat_variable)
             
-            with col2:
-                st.metric("💧 Confort de Humedad", f"{(df1['confort_hum'].sum() / len(df1)) * 100:.1f}%")
+                col1, col2, col3 = st.columns(3)
             
-            with col3:
-                st.metric("🌿 Confort Total", f"{comfort_percentage:.1f}%")
+                with col1:
+                    st.write("### 📈 Estadísticas Descriptivas")
+                    st.dataframe(stats_df)
             
-            # Comfort zone visualization
-            fig = px.scatter(df1, x='temperatura', y='humedad',
-                           color='confort_total',
-                           title="Zona de Confort Ambiental",
-                           color_discrete_map={True: '#40916C', False: '#FF6B6B'})
+                with col2:
+                    # Additional statistics
+                    if stat_variable == "temperatura":
+                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                        st.metric("🌡️ Temperatura Promedio", f"{stats_df['mean']:.2f}°C")
+                        st.metric("🔥 Temperatura Máxima", f"{stats_df['max']:.2f}°C")
+                        st.metric("❄️ Temperatura Mínima", f"{stats_df['min']:.2f}°C")
+                        st.metric("📏 Desviación Estándar", f"{stats_df['std']:.2f}°C")
+                        st.markdown('</div>', unsafe_allow_html=True)
+                    else:
+                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+                        st.metric("💧 Humedad Promedio", f"{stats_df['mean']:.2f}%")
+                        st.metric("🌊 Humedad Máxima", f"{stats_df['max']:.2f}%")
+                        st.metric("🏜️ Humedad Mínima", f"{stats_df['min']:.2f}%")
+                        st.metric("📏 Desviación Estándar", f"{stats_df['std']:.2f}%")
+                        st.markdown('</div>', unsafe_allow_html=True)
+                    
+                with col3:
+                    # Histogram
+                    hist_df = summary[stat_variable].histogram_frame(stat_variable)
+                    fig = px.bar(hist_df, x=stat_variable, y='count',
+                                    title=f"Distribución de {'Temperatura' if stat_variable == 'temperatura' else 'Humedad'}",
+                                    color_discrete_sequence=['#74C69D'])
+                    fig.update_layout(bargap=0, paper_bgcolor='rgba(0,0,0,0)',
+                                    plot_bgcolor='rgba(255,255,255,0.9)')
+                    show_figure(fig)
+
+                if len(source_dataset.sensors) > 1:
+                    st.write("### 📡 Comparación entre Sensores")
+                    st.dataframe(source_dataset.sensor_statistics)
+
+                # Sampling regularity: ESP32 nodes drop out when power runs low
+                st.write("### 🩺 Calidad de los Datos")
+                quality = dataset.quality
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("⏱️ Intervalo de muestreo",
+                            f"{quality.interval.total_seconds():g} s" if quality.interval is not None else "-")
+                col2.metric("📶 Cobertura", f"{quality.coverage[stat_variable]:.1f}%")
+                col3.metric("🕳️ Huecos", f"{quality.gap_count:,}",
+                            f"mayor: {quality.largest_gap}" if quality.gap_count else None, delta_color='off')
+                col4.metric("♻️ Duplicados eliminados", f"{quality.duplicates:,}")
+                if quality.out_of_order:
+                    st.caption(f"🔀 {quality.out_of_order:,} registros llegaron fuera de orden y se ordenaron por tiempo.")
+                if quality.gap_count:
+                    st.write(f"Huecos más largos ({quality.missing} sin datos en total):")
+                    st.dataframe(quality.gaps_frame().nlargest(20, 'duración'), hide_index=True)
+
+                # Regular grid export: one row per interval, gaps empty or filled
+                with st.expander("📐 Remuestrear a una malla regular"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        grid_freq = st.selectbox("Frecuencia", ["Intervalo de muestreo", "5min", "15min", "1h"])
+                    with col2:
+                        grid_fill = st.selectbox("Relleno de huecos", list(FILL_LABELS),
+                                                 format_func=FILL_LABELS.get)
+                    freq = None if grid_freq == "Intervalo de muestreo" else grid_freq
+                    step = pd.Timedelta(freq) if freq is not None else quality.interval
+                    # Size the grid from the report; it is only built when downloaded
+                    slots = (int((quality.end - quality.start.floor(step)) // step) + 1
+                             if step is not None else quality.rows)
+                    if slots > MAX_GRID:
+                        st.warning(f"La malla de {slots:,} intervalos es demasiado grande; use una frecuencia mayor.")
+                    else:
+                        st.caption(f"{slots:,} intervalos.")
+                        st.download_button(
+                            label="⬇️ Descargar serie regular (CSV)",
+                            data=lambda freq=freq, fill=grid_fill: export_file(dataset.regular(freq, fill)),
+                            file_name="datos_ambientales_regulares.csv",
+                            mime="text/csv",
+                        )
+
+        with tab3, stage('tab_filtros'):
+            if tab3.open:
+                from sensor_analytics.export import FORMATS, available_formats, export_file
+                from sensor_analytics.filters import page_count, paginate
+
+                st.subheader('🔍 Filtros y Análisis de Rangos')
             
-            # Add comfort zone rectangle
-            fig.add_shape(
-                type="rect",
-                x0=comfort_temp_min, y0=comfort_hum_min,
-                x1=comfort_temp_max, y1=comfort_hum_max,
-                line=dict(color="green", width=2, dash="dash"),
-                fillcolor="rgba(64, 145, 108, 0.1)"
-            )
+                # Variable selector for filtering
+                filter_variable = st.selectbox(
+                    "🌿 Seleccione variable para filtrar",
+                    ["temperatura", "humedad"]
+                )
             
-            fig.update_layout(paper_bgcolor='rgba(0,0,0,0)',
-                            plot_bgcolor='rgba(255,255,255,0.9)')
-            st.plotly_chart(fig, use_container_width=True)
+                filter_summary = summary[filter_variable]
+                # Sorted-value index: thresholds become searchsorted slices
+                filter_index = dataset.sorted_index(filter_variable)
+                unit = '°C' if filter_variable == 'temperatura' else '%'
+                page_size = st.selectbox("📄 Filas por página", [50, 100, 500], index=1)
+            
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    # Minimum value filter
+                    min_val = st.slider(
+                        f'🔽 Valor mínimo de {filter_variable}',
+                        float(filter_summary.min),
+                        float(filter_summary.max),
+                        float(filter_summary.mean),
+                        key="min_val"
+                    )
+                
+                    positions_min = filter_index.positions(lower=min_val)
+                    st.write(f"📊 Registros con {filter_variable} superior a", 
+                            f"{min_val}{unit}: {len(positions_min):,}")
+                    page_min = st.number_input("Página", 1, page_count(len(positions_min), page_size), 1,
+                                               key=f"page_min_{filter_variable}_{min_val}_{page_size}")
+                    st.dataframe(df1.iloc[paginate(positions_min, page_min, page_size)])
+                
+                with col2:
+                    # Maximum value filter
+                    max_val = st.slider(
+                        f'🔼 Valor máximo de {filter_variable}',
+                        float(filter_summary.min),
+                        float(filter_summary.max),
+                        float(filter_summary.mean),
+                        key="max_val"
+                    )
+                
+                    positions_max = filter_index.positions(upper=max_val)
+                    st.write(f"📊 Registros con {filter_variable} inferior a",
+                            f"{max_val}{unit}: {len(positions_max):,}")
+                    page_max = st.number_input("Página", 1, page_count(len(positions_max), page_size), 1,
+                                               key=f"page_max_{filter_variable}_{max_val}_{page_size}")
+                    st.dataframe(df1.iloc[paginate(positions_max, page_max, page_size)])
 
-        with tab5:
-            st.subheader("🌍 Información del Sitio de Medición")
+                # Download filtered data: rows within both thresholds
+                st.write("### 💾 Exportar datos filtrados")
+                positions_range = filter_index.positions(lower=min_val, upper=max_val)
+                st.write(f"📊 Registros con {filter_variable} entre {min_val}{unit} y {max_val}{unit}: "
+                         f"{len(positions_range):,}")
+                export_format = st.radio("📦 Formato", available_formats(),
+                                         format_func=lambda fmt: FORMATS[fmt][0], horizontal=True)
+            
+                # The export is built in chunks only when the button is clicked
+                label, file_name, mime = FORMATS[export_format]
+                st.download_button(
+                    label=f"💾 Descargar datos filtrados ({label})",
+                    data=lambda frame=df1, positions=positions_range, fmt=export_format:
+                        export_file(frame, positions, fmt),
+                    file_name=file_name,
+                    mime=mime,
+                )
+
+        with tab4, stage('tab_analisis_avanzado'):
+            if tab4.open:
+                import plotly.graph_objects as go
+
+                from sensor_analytics.anomalies import DETECTORS, detect_anomalies
+                from sensor_analytics.background import TASKS
+                from sensor_analytics.comfort import MAX_BARS, METRIC_LABELS, ZONE_SETS, ZoneSet, comfort_report
+                from sensor_analytics.figures import (
+                    DENSITY_THRESHOLD, RENDERER_LABELS, WEBGL_THRESHOLD, choose_renderer, comfort_figure,
+                    correlation_figure,
+                )
+                from sensor_analytics.regression import format_p_value
+                from sensor_analytics.rollups import PATTERN_AXES, pattern_ticks
+                from sensor_analytics.streaming import COMFORT_HUM, COMFORT_TEMP
+
+                st.subheader('🧠 Análisis Avanzado y Correlaciones')
+            
+                # Dense scatter plots switch to WebGL or a 2D density map
+                with st.expander("⚙️ Renderizado de gráficos de dispersión"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        webgl_threshold = st.number_input("Puntos para usar WebGL", min_value=1000,
+                                                          value=WEBGL_THRESHOLD, step=10000)
+                    with col2:
+                        density_threshold = st.number_input("Puntos para usar mapa de densidad",
+                                                            min_value=1000, value=DENSITY_THRESHOLD,
+                                                            step=100000)
+                renderer = choose_renderer(len(df1), webgl_threshold, density_threshold)
+                st.caption(f"🖼️ {len(df1):,} puntos - renderizado: {RENDERER_LABELS[renderer]}")
+            
+                # Both scatter figures are built in background threads while the rest
+                # of the tab renders; results are reused for the same dataset and renderer
+                scatter_future = TASKS.submit((dataset.digest, 'dispersion', renderer),
+                                              correlation_figure, df1, renderer, summary.fit)
+            
+                # Correlation analysis
+                st.write("### 🔗 Análisis de Correlación")
+                correlation = summary.correlation
+            
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    st.metric("🔗 Correlación Temperatura-Humedad", f"{correlation:.3f}")
+                
+                    show_correlation_strength(correlation)
+                    
+                    # Linear fit humedad ~ temperatura, from the summary moments
+                    fit = summary.fit
+                    col_a, col_b, col_c = st.columns(3)
+                    col_a.metric("📐 Pendiente", f"{fit.slope:.3f} %/°C")
+                    col_b.metric("📊 R²", f"{fit.r2:.3f}")
+                    col_c.metric("🎯 Valor p", format_p_value(fit.p_value))
+                
+                    # Scatter plot (filled in once its background task finishes)
+                    scatter_slot = st.empty()
+                    scatter_slot.info("⏳ Calculando gráfico de dispersión...")
             
-            col1, col2 = st.columns(2)
+                with col2:
+                    # Time-based analysis
+                    st.write("### ⏰ Análisis Temporal")
+                
+                    # Calendar patterns come from the hourly/daily rollups, not the raw rows
+                    pattern_key = st.radio("📅 Patrón", list(PATTERN_AXES),
+                                           format_func=lambda key: PATTERN_AXES[key][0], horizontal=True)
+                    axis_title = PATTERN_AXES[pattern_key][0]
+                    with stage('pattern_groupby'):
+                        pattern_avg = dataset.rollups.pattern(pattern_key)
+                    pattern_x = pattern_ticks(pattern_key, pattern_avg.index)
+                
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(x=pattern_x, y=pattern_avg['temperatura'],
+                                           mode='lines+markers', name='Temperatura',
+                                           line=dict(color='#FF6B6B')))
+                    fig.add_trace(go.Scatter(x=pattern_x, y=pattern_avg['humedad'],
+                                           mode='lines+markers', name='Humedad',
+                                           line=dict(color='#4ECDC4'), yaxis='y2'))
+                
+                    fig.update_layout(
+                        title="Patrones Horarios Promedio" if pattern_key == 'hora' else f"Patrones Promedio por {axis_title}",
+                        xaxis_title=axis_title,
+                        yaxis_title="Temperatura (°C)",
+                        yaxis2=dict(title="Humedad (%)", overlaying='y', side='right'),
+                        paper_bgcolor='rgba(0,0,0,0)',
+                        plot_bgcolor='rgba(255,255,255,0.9)'
+                    )
+                    show_figure(fig)
+            
+                # Anomaly detection
+                st.write("### 🚨 Detección de Anomalías")
+            
+                # Pluggable detectors; events are stored as (inicio, fin, severidad) intervals
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    detector = st.selectbox("🧪 Detector", list(DETECTORS),
+                                            format_func=lambda name: DETECTORS[name].label)
+                with col2:
+                    anomaly_window = st.selectbox("🪟 Ventana móvil", ['1h', '6h', '24h'], index=1,
+                                                  disabled=not detector.startswith('rolling'))
+                with col3:
+                    anomaly_threshold = st.slider("🎚️ Umbral (desviaciones)", 1.0, 6.0,
+                                                  float(DETECTORS[detector].threshold), step=0.5)
+                anomaly_future = TASKS.submit(
+                    (dataset.digest, 'anomalias', detector, anomaly_window, anomaly_threshold),
+                    detect_anomalies, df1, detector, anomaly_threshold, window=anomaly_window,
+                )
+                anomaly_slot = st.empty()
+                anomaly_slot.info("⏳ Buscando anomalías...")
             
-            with col1:
+                # Environmental comfort analysis
+                st.write("### 🌿 Análisis de Confort Ambiental")
+
+                with st.expander("⚙️ Zonas de confort"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        comfort_temp = st.slider("🌡️ Temperatura de confort (°C)", 0.0, 40.0,
+                                                 tuple(float(t) for t in COMFORT_TEMP), step=0.5)
+                    with col2:
+                        comfort_hum = st.slider("💧 Humedad de confort (%)", 0, 100, tuple(COMFORT_HUM))
+                    with col3:
+                        comfort_freq = st.selectbox("🗓️ Agrupar por", ['1h', '1D', 'W-MON'], index=1,
+                                                    format_func={'1h': "Hora", '1D': "Día", 'W-MON': "Semana"}.get)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        zone_index = st.selectbox("🧭 Zonas", range(len(ZONE_SETS)),
+                                                  format_func=lambda i: METRIC_LABELS[ZONE_SETS[i].metric])
+                    zone_set = ZONE_SETS[zone_index]
+                    with col2:
+                        edges_text = st.text_input("Límites entre zonas (separados por comas)",
+                                                   ", ".join(f"{edge:g}" for edge in zone_set.edges),
+                                                   key=f"zonas_{zone_set.name}")
+                    try:
+                        edges = tuple(float(edge) for edge in edges_text.split(',') if edge.strip())
+                    except ValueError:
+                        st.error("Límites no válidos: use números separados por comas")
+                    else:
+                        if edges != tuple(float(edge) for edge in zone_set.edges):
+                            try:
+                                zone_set = ZoneSet.from_edges(zone_set.name, zone_set.metric, edges)
+                            except ValueError as e:
+                                st.error(f"Límites no válidos: {e}")
+                zone_sets = tuple(zone_set if z.name == zone_set.name else z for z in ZONE_SETS)
+
+                # One pass over the data per setting, in the background; reruns and
+                # other sessions with the same settings reuse the report
+                report_future = TASKS.submit(
+                    (dataset.digest, 'zonas_confort', zone_sets, comfort_temp, comfort_hum, comfort_freq),
+                    comfort_report, df1, zone_sets, comfort_temp, comfort_hum, comfort_freq,
+                )
+                report_slot = st.empty()
+                report_slot.info("⏳ Calculando confort...")
+
+                # Comfort zone visualization
+                comfort_future = TASKS.submit((dataset.digest, 'confort', renderer, comfort_temp, comfort_hum),
+                                              comfort_figure, df1, renderer, comfort_temp, comfort_hum)
+                comfort_slot = st.empty()
+                comfort_slot.info("⏳ Calculando zona de confort...")
+
+                # Fill the placeholders as the background results become ready
+                with anomaly_slot.container():
+                    with stage('wait_anomalies'):
+                        engine = anomaly_future.result()
+                    col1, col2 = st.columns(2)
+                    for col, var, label in ((col1, 'temperatura', "🌡️ Anomalías de Temperatura"),
+                                            (col2, 'humedad', "💧 Anomalías de Humedad")):
+                        with col:
+                            intervals = engine.intervals[var]
+                            st.metric(label, intervals.rows)
+                            if len(intervals):
+                                st.write(f"{len(intervals):,} eventos (por severidad):")
+                                st.dataframe(intervals.frame().sort_values('severidad', ascending=False),
+                                             hide_index=True)
+                with report_slot.container():
+                    with stage('wait_comfort'):
+                        report = report_future.result()
+                    comfort = report.comfort_percentages()
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("🌡️ Confort Térmico", f"{comfort['confort_temp']:.1f}%")
+                    col2.metric("💧 Confort de Humedad", f"{comfort['confort_hum']:.1f}%")
+                    col3.metric("🌿 Confort Total", f"{comfort['confort_total']:.1f}%")
+
+                    derived = report.metric_summary()
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("💦 Punto de rocío medio", f"{derived['punto_rocio']['mean']:.1f} °C")
+                    col2.metric("🥵 Índice de calor máximo", f"{derived['indice_calor']['max']:.1f} °C")
+                    col3.metric("🌡️ Humidex máximo", f"{derived['humidex']['max']:.1f}")
+
+                    st.write(f"#### {METRIC_LABELS[zone_set.metric]}: % del tiempo en cada zona")
+                    # Hourly buckets over months would be thousands of bars
+                    st.bar_chart(report.zone_frame(zone_set.name, percent=True, max_buckets=MAX_BARS))
+                for slot, future in ((scatter_slot, scatter_future), (comfort_slot, comfort_future)):
+                    show_figure(future.result(), slot)
+
+        with tab5, stage('tab_sitio'):
+            if tab5.open:
+                st.subheader("🌍 Información del Sitio de Medición")
+            
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    st.markdown("""
+                    <div class="info-box">
+                    <h3>📍 Ubicación del Sensor</h3>
+                    <p><strong>🔒 CLASIFICADO</strong></p>
+                    <p>🌍 <strong>Latitud:</strong> 6.2479</p>
+                    <p>🌍 <strong>Longitud:</strong> -75.6081</p>
+                    <p>⛰️ <strong>Altitud:</strong> ~1,495 metros sobre el nivel del mar</p>
+                    <p>🏞️ <strong>Ecosistema:</strong> Bosque húmedo montano bajo</p>
+                    <p>🌡️ <strong>Clima:</strong> Tropical de montaña</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            
+                with col2:
+                    st.markdown("""
+                    <div class="info-box">
+                    <h3>📱 Detalles del Sensor</h3>
+                    <p>🔧 <strong>Tipo:</strong> ESP32</p>
+                    <p>📊 <strong>Variables medidas:</strong></p>
+                    <ul>
+                    <li>🌡️ Temperatura (°C)</li>
+                    <li>💧 Humedad relativa (%)</li>
+                    </ul>
+                    <p>⏱️ <strong>Frecuencia:</strong> Según configuración</p>
+                    <p>🏫 <strong>Ubicación:</strong> Campus universitario</p>
+                    <p>🌿 <strong>Entorno:</strong> Zona verde urbana</p>
+                    <p>🔋 <strong>Alimentación:</strong> Solar/Batería</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+            
+                # Environmental context
                 st.markdown("""
                 <div class="info-box">
-                <h3>📍 Ubicación del Sensor</h3>
-                <p><strong>🔒 CLASIFICADO</strong></p>
-                <p>🌍 <strong>Latitud:</strong> 6.2479</p>
-                <p>🌍 <strong>Longitud:</strong> -75.6081</p>
-                <p>⛰️ <strong>Altitud:</strong> ~1,495 metros sobre el nivel del mar</p>
-                <p>🏞️ <strong>Ecosistema:</strong> Bosque húmedo montano bajo</p>
-                <p>🌡️ <strong>Clima:</strong> Tropical de montaña</p>
-                </div>
-                """, unsafe_allow_html=True)
+                <h3>🌱 Contexto Ambiental</h3>
+                <p>El sensor está ubicado en un entorno que representa las condiciones microclimáticas 
+                típicas de un ecosistema urbano en la región andina colombiana. Los datos recolectados 
+                contribuyen al monitoreo de la calidad ambiental y el confort climático en espacios verdes urbanos.</p>
             
-            with col2:
-                st.markdown("""
-                <div class="info-box">
-                <h3>📱 Detalles del Sensor</h3>
-                <p>🔧 <strong>Tipo:</strong> ESP32</p>
-                <p>📊 <strong>Variables medidas:</strong></p>
+                <p><strong>🌿 Características del sitio:</strong></p>
                 <ul>
-                <li>🌡️ Temperatura (°C)</li>
-                <li>💧 Humedad relativa (%)</li>
+                <li>🌳 Presencia de vegetación nativa y ornamental</li>
+                <li>🏢 Influencia de infraestructura urbana</li>
+                <li>💨 Circulación de aire natural</li>
+                <li>☀️ Exposición solar variable por cobertura arbórea</li>
                 </ul>
-                <p>⏱️ <strong>Frecuencia:</strong> Según configuración</p>
-                <p>🏫 <strong>Ubicación:</strong> Campus universitario</p>
-                <p>🌿 <strong>Entorno:</strong> Zona verde urbana</p>
-                <p>🔋 <strong>Alimentación:</strong> Solar/Batería</p>
                 </div>
                 """, unsafe_allow_html=True)
-            
-            # Environmental context
-            st.markdown("""
-            <div class="info-box">
-            <h3>🌱 Contexto Ambiental</h3>
-            <p>El sensor está ubicado en un entorno que representa las condiciones microclimáticas 
-            típicas de un ecosistema urbano en la región andina colombiana. Los datos recolectados 
-            contribuyen al monitoreo de la calidad ambiental y el confort climático en espacios verdes urbanos.</p>
-            
-            <p><strong>🌿 Características del sitio:</strong></p>
-            <ul>
-            <li>🌳 Presencia de vegetación nativa y ornamental</li>
-            <li>🏢 Influencia de infraestructura urbana</li>
-            <li>💨 Circulación de aire natural</li>
-            <li>☀️ Exposición solar variable por cobertura arbórea</li>
-            </ul>
-            </div>
-            """, unsafe_allow_html=True)
 
     except Exception as e:
         st.error(f'❌ Error al procesar el archivo: {str(e)}')
@@ -632,3 +977,26 @@ st.markdown("""
     🌍 <em>Monitoreando nuestro entorno natural para un futuro sostenible</em> 🌱
     </div>
 """, unsafe_allow_html=True)
+
+if profiler is not None:
+    import pandas as pd
+
+    profiler.finish()
+    with perf_report.container():
+        records = pd.DataFrame(profiler.records()).set_index('name')
+        records['seconds'] *= 1000
+        records = records.rename(columns={
+            'seconds': 'ms', 'calls': 'llamadas', 'rows': 'registros',
+            'bytes_sent': 'bytes al navegador', 'peak_bytes': 'pico de memoria',
+        })
+        if not profile_memory:
+            records = records.drop(columns='pico de memoria')
+        st.caption(f"Última ejecución: {profiler.seconds * 1000:.0f} ms; "
+                   f"{records['bytes al navegador'].sum() / 1024:.0f} KB enviados")
+        st.dataframe(records.sort_values('ms', ascending=False), column_config={
+            'ms': st.column_config.NumberColumn(format="%.1f"),
+        })
+        st.download_button("⬇️ JSON", profiler.to_json(), file_name="rendimiento.json",
+                           mime="application/json")
+        st.download_button("⬇️ Prometheus", profiler.to_prometheus(), file_name="rendimiento.prom",
+                           mime="text/plain")
@@ -0,0 +1,367 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from sensor_analytics.compact import PackedFrame
+from sensor_analytics.ingest import SENSOR_COL, TIME_COL, parse_times, read_sensor_csv, sniff_header
+
+DEFAULT_SIZES = ('10k', '100k', '1M')
+WRITE_CHUNK = 1_000_000
+# Share of rows removed as outages and turned into spikes
+GAP_FRACTION = 0.02
+ANOMALY_FRACTION = 0.001
+# Modules whose import dominates a cold start; the welcome screen should not need them
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'plotly.express', 'plotly.subplots', 'PIL.Image')
+# Run in a fresh interpreter so module imports are really cold
+STARTUP_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+first = time.perf_counter()
+at.run()
+second = time.perf_counter()
+def payload(node):
+    proto = getattr(node, 'proto', None)
+    own = proto.ByteSize() if proto is not None else 0
+    return own + sum(payload(child) for child in getattr(node, 'children', {}).values())
+print(json.dumps({
+    'bytes': payload(at._tree),
+    'first_run': first - start,
+    'rerun': second - first,
+    'modules': len(set(sys.modules) - before),
+    'heavy': [m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in before],
+    'errors': [e.value for e in at.exception],
+}))
+"""
+# A stage counts as a regression when it is this much slower than the baseline
+REGRESSION_FACTOR = 1.25
+
+
+def parse_size(text):
+    text = str(text).strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+def synthetic_readings(n, start='2024-01-01', freq='1min', seed=0,
+                       gap_fraction=GAP_FRACTION, anomaly_fraction=ANOMALY_FRACTION):
+    """Diurnal temperature/humidity with noise, outages and spikes.
+
+    ``n`` rows are generated on a regular grid; about ``gap_fraction`` of
+    them are then removed in a few contiguous outages, so the result has
+    slightly fewer rows and real gaps.
+    """
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(freq).value
+    times = pd.Timestamp(start).value + np.arange(n, dtype=np.int64) * step
+    hours = (times // 3_600_000_000_000 % 24) + (times // 60_000_000_000 % 60) / 60
+    phase = np.sin((hours - 9) / 24 * 2 * np.pi)
+    temp = 22 + 4 * phase + rng.normal(0, 0.5, n)
+    hum = 60 - 10 * phase + rng.normal(0, 2, n)
+
+    spikes = rng.choice(n, size=int(n * anomaly_fraction), replace=False)
+    temp[spikes] += rng.choice([-1, 1], len(spikes)) * rng.uniform(8, 15, len(spikes))
+
+    keep = np.ones(n, dtype=bool)
+    n_gaps = max(int(n * gap_fraction) // 500, 1 if gap_fraction else 0)
+    for gap_start in rng.integers(0, n, n_gaps):
+        keep[gap_start:gap_start + rng.integers(50, 1000)] = False
+    return pd.DataFrame({
+        'temperatura': temp[keep].round(1).astype(np.float32),
+        'humedad': hum[keep].round(1).astype(np.float32),
+    }, index=pd.DatetimeIndex(times[keep].view('datetime64[ns]'), name=TIME_COL))
+
+
+def write_synthetic_csv(path, n, seed=0, chunk_rows=WRITE_CHUNK):
+    """Write a Grafana-style export of ``n`` synthetic rows, chunk by chunk."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, start in enumerate(range(0, n, chunk_rows)):
+            rows = min(chunk_rows, n - start)
+            offset = pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=start)
+            chunk = synthetic_readings(rows, start=offset, seed=seed + i)
+            out = pd.DataFrame({
+                TIME_COL: np.char.replace(np.datetime_as_string(chunk.index.values, unit='s'), 'T', ' '),
+                'temperatura ESP32': chunk['temperatura'].to_numpy(),
+                'humedad ESP32': chunk['humedad'].to_numpy(),
+            })
+            out.to_csv(f, index=False, header=(i == 0), float_format='%.1f')
+    return path
+
+
+def _stages():
+    """Name -> callable(ctx) for every analysis path, as the app runs it."""
+    from sensor_analytics.anomalies import detect_anomalies
+    from sensor_analytics.comfort import ComfortEngine
+    from sensor_analytics.downsample import DEFAULT_POINTS, downsample_series
+    from sensor_analytics.figures import choose_renderer, correlation_figure
+    from sensor_analytics.filters import SortedIndex
+    from sensor_analytics.quality import assess, clean_order
+    from sensor_analytics.regression import ols_fit
+    from sensor_analytics.rollups import RollupPyramid
+    from sensor_analytics.stats import compute_summary
+    from sensor_analytics.streaming import COMFORT_HUM, COMFORT_TEMP
+
+    def values(ctx):
+        return ctx['frame']['temperatura'].to_numpy(), ctx['frame']['humedad'].to_numpy()
+
+    def comfort(ctx):
+        temp, hum = values(ctx)
+        in_temp = (temp >= COMFORT_TEMP[0]) & (temp <= COMFORT_TEMP[1])
+        in_hum = (hum >= COMFORT_HUM[0]) & (hum <= COMFORT_HUM[1])
+        return int(in_temp.sum()), int(in_hum.sum()), int((in_temp & in_hum).sum())
+
+    def filter_masks(ctx):
+        # The original Filtros tab: two boolean masks over the whole frame
+        frame = ctx['frame']
+        col = frame['temperatura']
+        lo, hi = ctx['thresholds']
+        return len(frame[col > lo]), len(frame[col < hi])
+
+    def filter_index(ctx):
+        index = SortedIndex(ctx['frame']['temperatura'].to_numpy())
+        lo, hi = ctx['thresholds']
+        return index.count(lower=lo), index.count(upper=hi)
+
+    return {
+        'detect_columns': lambda ctx: sniff_header(ctx['path']),
+        'load_csv': lambda ctx: read_sensor_csv(ctx['path']),
+        'to_datetime': lambda ctx: parse_times(ctx['time_strings'], ctx['time_format']),
+        'clean_order': lambda ctx: clean_order(ctx['long']),
+        'pack': lambda ctx: PackedFrame(ctx['long']),
+        'unpack': lambda ctx: ctx['packed'].to_frame(),
+        'quality': lambda ctx: assess(ctx['frame']),
+        'describe': lambda ctx: ctx['frame'].describe(),
+        'summary': lambda ctx: compute_summary(ctx['frame']),
+        'filter_masks': filter_masks,
+        'filter_index': filter_index,
+        'correlation_ols': lambda ctx: ols_fit(*values(ctx)),
+        'hourly_groupby': lambda ctx: ctx['frame'].groupby(ctx['frame'].index.hour).mean(),
+        'rollups': lambda ctx: RollupPyramid(ctx['frame']).pattern('hora'),
+        'anomalies_global': lambda ctx: detect_anomalies(ctx['frame'], 'global'),
+        'anomalies_rolling_z': lambda ctx: detect_anomalies(ctx['frame'], 'rolling_z'),
+        'anomalies_seasonal': lambda ctx: detect_anomalies(ctx['frame'], 'seasonal'),
+        'comfort': comfort,
+        'comfort_engine': lambda ctx: ComfortEngine(freq='1h').update(ctx['frame']).result(),
+        'downsample_lttb': lambda ctx: downsample_series(ctx['frame']['temperatura'], DEFAULT_POINTS),
+        'scatter_figure': lambda ctx: correlation_figure(
+            ctx['frame'], choose_renderer(len(ctx['frame'])), ols_fit(*values(ctx))),
+    }
+
+
+STAGES = tuple(_stages())
+
+
+# Inputs only some stages need, built on first use and freed after them
+STAGE_INPUTS = {
+    'to_datetime': ('time_strings',),
+    'unpack': ('packed',),
+}
+
+
+class _Context(dict):
+    """Stage inputs, parsed once per file outside the timed calls.
+
+    The frames every stage shares are built up front; the raw timestamp
+    strings (a Python object per row, gigabytes at 50M rows) and the packed
+    frame are built only for the stage that needs them.
+    """
+
+    def __init__(self, path):
+        long, _ = read_sensor_csv(path)
+        _, time_format = sniff_header(path)
+        frame = long.drop(columns=SENSOR_COL)
+        # Filter thresholds are an input of the filter stages, not part of them
+        thresholds = tuple(np.nanquantile(frame['temperatura'].to_numpy(), [0.25, 0.75]))
+        super().__init__(path=path, long=long, frame=frame, time_format=time_format,
+                         thresholds=thresholds)
+
+    def __missing__(self, key):
+        if key == 'time_strings':
+            value = pd.read_csv(self['path'], usecols=[TIME_COL], dtype={TIME_COL: object})[TIME_COL]
+        elif key == 'packed':
+            value = PackedFrame(self['long'])
+        else:
+            raise KeyError(key)
+        self[key] = value
+        return value
+
+    def prepare(self, stage):
+        for key in STAGE_INPUTS.get(stage, ()):
+            self[key]
+
+    def release(self, stage):
+        for key in STAGE_INPUTS.get(stage, ()):
+            self.pop(key, None)
+
+
+def measure(fn, repeat=3, memory=True):
+    """Best and median wall time of ``repeat`` calls, plus one traced peak."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        # Separate call: tracing slows allocation-heavy code down
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'median_seconds': float(np.median(timings)), 'peak_bytes': peak}
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages=STAGES, repeat=3, memory=True, data_dir=None, log=None):
+    """Time (and trace) every stage on synthetic files of each size."""
+    available = _stages()
+    data_dir = data_dir or tempfile.gettempdir()
+    results = []
+    for size in sizes:
+        n = parse_size(size)
+        path = os.path.join(data_dir, f"sensores_sinteticos_{n}.csv")
+        if not os.path.exists(path):
+            write_synthetic_csv(path, n)
+        ctx = _Context(path)
+        rows = len(ctx['frame'])
+        for stage in stages:
+            ctx.prepare(stage)
+            result = measure(lambda: available[stage](ctx), repeat, memory)
+            ctx.release(stage)
+            result.update(stage=stage, size=n, rows=rows)
+            results.append(result)
+            if log:
+                peak = f"{result['peak_bytes'] / 1e6:9.1f} MB" if result['peak_bytes'] is not None else ''
+                log(f"{n:>11,} {stage:22s} {result['seconds'] * 1000:10.1f} ms {peak}")
+        del ctx
+    return {'meta': _metadata(), 'results': results}
+
+
+def measure_startup(app_path='app.py', repeat=3):
+    """Welcome-screen cost of the dashboard, each sample in a fresh process.
+
+    ``first_run`` is the first script run of a new server process (module
+    imports included), ``rerun`` a second run once they are cached; both
+    are measured with Streamlit's AppTest, without a browser.
+    """
+    app_path = os.path.abspath(app_path)
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', STARTUP_PROBE, app_path, json.dumps(HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True, cwd=os.path.dirname(app_path))
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        'first_run': min(s['first_run'] for s in samples),
+        'rerun': min(s['rerun'] for s in samples),
+        'bytes': samples[0]['bytes'],
+        'modules': samples[0]['modules'],
+        'heavy': samples[0]['heavy'],
+        'errors': samples[0]['errors'],
+    }
+
+
+def compare(baseline, current, factor=REGRESSION_FACTOR):
+    """Stages (per size) whose best time grew by more than ``factor``."""
+    before = {(r['stage'], r['size']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        old = before.get((r['stage'], r['size']))
+        if old is None or not old['seconds']:
+            continue
+        ratio = r['seconds'] / old['seconds']
+        rows.append({'stage': r['stage'], 'size': r['size'], 'before': old['seconds'],
+                     'after': r['seconds'], 'ratio': ratio, 'regression': ratio > factor})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las rutas de análisis de sensores")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="medir y guardar resultados en JSON")
+    run.add_argument('--sizes', default=','.join(DEFAULT_SIZES), help="p. ej. 10k,100k,1M,50M")
+    run.add_argument('--stages', default=','.join(STAGES))
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--no-memory', action='store_true', help="omitir la medición con tracemalloc")
+    run.add_argument('--data-dir', default=None, help="carpeta para los CSV sintéticos (se reutilizan)")
+    run.add_argument('--out', default='-')
+
+    startup = commands.add_parser('startup', help="medir el arranque de la pantalla de bienvenida")
+    startup.add_argument('--app', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'))
+    startup.add_argument('--repeat', type=int, default=3)
+
+    cmp = commands.add_parser('compare', help="comparar dos resultados JSON")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--factor', type=float, default=REGRESSION_FACTOR)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        stages = [s for s in args.stages.split(',') if s]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            parser.error(f"etapas desconocidas: {', '.join(sorted(unknown))}")
+        report = run_benchmarks(args.sizes.split(','), stages, args.repeat, not args.no_memory,
+                                args.data_dir, log=lambda line: print(line, file=sys.stderr))
+        text = json.dumps(report, indent=1)
+        if args.out == '-':
+            print(text)
+        else:
+            with open(args.out, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return 0
+    if args.command == 'startup':
+        result = measure_startup(args.app, args.repeat)
+        print(f"primera ejecución {result['first_run'] * 1000:7.0f} ms")
+        print(f"re-ejecución      {result['rerun'] * 1000:7.0f} ms")
+        print(f"elementos         {result['bytes'] / 1024:7.1f} KB")
+        print(f"módulos cargados  {result['modules']:7d}  ({', '.join(result['heavy']) or 'ninguno pesado'})")
+        for error in result['errors']:
+            print(f"error: {error}")
+        return 1 if result['errors'] else 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.factor)
+    for row in rows:
+        flag = 'REGRESIÓN' if row['regression'] else ''
+        print(f"{row['size']:>11,} {row['stage']:22s} {row['before'] * 1000:9.1f} -> "
+              f"{row['after'] * 1000:9.1f} ms  x{row['ratio']:.2f} {flag}")
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
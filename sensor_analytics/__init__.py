@@ -0,0 +1,42 @@
+"""Headless analysis of ESP32 temperature/humidity exports.
+
+Everything here works on NumPy arrays and pandas frames; the Streamlit page
+(``app.py``) is a view over it. Plotting lives in ``sensor_analytics.figures``
+and is not imported by the package, so batch use does not load plotly.
+
+The names below are imported on first access, so importing a light
+submodule (``config``, ``instrument``) does not load pandas.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'analyze': 'analysis', 'correlation_strength': 'analysis', 'sensor_report': 'analysis',
+    'DETECTORS': 'anomalies', 'AnomalyEngine': 'anomalies', 'detect_anomalies': 'anomalies',
+    'ZONE_SETS': 'comfort', 'ComfortEngine': 'comfort', 'ZoneSet': 'comfort',
+    'dew_point': 'comfort', 'heat_index': 'comfort', 'humidex': 'comfort',
+    'SortedIndex': 'filters',
+    'SENSOR_COL': 'ingest', 'TIME_COL': 'ingest', 'VARIABLES': 'ingest',
+    'MissingColumnsError': 'ingest', 'read_sensor_csv': 'ingest',
+    'Dataset': 'loader', 'DatasetCache': 'loader', 'load_dataset': 'loader',
+    'assess': 'quality', 'regularize': 'quality',
+    'ols_fit': 'regression',
+    'RollupPyramid': 'rollups',
+    'compute_summary': 'stats', 'sensor_statistics': 'stats',
+    'stream_sensor_csv': 'streaming',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
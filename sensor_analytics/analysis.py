@@ -0,0 +1,130 @@
+import numpy as np
+
+from .anomalies import AnomalyEngine, detect_anomalies
+from .comfort import ComfortEngine
+from .ingest import SENSOR_COL, VARIABLES
+from .loader import load_dataset
+from .regression import ols_from_pair
+from .streaming import CHUNK_ROWS, SensorAccumulator, iter_sensor_chunks
+
+# |r| above these bounds reads as a strong or moderate correlation
+STRONG_CORRELATION = 0.7
+MODERATE_CORRELATION = 0.3
+
+
+def correlation_strength(r):
+    """'fuerte', 'moderada' or 'débil', as the dashboard labels a correlation."""
+    if abs(r) > STRONG_CORRELATION:
+        return 'fuerte'
+    if abs(r) > MODERATE_CORRELATION:
+        return 'moderada'
+    return 'débil'
+
+
+def comfort_columns(report):
+    """Report columns for the derived comfort metrics of a ``ComfortReport``."""
+    derived = report.metric_summary()
+    return {
+        'punto_rocio_mean': derived['punto_rocio']['mean'],
+        'indice_calor_max': derived['indice_calor']['max'],
+        'humidex_max': derived['humidex']['max'],
+    }
+
+
+def sensor_report(dataset, detector='global', threshold=None, **options):
+    """Headline results of one single-sensor dataset as a flat dict.
+
+    These are the numbers the dashboard shows, without Streamlit or plotly,
+    so a report can be written as one row of a table.
+    """
+    summary = dataset.summary
+    quality = dataset.quality
+    report = {
+        'rows': summary.rows,
+        'start': quality.start,
+        'end': quality.end,
+    }
+    for var in VARIABLES:
+        column = summary[var]
+        q25, q50, q75 = column.quantiles
+        report.update({
+            f"{var}_mean": column.mean, f"{var}_std": column.std,
+            f"{var}_min": column.min, f"{var}_max": column.max,
+            f"{var}_p25": q25, f"{var}_p50": q50, f"{var}_p75": q75,
+        })
+    fit = summary.fit
+    report.update({
+        'correlacion': summary.correlation,
+        'pendiente': fit.slope,
+        'r2': fit.r2,
+        'p_valor': fit.p_value,
+        'intervalo_s': quality.interval.total_seconds() if quality.interval is not None else np.nan,
+        'huecos': quality.gap_count,
+        'duplicados': quality.duplicates,
+        'fuera_de_orden': quality.out_of_order,
+    })
+    report.update({f"cobertura_{var}_%": quality.coverage[var] for var in VARIABLES})
+    comfort = dataset.comfort()
+    report.update({f"{key}_%": value for key, value in comfort.comfort_percentages().items()})
+    report.update(comfort_columns(comfort))
+
+    engine = detect_anomalies(dataset.frame, detector, threshold, **options)
+    for var in VARIABLES:
+        report[f"anomalias_{var}"] = engine.intervals[var].rows
+        report[f"eventos_{var}"] = len(engine.intervals[var])
+    return report
+
+
+def analyze(source, detector='global', threshold=None, **options):
+    """``sensor_report`` for every sensor of a CSV path, bytes or ``Dataset``."""
+    dataset = source if hasattr(source, 'for_sensor') else load_dataset(source)
+    return {
+        sensor: sensor_report(dataset.for_sensor(sensor), detector, threshold, **options)
+        for sensor in dataset.sensors
+    }
+
+
+def stream_report(source, detector='global', threshold=None, chunksize=CHUNK_ROWS, **options):
+    """``analyze`` for files too large to load: one pass, chunk by chunk.
+
+    Quantiles come from the streaming histograms, and the sampling/gap
+    columns are left empty because they need the whole time index. The
+    global and seasonal detectors score each reading against what came
+    before it, so their counts can differ from ``analyze``.
+    """
+    accumulators, engines, comfort = {}, {}, {}
+    for chunk in iter_sensor_chunks(source, chunksize=chunksize):
+        for sensor, group in chunk.groupby(SENSOR_COL, observed=True, sort=False):
+            if sensor not in accumulators:
+                accumulators[sensor] = SensorAccumulator()
+                engines[sensor] = AnomalyEngine(detector, threshold, **options)
+                comfort[sensor] = ComfortEngine()
+            group = group.drop(columns=SENSOR_COL)
+            accumulators[sensor].update(group)
+            engines[sensor].update(group)
+            comfort[sensor].update(group)
+
+    reports = {}
+    for sensor, acc in accumulators.items():
+        report = {'rows': acc.rows, 'start': acc.start, 'end': acc.end}
+        for var in VARIABLES:
+            described = acc.describe(var)
+            report.update({
+                f"{var}_mean": described['mean'], f"{var}_std": described['std'],
+                f"{var}_min": described['min'], f"{var}_max": described['max'],
+                f"{var}_p25": described['25%'], f"{var}_p50": described['50%'], f"{var}_p75": described['75%'],
+            })
+        fit = ols_from_pair(acc.pair)
+        report.update({
+            'correlacion': acc.correlation, 'pendiente': fit.slope, 'r2': fit.r2, 'p_valor': fit.p_value,
+            'intervalo_s': np.nan, 'huecos': np.nan, 'duplicados': np.nan, 'fuera_de_orden': np.nan,
+        })
+        report.update({f"cobertura_{var}_%": np.nan for var in VARIABLES})
+        comfort_report = comfort[sensor].result()
+        report.update({f"{key}_%": value for key, value in comfort_report.comfort_percentages().items()})
+        report.update(comfort_columns(comfort_report))
+        for var in VARIABLES:
+            report[f"anomalias_{var}"] = engines[sensor].intervals[var].rows
+            report[f"eventos_{var}"] = len(engines[sensor].intervals[var])
+        reports[sensor] = report
+    return reports
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+
+from .ingest import VARIABLES
+from .streaming import RunningStats
+
+# Consecutive flagged readings at most this many rows apart form one event
+MERGE_GAP = 3
+ROLLING_WINDOW = '6h'
+MIN_PERIODS = 10
+# Scales the MAD so it estimates the standard deviation of normal data
+MAD_SCALE = 1.4826
+
+
+class GlobalZScore:
+    """Distance from the mean of everything seen so far, in standard deviations."""
+
+    label = 'Global (media ± k·σ)'
+    threshold = 2.0
+
+    def __init__(self, **_):
+        self.stats = RunningStats()
+
+    def score(self, times, values):
+        self.stats.update(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (values - self.stats.mean) / self.stats.std
+
+
+class SeasonalBaseline:
+    """Z-score against the mean and spread of the same hour of day.
+
+    Hours are read on the wall clock of ``tz``, the timezone of the data.
+    """
+
+    label = 'Línea base por hora del día'
+    threshold = 3.0
+
+    def __init__(self, tz=None, **_):
+        self.tz = tz
+        self.sums = np.zeros(24)
+        self.squares = np.zeros(24)
+        self.counts = np.zeros(24)
+
+    def score(self, times, values):
+        if self.tz is not None:
+            # UTC ticks -> wall-clock ticks of the data's timezone
+            local = pd.DatetimeIndex(times.view('datetime64[ns]')).tz_localize('UTC').tz_convert(self.tz)
+            times = local.tz_localize(None).asi8
+        hours = ((times // 3_600_000_000_000) % 24).astype(np.intp)
+        valid = np.isfinite(values)
+        self.sums += np.bincount(hours[valid], weights=values[valid], minlength=24)
+        self.squares += np.bincount(hours[valid], weights=values[valid] ** 2, minlength=24)
+        self.counts += np.bincount(hours[valid], minlength=24)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.sums / self.counts
+            std = np.sqrt(np.maximum(self.squares / self.counts - mean ** 2, 0) * self.counts / (self.counts - 1))
+            return (values - mean[hours]) / std[hours]
+
+
+class _Rolling:
+    """Trailing time-window detector that carries the window tail between calls."""
+
+    # Multiples of the window that must precede a new reading for exact results
+    context = 1
+
+    def __init__(self, window=ROLLING_WINDOW, min_periods=MIN_PERIODS, **_):
+        self.window = pd.Timedelta(window)
+        self.min_periods = min_periods
+        self.tail_times = np.zeros(0, dtype=np.int64)
+        self.tail_values = np.zeros(0)
+
+    def score(self, times, values):
+        all_times = np.concatenate([self.tail_times, times])
+        all_values = np.concatenate([self.tail_values, values])
+        series = pd.Series(all_values, index=pd.DatetimeIndex(all_times.view('datetime64[ns]')))
+        scores = self._scores(series)[len(self.tail_times):]
+
+        keep = all_times > all_times[-1] - self.context * self.window.value
+        self.tail_times, self.tail_values = all_times[keep], all_values[keep]
+        return scores
+
+    @property
+    def nbytes(self):
+        return self.tail_times.nbytes + self.tail_values.nbytes
+
+    def _rolling(self, series):
+        return series.rolling(self.window, min_periods=self.min_periods)
+
+
+class RollingZScore(_Rolling):
+    label = 'Z-score móvil'
+    threshold = 3.0
+
+    def _scores(self, series):
+        rolling = self._rolling(series)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((series - rolling.mean()) / rolling.std()).to_numpy()
+
+
+class RollingMAD(_Rolling):
+    """Robust z-score from the trailing median and median absolute deviation."""
+
+    label = 'Mediana/MAD móvil'
+    threshold = 3.5
+    # The MAD window needs the medians of the window before it
+    context = 2
+
+    def _scores(self, series):
+        median = self._rolling(series).median()
+        deviation = (series - median).abs()
+        mad = self._rolling(deviation).median() * MAD_SCALE
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return ((series - median) / mad.where(mad > 0)).to_numpy()
+
+
+DETECTORS = {
+    'global': GlobalZScore,
+    'rolling_z': RollingZScore,
+    'rolling_mad': RollingMAD,
+    'seasonal': SeasonalBaseline,
+}
+
+# One row per anomalous event
+INTERVAL_FIELDS = (
+    ('start', np.int64), ('end', np.int64),
+    ('first', np.int64), ('last', np.int64),
+    ('rows', np.int32), ('severity', np.float32), ('peak', np.float32),
+)
+
+
+class AnomalyIntervals:
+    """Compact (start, end, severity) index of the events of one variable.
+
+    ``first``/``last`` are row positions in the scored stream, ``rows`` the
+    flagged readings inside the event, ``severity`` the largest absolute score
+    and ``peak`` the reading where it occurred. Times are UTC ticks, shown in
+    ``tz`` by ``frame``.
+    """
+
+    def __init__(self, tz=None):
+        self.events = np.zeros(0, dtype=list(INTERVAL_FIELDS))
+        self.tz = tz
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def rows(self):
+        return int(self.events['rows'].sum())
+
+    @property
+    def nbytes(self):
+        return self.events.nbytes
+
+    def add(self, positions, times, scores, values, gap=MERGE_GAP):
+        """Group flagged positions (ascending) into events and append them."""
+        if len(positions) == 0:
+            return
+        magnitude = np.abs(scores)
+        starts = np.flatnonzero(np.r_[True, np.diff(positions) > gap])
+        lengths = np.diff(np.r_[starts, len(positions)])
+        ends = starts + lengths - 1
+        severity = np.maximum.reduceat(magnitude, starts)
+        run = np.repeat(np.arange(len(starts)), lengths)
+        at_peak = np.flatnonzero(magnitude == severity[run])
+        _, first_peak = np.unique(run[at_peak], return_index=True)
+
+        events = np.empty(len(starts), dtype=self.events.dtype)
+        events['start'], events['end'] = times[starts], times[ends]
+        events['first'], events['last'] = positions[starts], positions[ends]
+        events['rows'] = lengths
+        events['severity'] = severity
+        events['peak'] = values[at_peak[first_peak]]
+
+        # An event still open at the end of the previous batch continues here
+        if len(self.events) and events['first'][0] - self.events['last'][-1] <= gap:
+            previous, head = self.events[-1], events[0]
+            previous['end'], previous['last'] = head['end'], head['last']
+            previous['rows'] += head['rows']
+            if head['severity'] > previous['severity']:
+                previous['severity'], previous['peak'] = head['severity'], head['peak']
+            events = events[1:]
+        self.events = np.concatenate([self.events, events])
+
+    def frame(self):
+        events = self.events
+        start = pd.DatetimeIndex(events['start'].view('datetime64[ns]'))
+        end = pd.DatetimeIndex(events['end'].view('datetime64[ns]'))
+        if self.tz is not None:
+            start = start.tz_localize('UTC').tz_convert(self.tz)
+            end = end.tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame({
+            'inicio': start,
+            'fin': end,
+            'duración': end - start,
+            'lecturas': events['rows'],
+            'severidad': events['severity'],
+            'valor pico': events['peak'],
+        })
+
+
+class AnomalyEngine:
+    """Runs one detector per variable over a stream of time-ordered batches.
+
+    ``update`` scores only the new readings: rolling detectors keep the tail
+    of their window and the global/seasonal ones their running statistics, so
+    feeding a frame in chunks gives the same events as one batch for the
+    rolling detectors. Readings no newer than the last one already scored
+    arrive too late to be placed in a window; they are dropped and counted in
+    ``late``. Detectors are built on the first batch, which sets the
+    timezone the seasonal baseline and the event table read times in.
+    """
+
+    def __init__(self, detector='rolling_mad', threshold=None, variables=VARIABLES, **options):
+        self.detector = detector
+        self.threshold = DETECTORS[detector].threshold if threshold is None else threshold
+        self.variables = tuple(variables)
+        self._options = options
+        self._detectors = {}
+        self.intervals = {var: AnomalyIntervals() for var in self.variables}
+        self.rows = 0
+        self.late = 0
+        self._last_time = None
+
+    @property
+    def nbytes(self):
+        """Bytes of the events plus whatever the detectors carry between batches."""
+        return sum(intervals.nbytes for intervals in self.intervals.values()) + sum(
+            getattr(detector, 'nbytes', 0) for detector in self._detectors.values())
+
+    def update(self, frame):
+        if frame.empty:
+            return self
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()
+        if not self._detectors:
+            tz = frame.index.tz
+            self._detectors = {var: DETECTORS[self.detector](tz=tz, **self._options) for var in self.variables}
+            for intervals in self.intervals.values():
+                intervals.tz = tz
+        times = frame.index.as_unit('ns').asi8
+        if self._last_time is not None and times[0] <= self._last_time:
+            start = np.searchsorted(times, self._last_time, side='right')
+            self.late += start
+            frame, times = frame.iloc[start:], times[start:]
+            if frame.empty:
+                return self
+        self._last_time = times[-1]
+        positions = self.rows + np.arange(len(frame))
+        for var in self.variables:
+            values = frame[var].to_numpy(dtype=np.float64)
+            scores = self._detectors[var].score(times, values)
+            flagged = np.flatnonzero(np.abs(scores) > self.threshold)
+            self.intervals[var].add(positions[flagged], times[flagged], scores[flagged], values[flagged])
+        self.rows += len(frame)
+        return self
+
+
+def detect_anomalies(frame, detector='rolling_mad', threshold=None, **options):
+    """Batch helper: the engine after scoring the whole frame."""
+    return AnomalyEngine(detector, threshold, **options).update(frame)
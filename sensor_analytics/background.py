@@ -0,0 +1,134 @@
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrument import stage
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Finished results kept for reuse across reruns and sessions
+MAX_RESULTS = 32
+# Figure properties that carry per-point data
+FIGURE_ARRAYS = ('x', 'y', 'z', 'customdata', 'text')
+
+
+def result_bytes(value):
+    """Approximate bytes held by a task result (frames, arrays, figures, tuples)."""
+    if value is None:
+        return 0
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sum(result_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(result_bytes(item) for item in value.values())
+    if hasattr(value, 'data') and hasattr(value, 'layout'):
+        # A plotly figure: its size is in the point arrays of the traces
+        return sum(_array_bytes(trace[prop]) for trace in value.data
+                   for prop in FIGURE_ARRAYS if prop in trace)
+    return 0
+
+
+def _array_bytes(values):
+    if values is None:
+        return 0
+    if hasattr(values, 'nbytes'):
+        return int(values.nbytes)
+    return 8 * len(values) if isinstance(values, (tuple, list)) else 0
+
+
+class TaskCache:
+    """Background computations as futures, keyed by dataset and parameters.
+
+    ``submit`` returns the existing future for a key when there is one, so a
+    rerun with the same dataset and settings picks up the running or finished
+    computation instead of starting it again. Failed tasks are retried on the
+    next submit. Threads are enough here: the heavy work is NumPy/pandas code
+    that releases the GIL.
+
+    Keys start with the digest of the dataset (or sensor view) they were
+    computed from. The
+    sizes of finished results (``nbytes``) are charged to the memory budget
+    of ``loader.DATASETS``, which drops them with their dataset or, oldest
+    first, through ``trim``.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_results=MAX_RESULTS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analisis')
+        self.max_results = max_results
+        self._futures = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None or future.cancelled() or (future.done() and future.exception() is not None):
+                # The task reports to the submitting rerun's profiler, if any
+                context = contextvars.copy_context()
+                future = self.executor.submit(context.run, _timed, fn, *args, **kwargs)
+                self._futures[key] = future
+            self._futures.move_to_end(key)
+            while len(self._futures) > self.max_results:
+                self._drop(next(iter(self._futures)))
+        return future
+
+    def __len__(self):
+        return len(self._futures)
+
+    def __contains__(self, key):
+        return key in self._futures
+
+    def _drop(self, key):
+        self._futures.pop(key).cancel()
+        self._sizes.pop(key, None)
+
+    def _size(self, key, future):
+        # Measured once, when the result is first seen finished
+        if key not in self._sizes:
+            if not future.done():
+                return 0
+            failed = future.cancelled() or future.exception() is not None
+            self._sizes[key] = 0 if failed else result_bytes(future.result())
+        return self._sizes[key]
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(self._size(key, future) for key, future in self._futures.items())
+
+    def forget(self, digest):
+        """Drop every task computed from the dataset ``digest``; returns the bytes freed."""
+        with self._lock:
+            # Sensor views of a dataset are keyed "<digest>/<sensor>"
+            keys = [key for key in self._futures
+                    if key[0] == digest or str(key[0]).startswith(digest + '/')]
+            freed = sum(self._size(key, self._futures[key]) for key in keys)
+            for key in keys:
+                self._drop(key)
+        return freed
+
+    def trim(self, max_bytes):
+        """Drop finished results, least recently used first, down to ``max_bytes``."""
+        with self._lock:
+            sizes = {key: self._size(key, future) for key, future in self._futures.items()}
+            total = sum(sizes.values())
+            for key, size in sizes.items():
+                if total <= max_bytes:
+                    break
+                if size:
+                    self._drop(key)
+                    total -= size
+
+
+def _timed(fn, *args, **kwargs):
+    with stage(fn.__name__):
+        return fn(*args, **kwargs)
+
+
+# Shared by every session of the server process
+TASKS = TaskCache()
@@ -0,0 +1,131 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .analysis import analyze, stream_report
+from .anomalies import DETECTORS
+from .config import parse_bytes
+from .ingest import have_pyarrow
+
+# A worker is replaced after this many files, so fragmentation and caches
+# from one large export do not pile up over a long run
+FILES_PER_WORKER = 8
+# Loaded frame plus summary work, per byte of CSV (measured on Grafana exports)
+LOAD_FACTOR = 5
+DEFAULT_MAX_MEMORY = '1G'
+
+
+def find_csv_files(paths):
+    """CSV files named directly or found (recursively) under directories, largest first."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names if name.lower().endswith('.csv'))
+        else:
+            files.append(path)
+    # Largest first, so one big file does not start last and keep a single core busy
+    return sorted(set(files), key=lambda f: (-os.path.getsize(f), f))
+
+
+def _init_worker():
+    if have_pyarrow():
+        import pyarrow
+
+        # Parallelism comes from the processes; one arrow thread each avoids oversubscription
+        pyarrow.set_cpu_count(1)
+        pyarrow.set_io_thread_count(1)
+
+
+def analyze_file(path, detector='global', threshold=None, max_bytes=None):
+    """One summary row per sensor of ``path``, or one row with the error.
+
+    Files whose loaded frame would not fit in ``max_bytes`` are aggregated
+    chunk by chunk instead (``analysis.stream_report``).
+    """
+    start = time.perf_counter()
+    streamed = bool(max_bytes) and os.path.getsize(path) * LOAD_FACTOR > max_bytes
+    try:
+        if streamed:
+            reports = stream_report(path, detector, threshold)
+        else:
+            reports = analyze(path, detector, threshold)
+    except Exception as e:
+        return [{'archivo': path, 'error': f"{type(e).__name__}: {e}"}]
+    seconds = time.perf_counter() - start
+    mode = 'streaming' if streamed else 'memoria'
+    return [{'archivo': path, 'sensor': sensor, 'modo': mode, **report, 'segundos': seconds}
+            for sensor, report in reports.items()]
+
+
+def run_batch(files, workers=None, detector='global', threshold=None, max_bytes=None, log=None):
+    """Analyze ``files`` across a process pool, one file per task.
+
+    Returns the consolidated table, one row per (file, sensor), in the order
+    of ``files``. Files that fail become a row with an ``error`` message.
+    ``max_bytes`` bounds each worker: larger files are streamed, not loaded.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    # Spawned workers start clean: no inherited arrow threads or parent frames
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, max_tasks_per_child=FILES_PER_WORKER)
+    rows = {}
+    with pool:
+        futures = {pool.submit(analyze_file, path, detector, threshold, max_bytes): path for path in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            rows[path] = future.result()
+            if log:
+                error = rows[path][0].get('error')
+                status = f"ERROR {error}" if error else f"{len(rows[path])} sensor(es)"
+                log(f"[{done}/{len(files)}] {path}: {status}")
+    table = pd.DataFrame([row for path in files for row in rows[path]])
+    if 'error' not in table:
+        table['error'] = None
+    return table
+
+
+def write_table(table, out):
+    fmt = 'parquet' if out.lower().endswith('.parquet') else 'csv'
+    if fmt == 'parquet':
+        if not have_pyarrow():
+            raise RuntimeError("Se necesita pyarrow para escribir Parquet; use un archivo .csv")
+        table.to_parquet(out, index=False, compression='zstd')
+    else:
+        table.to_csv(out, index=False)
+    return fmt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Procesa en paralelo un directorio de exportaciones CSV de sensores")
+    parser.add_argument('paths', nargs='+', help="archivos CSV o carpetas (se recorren recursivamente)")
+    parser.add_argument('--out', default='resumen_sensores.parquet', help="tabla resumen (.parquet o .csv)")
+    parser.add_argument('--workers', type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--detector', choices=list(DETECTORS), default='global')
+    parser.add_argument('--threshold', type=float, default=None, help="umbral de anomalía (desviaciones)")
+    parser.add_argument('--max-memory', default=DEFAULT_MAX_MEMORY,
+                        help="memoria por proceso; los archivos mayores se procesan por bloques (0 = sin límite)")
+    args = parser.parse_args(argv)
+
+    files = find_csv_files(args.paths)
+    if not files:
+        parser.error("no se encontraron archivos CSV")
+    start = time.perf_counter()
+    table = run_batch(files, args.workers, args.detector, args.threshold,
+                      parse_bytes(args.max_memory),
+                      log=lambda line: print(line, file=sys.stderr))
+    write_table(table, args.out)
+    failed = int(table['error'].notna().sum())
+    print(f"{len(files)} archivos, {len(table) - failed} filas, {failed} errores en "
+          f"{time.perf_counter() - start:.1f} s -> {args.out}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
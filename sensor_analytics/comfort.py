@@ -0,0 +1,307 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .streaming import COMFORT_HUM, COMFORT_TEMP
+
+# Magnus coefficients (Sonntag 1990), good to ~0.35 °C between -45 and 60 °C
+MAGNUS_A = 17.62
+MAGNUS_B = 243.12
+# Derived metrics every report carries, with their dashboard labels
+METRICS = ('punto_rocio', 'indice_calor', 'humidex')
+METRIC_LABELS = {
+    'temperatura': "Temperatura (°C)",
+    'humedad': "Humedad (%)",
+    'punto_rocio': "Punto de rocío (°C)",
+    'indice_calor': "Índice de calor (°C)",
+    'humidex': "Humidex",
+}
+BOX_KEYS = ('confort_temp', 'confort_hum', 'confort_total')
+COMFORT_FREQ = '1D'
+# Most buckets a zone chart shows; longer reports are merged into wider bars
+MAX_BARS = 400
+
+
+def bucket_starts(index, freq):
+    """Start of the ``freq`` bucket of every timestamp of ``index``.
+
+    Fixed frequencies ('1h', '1D') floor the timestamps; weekly ones such as
+    'W-MON' start each week on their weekday instead of on the epoch (a
+    Thursday), which is what ``index.floor('7D')`` would do.
+    """
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Week) and offset.weekday is not None:
+        days = index.floor('1D')
+        back = pd.to_timedelta((days.dayofweek - offset.weekday) % 7, unit='D')
+        return (days - back).as_unit(index.unit)
+    return index.floor(freq)
+
+
+def dew_point(temp, hum):
+    """Dew point (°C) from temperature (°C) and relative humidity (%)."""
+    temp = np.asarray(temp, dtype=np.float64)
+    hum = np.asarray(hum, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gamma = np.log(np.where(hum > 0, hum, np.nan) / 100) + MAGNUS_A * temp / (MAGNUS_B + temp)
+        return MAGNUS_B * gamma / (MAGNUS_A - gamma)
+
+
+def heat_index(temp, hum):
+    """NWS heat index (°C): Steadman below ~27 °C, Rothfusz with its corrections above."""
+    t = np.atleast_1d(np.asarray(temp, dtype=np.float64)) * 9 / 5 + 32
+    rh = np.broadcast_to(np.asarray(hum, dtype=np.float64), t.shape)
+    fahrenheit = 0.5 * (t + 61 + (t - 68) * 1.2 + rh * 0.094)
+    # The regression only applies to the (usually few) hot readings
+    hot = np.flatnonzero((fahrenheit + t) / 2 >= 80)
+    t, rh = t[hot], rh[hot]
+    full = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh
+            - 0.00683783 * t ** 2 - 0.05481717 * rh ** 2 + 0.00122874 * t ** 2 * rh
+            + 0.00085282 * t * rh ** 2 - 0.00000199 * t ** 2 * rh ** 2)
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    full[dry] -= (13 - rh[dry]) / 4 * np.sqrt((17 - np.abs(t[dry] - 95)) / 17)
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    full[humid] += (rh[humid] - 85) / 10 * (87 - t[humid]) / 5
+    fahrenheit[hot] = full
+    return (fahrenheit - 32) * 5 / 9
+
+
+def humidex(temp, dew):
+    """Environment Canada humidex from temperature and dew point (°C)."""
+    vapour = 6.11 * np.exp(5417.7530 * (1 / 273.16 - 1 / (273.15 + np.asarray(dew, dtype=np.float64))))
+    return np.asarray(temp, dtype=np.float64) + 0.5555 * (vapour - 10)
+
+
+def in_comfort_box(temp, hum, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM):
+    """Rows inside both comfort ranges (bounds included), as the summary counts them."""
+    in_temp = (temp >= comfort_temp[0]) & (temp <= comfort_temp[1])
+    in_hum = (hum >= comfort_hum[0]) & (hum <= comfort_hum[1])
+    return in_temp & in_hum
+
+
+@dataclass(frozen=True)
+class ZoneSet:
+    """Bands of one variable or derived metric, split at increasing ``edges``.
+
+    Band ``i`` holds values in [edges[i-1], edges[i]); missing values fall in
+    no band. Zone sets are hashable, so they can key cached reports.
+    """
+    name: str
+    metric: str
+    edges: tuple
+    labels: tuple
+
+    def __post_init__(self):
+        if self.metric not in METRIC_LABELS:
+            raise ValueError(f"Métrica desconocida: {self.metric}")
+        if len(self.labels) != len(self.edges) + 1:
+            raise ValueError("Cada conjunto de zonas necesita una etiqueta más que límites")
+        if any(b <= a for a, b in zip(self.edges, self.edges[1:])):
+            raise ValueError("Los límites de las zonas deben ser crecientes")
+
+    @classmethod
+    def from_edges(cls, name, metric, edges):
+        """A zone set labelled by its own bounds ('< 18', '18–26', '≥ 26')."""
+        edges = tuple(float(edge) for edge in edges)
+        text = [f"{edge:g}" for edge in edges]
+        labels = ([f"< {text[0]}"] if edges else ["todo"]) + [
+            f"{lo}–{hi}" for lo, hi in zip(text, text[1:])
+        ] + ([f"≥ {text[-1]}"] if edges else [])
+        return cls(name, metric, edges, tuple(labels))
+
+    def classify(self, values):
+        """Band of every value (int8), -1 where the value is missing."""
+        # A few comparisons beat a binary search for a handful of edges
+        bands = np.zeros(len(values), dtype=np.int8)
+        for edge in self.edges:
+            bands += values >= edge
+        bands[np.isnan(values)] = -1
+        return bands
+
+
+ZONE_SETS = (
+    # NWS heat index bands (80, 90, 103 and 125 °F)
+    ZoneSet('indice_calor', 'indice_calor', (26.7, 32.2, 39.4, 51.7),
+            ('sin riesgo', 'precaución', 'precaución extrema', 'peligro', 'peligro extremo')),
+    # Environment Canada humidex scale
+    ZoneSet('humidex', 'humidex', (30, 40, 46, 54),
+            ('sin molestia', 'algo de molestia', 'gran molestia', 'peligroso', 'golpe de calor inminente')),
+    ZoneSet('punto_rocio', 'punto_rocio', (10, 16, 18, 21, 24),
+            ('seco', 'confortable', 'algo húmedo', 'húmedo', 'muy húmedo', 'opresivo')),
+)
+
+
+class ComfortReport:
+    """Occupancy counts per time bucket: compact, mergeable and cacheable.
+
+    Every array has one row per non-empty bucket: ``rows`` readings,
+    ``box`` counts for ``BOX_KEYS``, ``zones[name]`` counts per band (int32)
+    and the sum, count and maximum of every derived metric.
+    """
+
+    def __init__(self, freq, zone_sets, buckets, rows, box, zones, sums, counts, maxs):
+        self.freq = freq
+        self.zone_sets = {zone_set.name: zone_set for zone_set in zone_sets}
+        self.buckets = buckets
+        self.rows = rows
+        self.box = box
+        self.zones = zones
+        self.sums = sums
+        self.counts = counts
+        self.maxs = maxs
+
+    @property
+    def nbytes(self):
+        arrays = [self.rows, self.box, self.sums, self.counts, self.maxs, *self.zones.values()]
+        return self.buckets.nbytes + sum(array.nbytes for array in arrays)
+
+    def comfort_percentages(self):
+        """The three dashboard percentages over the whole report."""
+        total = int(self.rows.sum())
+        if total == 0:
+            return {key: np.nan for key in BOX_KEYS}
+        return {key: count / total * 100 for key, count in zip(BOX_KEYS, self.box.sum(axis=0))}
+
+    def metric_summary(self):
+        """Mean and maximum of every derived metric over the whole report."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.sums.sum(axis=0) / self.counts.sum(axis=0)
+        maxs = np.fmax.reduce(self.maxs, axis=0) if len(self.maxs) else np.full(len(METRICS), np.nan)
+        return {metric: {'mean': float(mean), 'max': float(peak)}
+                for metric, mean, peak in zip(METRICS, means, maxs)}
+
+    def zone_frame(self, name, percent=False, max_buckets=None):
+        """Readings per band and bucket (share of the bucket's readings with ``percent``).
+
+        With ``max_buckets``, runs of consecutive buckets are merged so that
+        at most that many rows remain, each labelled by its first bucket.
+        """
+        counts, buckets = self.zones[name], self.buckets
+        if max_buckets is not None and len(buckets) > max_buckets:
+            starts = np.arange(0, len(buckets), -(-len(buckets) // max_buckets))
+            counts, buckets = np.add.reduceat(counts, starts, axis=0), buckets[starts]
+        if percent:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                counts = counts / counts.sum(axis=1, keepdims=True) * 100
+        return pd.DataFrame(counts, index=buckets, columns=list(self.zone_sets[name].labels))
+
+    def zone_totals(self, name):
+        """Readings per band over the whole report."""
+        return pd.Series(self.zones[name].sum(axis=0), index=list(self.zone_sets[name].labels))
+
+    def metric_frame(self):
+        """Mean of every derived metric per bucket."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.sums / self.counts
+        return pd.DataFrame(means, index=self.buckets, columns=list(METRICS))
+
+
+class ComfortEngine:
+    """Fold sensor frames or chunks into a ``ComfortReport`` in one pass.
+
+    Each ``update`` computes the derived metrics with NumPy, classifies every
+    reading once per zone set and counts them per ``freq`` bucket with
+    ``bincount``. Chunks may overlap buckets or arrive out of order; the
+    partial counts are folded together by ``result``.
+    """
+
+    def __init__(self, zone_sets=ZONE_SETS, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM,
+                 freq=COMFORT_FREQ):
+        self.zone_sets = tuple(zone_sets)
+        self.comfort_temp = tuple(comfort_temp)
+        self.comfort_hum = tuple(comfort_hum)
+        self.freq = freq
+        self._parts = []
+        self._index_type = None
+
+    def update(self, frame):
+        if frame.empty:
+            return self
+        index = frame.index
+        if self._index_type is None:
+            self._index_type = (index.unit, index.tz, index.name)
+        keys = bucket_starts(index, self.freq).asi8
+        temp = frame['temperatura'].to_numpy(dtype=np.float64)
+        hum = frame['humedad'].to_numpy(dtype=np.float64)
+        # Dataset views are time-sorted already; anything else is sorted once
+        if not (keys[1:] >= keys[:-1]).all():
+            order = np.argsort(keys, kind='stable')
+            keys, temp, hum = keys[order], temp[order], hum[order]
+        bounds = np.r_[True, keys[1:] != keys[:-1]]
+        starts = np.flatnonzero(bounds)
+        inverse = np.cumsum(bounds) - 1
+        n = len(starts)
+        rows = np.diff(np.r_[starts, len(keys)])
+
+        dew = dew_point(temp, hum)
+        values = {'temperatura': temp, 'humedad': hum, 'punto_rocio': dew,
+                  'indice_calor': heat_index(temp, hum), 'humidex': humidex(temp, dew)}
+
+        def count(mask):
+            # Rows are grouped by bucket, so a sum per run is a count per bucket
+            return np.add.reduceat(mask, starts, dtype=np.int64)
+
+        in_temp = (temp >= self.comfort_temp[0]) & (temp <= self.comfort_temp[1])
+        in_hum = (hum >= self.comfort_hum[0]) & (hum <= self.comfort_hum[1])
+        box = np.column_stack([count(in_temp), count(in_hum), count(in_temp & in_hum)])
+
+        zones = {}
+        for zone_set in self.zone_sets:
+            bands = zone_set.classify(values[zone_set.metric])
+            # Missing values land in one extra band, dropped afterwards
+            n_bands = len(zone_set.labels) + 1
+            bands[bands < 0] = n_bands - 1
+            cells = np.bincount(inverse * n_bands + bands, minlength=n * n_bands)
+            zones[zone_set.name] = cells.reshape(n, n_bands)[:, :-1]
+
+        sums, counts, maxs = [], [], []
+        for metric in METRICS:
+            metric_values = values[metric]
+            valid = np.isfinite(metric_values)
+            sums.append(np.add.reduceat(np.where(valid, metric_values, 0), starts))
+            counts.append(count(valid))
+            # fmax skips NaN; a bucket with no valid value stays NaN
+            maxs.append(np.fmax.reduceat(metric_values, starts))
+        self._parts.append((keys[starts], rows, box, zones,
+                            np.column_stack(sums), np.column_stack(counts), np.column_stack(maxs)))
+        return self
+
+    def result(self):
+        parts = self._parts
+        if not parts:
+            keys = np.zeros(0, dtype=np.int64)
+            unit, tz, name = 'ns', None, None
+            rows = np.zeros(0, dtype=np.int32)
+            box = np.zeros((0, len(BOX_KEYS)), dtype=np.int32)
+            zones = {z.name: np.zeros((0, len(z.labels)), dtype=np.int32) for z in self.zone_sets}
+            sums = np.zeros((0, len(METRICS)))
+            counts = np.zeros((0, len(METRICS)), dtype=np.int32)
+            maxs = np.zeros((0, len(METRICS)), dtype=np.float32)
+        else:
+            unit, tz, name = self._index_type
+            keys = np.concatenate([part[0] for part in parts])
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+            def fold(arrays, ufunc=np.add):
+                return ufunc.reduceat(np.concatenate(arrays)[order], starts, axis=0)
+
+            keys = keys[starts]
+            rows = fold([part[1] for part in parts]).astype(np.int32)
+            box = fold([part[2] for part in parts]).astype(np.int32)
+            zones = {z.name: fold([part[3][z.name] for part in parts]).astype(np.int32)
+                     for z in self.zone_sets}
+            sums = fold([part[4] for part in parts])
+            counts = fold([part[5] for part in parts]).astype(np.int32)
+            maxs = fold([part[6] for part in parts], np.fmax).astype(np.float32)
+        buckets = pd.DatetimeIndex(keys.view(f'M8[{unit}]'), name=name)
+        if tz is not None:
+            buckets = buckets.tz_localize('UTC').tz_convert(tz)
+        return ComfortReport(self.freq, self.zone_sets, buckets, rows, box, zones, sums, counts, maxs)
+
+
+def comfort_report(frame, zone_sets=ZONE_SETS, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM,
+                   freq=COMFORT_FREQ):
+    """Batch helper: the report of a whole frame."""
+    return ComfortEngine(zone_sets, comfort_temp, comfort_hum, freq).update(frame).result()
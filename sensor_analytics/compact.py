@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from .ingest import SENSOR_COL, VALUE_DTYPE
+
+# Fixed-point step for the values: int16 holds -327.67..327.67 in 0.01 steps
+SCALE = 0.01
+INT16_MISSING = np.iinfo(np.int16).min
+INT16_LIMIT = np.iinfo(np.int16).max * SCALE
+INT32_MAX = np.iinfo(np.int32).max
+# Time offsets are stored in the coarsest of these units that loses nothing
+OFFSET_UNITS = {'s': 1, 'ms': 1000, 'us': 1_000_000, 'ns': 1_000_000_000}
+
+
+class PackedValues:
+    """One value column as int16 fixed-point, or float32 if it does not fit.
+
+    Values are rounded to the nearest ``SCALE`` (error at most 0.005), so
+    readings with up to two decimals decode to the same float32 they were
+    parsed as. Columns with values beyond +-327.67 stay float32, unchanged.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def encode(cls, values):
+        values = np.asarray(values)
+        missing = np.isnan(values)
+        if np.abs(values[~missing]).max(initial=0) > INT16_LIMIT:
+            return cls(values.astype(VALUE_DTYPE))
+        data = np.rint(np.where(missing, 0, values) / SCALE).astype(np.int16)
+        data[missing] = INT16_MISSING
+        return cls(data)
+
+    def decode(self):
+        if self.data.dtype != np.int16:
+            return self.data.astype(VALUE_DTYPE)
+        values = (self.data * SCALE).astype(VALUE_DTYPE)
+        values[self.data == INT16_MISSING] = np.nan
+        return values
+
+    def __getitem__(self, rows):
+        return PackedValues(self.data[rows])
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+
+class PackedTimes:
+    """A datetime index as int32 offsets from its earliest timestamp.
+
+    Regularly sampled indexes keep only the start and the step; others keep
+    one int32 offset per row in the coarsest unit that represents every
+    timestamp exactly. Indexes that do not fit (offsets beyond int32) keep
+    their int64 values, so decoding is always exact.
+    """
+
+    __slots__ = ('start', 'step', 'offsets', 'length', 'unit', 'tz', 'name')
+
+    def __init__(self, start, step, offsets, length, unit, tz, name):
+        self.start, self.step, self.offsets, self.length = start, step, offsets, length
+        self.unit, self.tz, self.name = unit, tz, name
+
+    @classmethod
+    def encode(cls, index):
+        ticks = index.asi8
+        deltas = np.diff(ticks)
+        if len(deltas) and deltas[0] > 0 and (deltas == deltas[0]).all():
+            return cls(int(ticks[0]), int(deltas[0]), None, len(ticks), index.unit, index.tz, index.name)
+        # Multi-sensor frames restart the clock for every sensor
+        start = int(ticks.min()) if len(ticks) else 0
+        offsets = ticks - start
+        divisor = 1
+        for per_second in sorted(OFFSET_UNITS.values()):
+            divisor = OFFSET_UNITS[index.unit] // per_second
+            if divisor >= 1 and not (offsets % divisor).any():
+                break
+        offsets //= divisor
+        if offsets.max(initial=0) <= INT32_MAX:
+            offsets = offsets.astype(np.int32)
+        return cls(start, divisor, offsets, len(ticks), index.unit, index.tz, index.name)
+
+    def decode(self):
+        if self.offsets is None:
+            ticks = self.start + self.step * np.arange(self.length, dtype=np.int64)
+        else:
+            ticks = self.start + self.offsets.astype(np.int64) * self.step
+        index = pd.DatetimeIndex(ticks.view(f'M8[{self.unit}]'), name=self.name)
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else index
+
+    def __getitem__(self, rows):
+        lo, hi, _ = rows.indices(self.length)
+        hi = max(lo, hi)
+        if self.offsets is None:
+            return PackedTimes(self.start + lo * self.step, self.step, None, hi - lo,
+                               self.unit, self.tz, self.name)
+        return PackedTimes(self.start, self.step, self.offsets[lo:hi], hi - lo,
+                           self.unit, self.tz, self.name)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def nbytes(self):
+        return 0 if self.offsets is None else self.offsets.nbytes
+
+
+class PackedFrame:
+    """A sensor frame in compact form: fixed-point values and int32 times.
+
+    About a third of the float32 frame for regularly sampled data (2 bytes
+    per value, no index), against 8 per value and 8 per timestamp for the
+    float64 frame ``pd.read_csv`` builds. ``to_frame`` rebuilds the usual
+    float32 frame, so every statistic, filter and chart runs on it
+    unchanged; results differ from the unpacked frame only by the rounding
+    of ``PackedValues``.
+    """
+
+    def __init__(self, frame):
+        self.times = PackedTimes.encode(frame.index)
+        self.columns = list(frame.columns)
+        self.values = {var: PackedValues.encode(frame[var].to_numpy())
+                       for var in self.columns if var != SENSOR_COL}
+        self.sensor_codes = self.sensor_categories = None
+        if SENSOR_COL in frame.columns:
+            self.sensor_codes = frame[SENSOR_COL].cat.codes.to_numpy()
+            self.sensor_categories = frame[SENSOR_COL].cat.categories
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self):
+        codes = 0 if self.sensor_codes is None else self.sensor_codes.nbytes
+        return self.times.nbytes + codes + sum(packed.nbytes for packed in self.values.values())
+
+    def slice(self, lo, hi, drop_sensor=False):
+        """Rows ``lo:hi`` without copying, optionally without the sensor column."""
+        sliced = object.__new__(PackedFrame)
+        sliced.times = self.times[lo:hi]
+        sliced.values = {var: packed[lo:hi] for var, packed in self.values.items()}
+        if drop_sensor or self.sensor_codes is None:
+            sliced.columns = [col for col in self.columns if col != SENSOR_COL]
+            sliced.sensor_codes = sliced.sensor_categories = None
+        else:
+            sliced.columns = self.columns
+            sliced.sensor_codes = self.sensor_codes[lo:hi]
+            sliced.sensor_categories = self.sensor_categories
+        return sliced
+
+    def to_frame(self):
+        columns = {}
+        for col in self.columns:
+            if col == SENSOR_COL:
+                columns[col] = pd.Categorical.from_codes(self.sensor_codes, categories=self.sensor_categories)
+            else:
+                columns[col] = self.values[col].decode()
+        return pd.DataFrame(columns, index=self.times.decode())
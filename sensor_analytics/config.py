@@ -0,0 +1,21 @@
+import os
+
+UNITS = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+
+
+def parse_bytes(text):
+    """'512M' / '2G' / plain bytes -> int."""
+    text = str(text).strip().lower().rstrip('b')
+    scale = UNITS.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+
+# Settings read from the environment; this module imports nothing heavy, so
+# the dashboard can check them before loading pandas
+STORE_DIR = os.environ.get('SENSOR_STORE_DIR', 'datos_store')
+# Optional CSV with columns sensor, lat, lon (and optionally location)
+SENSOR_LOCATIONS_FILE = os.environ.get('SENSOR_LOCATIONS_FILE', 'sensores.csv')
+# Memory shared by every session for parsed datasets and what is derived from them
+DATASET_CACHE_BYTES = parse_bytes(os.environ.get('SENSOR_CACHE_MEMORY', '1G'))
+# Keep cached datasets as int16 fixed-point values and int32 times (see compact.py)
+COMPACT_STORAGE = os.environ.get('SENSOR_COMPACT_STORAGE', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_POINTS = 2000
+METHODS = ('lttb', 'minmax')
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the ``n_out`` kept points."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    # First and last points are always kept; the rest is split in n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+
+        bucket_x, bucket_y = x[start:stop], y[start:stop]
+        area = np.abs(
+            (x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """Keep the minimum and maximum of each of ``n_out // 2`` equal buckets."""
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    offsets = np.arange(n_buckets) * size
+    lo = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    hi = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    kept = np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+    return kept[kept < n]
+
+
+def downsample_series(series, n_out=DEFAULT_POINTS, method='lttb'):
+    """Reduce a time-indexed series to about ``n_out`` points for plotting."""
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+
+    if method == 'lttb':
+        kept = lttb_indices(series.index.values, series.to_numpy(), n_out)
+    elif method == 'minmax':
+        kept = minmax_indices(series.to_numpy(), n_out)
+    else:
+        raise ValueError(f"Método de reducción desconocido: {method}")
+    return series.iloc[kept]
+
+
+def _bound(value, unit, ceil):
+    """``value`` in the index's own unit, rounded inwards so no row is lost."""
+    value = pd.Timestamp(value)
+    if value.unit == unit:
+        return value
+    value = value.as_unit('ns')
+    return (value.ceil(unit) if ceil else value.floor(unit)).as_unit(unit)
+
+
+def time_window(frame, start=None, end=None):
+    """Slice a time-indexed frame/series to ``[start, end]``."""
+    index = frame.index
+    # searchsorted refuses bounds finer than the index (e.g. a nanosecond end
+    # of day against microsecond data parsed by the C engine)
+    if start is not None:
+        start = _bound(start, index.unit, ceil=True)
+    if end is not None:
+        end = _bound(end, index.unit, ceil=False)
+    if not index.is_monotonic_increasing:
+        mask = np.ones(len(index), dtype=bool)
+        if start is not None:
+            mask &= index >= start
+        if end is not None:
+            mask &= index <= end
+        return frame[mask]
+    lo = index.searchsorted(start, side='left') if start is not None else 0
+    hi = index.searchsorted(end, side='right') if end is not None else len(index)
+    return frame.iloc[lo:hi]
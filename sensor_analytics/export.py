@@ -0,0 +1,93 @@
+import gzip
+import os
+import tempfile
+
+import numpy as np
+
+from .ingest import have_pyarrow
+
+CHUNK_ROWS = 100_000
+# Exports stay in memory up to this size, then spill to a temp file on disk
+SPOOL_BYTES = 16 * 1024 ** 2
+
+FORMATS = {
+    'csv': ('CSV', 'datos_ambientales_filtrados.csv', 'text/csv'),
+    'csv.gz': ('CSV gzip', 'datos_ambientales_filtrados.csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', 'datos_ambientales_filtrados.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if fmt != 'parquet' or have_pyarrow()]
+
+
+def _chunks(frame, positions, chunk_rows):
+    if positions is None:
+        positions = np.arange(len(frame))
+    for start in range(0, len(positions), chunk_rows):
+        yield frame.iloc[positions[start:start + chunk_rows]]
+
+
+def _write_csv(out, chunks, frame):
+    header = True
+    for chunk in chunks:
+        out.write(chunk.to_csv(header=header).encode('utf-8'))
+        header = False
+    if header:
+        # Nothing matched: still write the header line
+        out.write(frame.iloc[:0].to_csv().encode('utf-8'))
+
+
+def _write_parquet(out, chunks, frame):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=True)
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=True))
+
+
+def _write(out, frame, positions, fmt, chunk_rows):
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    if positions is not None:
+        positions = np.sort(positions)
+
+    chunks = _chunks(frame, positions, chunk_rows)
+    if fmt == 'parquet':
+        _write_parquet(out, chunks, frame)
+    else:
+        target = gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) if fmt == 'csv.gz' else out
+        _write_csv(target, chunks, frame)
+        if target is not out:
+            target.close()
+
+
+def export_rows(frame, positions=None, fmt='csv', chunk_rows=CHUNK_ROWS):
+    """Write the selected rows of ``frame`` to a spooled temporary file.
+
+    ``positions`` are row positions (e.g. from ``filters.SortedIndex``); they
+    are written in time order, ``chunk_rows`` at a time, so the export never
+    holds more than one chunk as text. Returns the file rewound to the start.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES, mode='w+b')
+    _write(out, frame, positions, fmt, chunk_rows)
+    out.seek(0)
+    return out
+
+
+def export_file(frame, positions=None, fmt='csv', chunk_rows=CHUNK_ROWS):
+    """Like ``export_rows``, but always on disk and reopened read-only.
+
+    Meant for ``st.download_button(data=callable)``, which accepts an open
+    binary file: Streamlit reads it when the button is clicked, so the only
+    complete copy in memory is the one it keeps to serve the download. The
+    temporary file has no name and disappears when the returned file closes.
+    """
+    with tempfile.TemporaryFile(mode='w+b') as out:
+        _write(out, frame, positions, fmt, chunk_rows)
+        out.flush()
+        reader = open(os.dup(out.fileno()), 'rb')
+    reader.seek(0)
+    return reader
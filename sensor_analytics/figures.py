@@ -0,0 +1,107 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .comfort import in_comfort_box
+from .streaming import COMFORT_HUM, COMFORT_TEMP
+
+# SVG scatter becomes unusable around 50k points; WebGL holds up to ~1M
+WEBGL_THRESHOLD = 50_000
+DENSITY_THRESHOLD = 1_000_000
+DENSITY_BINS = 120
+
+RENDERER_LABELS = {
+    'svg': 'SVG',
+    'webgl': 'WebGL (Scattergl)',
+    'density': 'Mapa de densidad 2D',
+}
+
+
+def choose_renderer(n_points, webgl_threshold=WEBGL_THRESHOLD, density_threshold=DENSITY_THRESHOLD):
+    if n_points > density_threshold:
+        return 'density'
+    if n_points > webgl_threshold:
+        return 'webgl'
+    return 'svg'
+
+
+def trendline_trace(fit, x_min, x_max):
+    xs = np.array([x_min, x_max], dtype=np.float64)
+    return go.Scatter(x=xs, y=fit.predict(xs), mode='lines', name='OLS',
+                      line=dict(color='#1B4332', width=2))
+
+
+def density_heatmap(df, x, y, bins=DENSITY_BINS, title=None):
+    # Binned on the server so only the bins x bins grid reaches the browser
+    valid = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(
+        valid[x].to_numpy(np.float64), valid[y].to_numpy(np.float64), bins=bins
+    )
+    counts[counts == 0] = np.nan
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorscale='Greens',
+        colorbar=dict(title='Registros'),
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def sensor_scatter(df, x, y, renderer, fit=None, **kwargs):
+    """Scatter of ``x`` vs ``y`` drawn with the given renderer.
+
+    ``'svg'`` and ``'webgl'`` keep every point (WebGL uses Scattergl); with
+    ``'density'`` the points are binned into a 2D histogram heatmap.
+    ``fit`` is an optional ``regression.OLSFit`` drawn as a line on top.
+    ``kwargs`` are passed to ``px.scatter``.
+    """
+    if renderer == 'density':
+        fig = density_heatmap(df, x, y, title=kwargs.get('title'))
+    else:
+        fig = px.scatter(df, x=x, y=y, render_mode=renderer, **kwargs)
+
+    if fit is not None and np.isfinite(fit.slope):
+        fig.add_trace(trendline_trace(fit, df[x].min(), df[x].max()))
+    return fig
+
+
+def _transparent(fig):
+    fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(255,255,255,0.9)')
+    return fig
+
+
+def correlation_figure(df, renderer, fit):
+    """Temperature vs humidity scatter with the OLS line, as shown in tab4."""
+    fig = sensor_scatter(df, 'temperatura', 'humedad', renderer,
+                         fit=fit,
+                         title="Relación Temperatura vs Humedad",
+                         color_discrete_sequence=['#40916C'])
+    return _transparent(fig)
+
+
+def comfort_figure(df, renderer, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM):
+    """Scatter coloured by the comfort mask, with the comfort zone outlined.
+
+    The per-row mask is built here, only for the renderers that colour
+    points, and lives as long as the figure; nothing per-row is cached.
+    """
+    colours = {}
+    if renderer != 'density':
+        colours['color'] = in_comfort_box(df['temperatura'].to_numpy(), df['humedad'].to_numpy(),
+                                          comfort_temp, comfort_hum)
+    fig = sensor_scatter(df, 'temperatura', 'humedad', renderer,
+                         **colours,
+                         labels={'color': 'confort_total'},
+                         title="Zona de Confort Ambiental",
+                         color_discrete_map={True: '#40916C', False: '#FF6B6B'})
+    (temp_min, temp_max), (hum_min, hum_max) = comfort_temp, comfort_hum
+    fig.add_shape(
+        type="rect",
+        x0=temp_min, y0=hum_min,
+        x1=temp_max, y1=hum_max,
+        line=dict(color="green", width=2, dash="dash"),
+        fillcolor="rgba(64, 145, 108, 0.1)"
+    )
+    return _transparent(fig)
@@ -0,0 +1,60 @@
+import numpy as np
+
+PAGE_SIZE = 100
+
+
+class SortedIndex:
+    """Row positions of one column sorted by value, for range queries.
+
+    Built once per dataset (O(n log n)); every threshold query afterwards is a
+    ``searchsorted`` on the sorted values and returns a slice of positions.
+    Missing values are kept out of every result, as with boolean masks.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        n_valid = len(values) - int(np.isnan(sorted_values).sum())
+        self.order = order[:n_valid]
+        self.sorted_values = sorted_values[:n_valid]
+
+    def __len__(self):
+        return len(self.order)
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.sorted_values.nbytes
+
+    def _bounds(self, lower=None, upper=None):
+        # Strict bounds, like the original `>` and `<` masks
+        lo = 0 if lower is None else int(np.searchsorted(self.sorted_values, lower, side='right'))
+        hi = len(self.order) if upper is None else int(np.searchsorted(self.sorted_values, upper, side='left'))
+        return lo, max(lo, hi)
+
+    def count(self, lower=None, upper=None):
+        lo, hi = self._bounds(lower, upper)
+        return hi - lo
+
+    def positions(self, lower=None, upper=None):
+        """Positions of rows with ``lower < value < upper`` (in value order)."""
+        lo, hi = self._bounds(lower, upper)
+        return self.order[lo:hi]
+
+
+def page_count(n_rows, page_size=PAGE_SIZE):
+    return max(1, -(-n_rows // page_size))
+
+
+def paginate(positions, page, page_size=PAGE_SIZE):
+    """Positions on ``page`` (1-based) of the result in time order.
+
+    Only the requested page is sorted: ``np.partition`` isolates it in
+    linear time, so the full result never has to be ordered.
+    """
+    start = (page - 1) * page_size
+    stop = min(start + page_size, len(positions))
+    if start >= stop:
+        return positions[:0]
+    part = np.partition(positions, [start, stop - 1]) if stop - start < len(positions) else positions
+    return np.sort(part[start:stop])
@@ -0,0 +1,344 @@
+import csv
+import io
+import re
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .instrument import set_rows, stage
+
+TIME_COL = 'Time'
+SENSOR_COL = 'sensor'
+VARIABLES = ('temperatura', 'humedad')
+# Sensor id used when a column name carries nothing besides the variable
+DEFAULT_SENSOR = 'sensor'
+VALUE_DTYPE = np.float32
+
+# Timestamp layouts seen in Grafana/InfluxDB exports, most common first
+TIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%d %H:%M:%S%z',
+    '%Y-%m-%d %H:%M',
+    '%d/%m/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+]
+ISO_FORMATS = set(TIME_FORMATS[:7])
+SNIFF_ROWS = 64
+
+
+class MissingColumnsError(ValueError):
+    pass
+
+
+def have_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def detect_sensor_columns(columns):
+    # Buscar columnas que contengan 'temperatura' y 'humedad'
+    temp_col = None
+    hum_col = None
+
+    for col in columns:
+        if 'temperatura' in col.lower():
+            temp_col = col
+        elif 'humedad' in col.lower():
+            hum_col = col
+
+    return temp_col, hum_col
+
+
+# Unit suffixes such as "(°C)", "[%]" or "% HR", which are not part of the sensor id
+UNIT_SUFFIX = re.compile(r'[(\[]?\s*(?:[°º]\s*[CF]|%\s*(?:RH|HR)?)\s*[)\]]?', re.IGNORECASE)
+
+
+def _sensor_id(col, variable):
+    rest = re.sub(variable, '', col, flags=re.IGNORECASE)
+    rest = UNIT_SUFFIX.sub('', rest)
+    # Grafana label sets such as {sensor="nodo3"}: keep the label value
+    label = re.search(r'=\s*"?([^",}]+)', rest)
+    if label:
+        rest = label.group(1)
+    return rest.strip(' _-.:|{}()[]"\'=') or DEFAULT_SENSOR
+
+
+def detect_sensor_pairs(columns):
+    """Map each sensor id to its temperatura/humedad columns.
+
+    Grafana exports one column per node and variable (``temperatura nodo3``,
+    ``humedad nodo3``); whatever remains after removing the variable name is
+    the sensor id. If no pair matches that way, the single-sensor rule of
+    ``detect_sensor_columns`` is used. Two columns of the same variable and
+    sensor (e.g. with and without a unit suffix) are ambiguous and rejected
+    with ``MissingColumnsError``.
+    """
+    temps, hums = {}, {}
+    for col in columns:
+        if 'temperatura' in col.lower():
+            var, found = 'temperatura', temps
+        elif 'humedad' in col.lower():
+            var, found = 'humedad', hums
+        else:
+            continue
+        sensor = _sensor_id(col, var)
+        if sensor in found:
+            raise MissingColumnsError(
+                f"Columnas de {var} repetidas para el sensor '{sensor}': '{found[sensor]}' y '{col}'"
+            )
+        found[sensor] = col
+
+    pairs = {
+        sensor: {'temperatura': temps[sensor], 'humedad': hums[sensor]}
+        for sensor in temps if sensor in hums
+    }
+    if not pairs:
+        temp_col, hum_col = detect_sensor_columns(columns)
+        if temp_col and hum_col:
+            sensor = next(s for s, col in temps.items() if col == temp_col)
+            pairs = {sensor: {'temperatura': temp_col, 'humedad': hum_col}}
+    return pairs
+
+
+def mapped_columns(column_mapping):
+    return [col for cols in column_mapping.values() for col in cols.values()]
+
+
+def to_long(wide, times, column_mapping):
+    """Stack per-sensor column pairs into rows of (sensor, temperatura, humedad).
+
+    Rows are grouped by sensor (in column order) and keep file order inside
+    each sensor. With several sensors, timestamps where a node reported
+    nothing are dropped; the sensor column is categorical.
+    """
+    sensors = list(column_mapping)
+    if len(sensors) == 1:
+        cols = column_mapping[sensors[0]]
+        frame = pd.DataFrame({
+            var: wide[cols[var]].to_numpy(dtype=VALUE_DTYPE) for var in VARIABLES
+        }, index=pd.DatetimeIndex(times, name=TIME_COL))
+        frame.insert(0, SENSOR_COL, pd.Categorical.from_codes(
+            np.zeros(len(frame), dtype=np.int8), categories=sensors))
+        return frame
+
+    positions, codes, values = [], [], {var: [] for var in VARIABLES}
+    for code, sensor in enumerate(sensors):
+        cols = column_mapping[sensor]
+        arrays = {var: wide[cols[var]].to_numpy(dtype=VALUE_DTYPE) for var in VARIABLES}
+        present = np.flatnonzero(~(np.isnan(arrays['temperatura']) & np.isnan(arrays['humedad'])))
+        positions.append(present)
+        codes.append(np.full(len(present), code, dtype=np.int16))
+        for var in VARIABLES:
+            values[var].append(arrays[var][present])
+
+    index = pd.DatetimeIndex(times, name=TIME_COL).take(np.concatenate(positions))
+    frame = pd.DataFrame({var: np.concatenate(values[var]) for var in VARIABLES}, index=index)
+    frame.insert(0, SENSOR_COL, pd.Categorical.from_codes(np.concatenate(codes), categories=sensors))
+    return frame
+
+
+def _as_buffer(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+def _head_lines(source, n):
+    buffer = _as_buffer(source)
+    if isinstance(buffer, str) or hasattr(buffer, '__fspath__'):
+        with open(buffer, 'rb') as f:
+            lines = [f.readline() for _ in range(n)]
+    else:
+        position = buffer.tell()
+        lines = [buffer.readline() for _ in range(n)]
+        buffer.seek(position)
+
+    lines = [line.decode('utf-8') if isinstance(line, bytes) else line for line in lines]
+    if lines:
+        lines[0] = lines[0].lstrip('\ufeff')
+    return [line for line in lines if line]
+
+
+def sniff_time_format(values):
+    """Return the first strptime format that parses every sampled value."""
+    sample = [v for v in values if v]
+    if not sample:
+        return None
+    for fmt in TIME_FORMATS:
+        try:
+            for value in sample:
+                datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return fmt
+    return None
+
+
+def sniff_header(source):
+    """Read the header and a few rows once: column mapping and time format."""
+    rows = list(csv.reader(_head_lines(source, SNIFF_ROWS + 1)))
+    header = rows[0] if rows else []
+
+    column_mapping = detect_sensor_pairs(header)
+    if not column_mapping:
+        raise MissingColumnsError(
+            "No se encontraron las columnas de temperatura y humedad en el archivo CSV"
+        )
+    if TIME_COL not in header:
+        raise MissingColumnsError(
+            f"No se encontró la columna de tiempo '{TIME_COL}' en el archivo CSV"
+        )
+
+    time_idx = header.index(TIME_COL)
+    time_format = sniff_time_format([row[time_idx] for row in rows[1:] if len(row) > time_idx])
+    return column_mapping, time_format
+
+
+def parse_times(values, time_format):
+    if time_format is None:
+        # Unknown layout: fall back to pandas' own inference
+        return pd.to_datetime(values)
+    return pd.to_datetime(values, format=time_format)
+
+
+def _read_c(source, columns, time_format):
+    dtypes = {col: VALUE_DTYPE for col in columns}
+    dtypes[TIME_COL] = object
+    with stage('read_csv'):
+        df1 = pd.read_csv(_as_buffer(source), usecols=[TIME_COL, *columns], dtype=dtypes)
+        set_rows(len(df1))
+    with stage('to_datetime', len(df1)):
+        times = parse_times(df1.pop(TIME_COL), time_format)
+    return df1, times
+
+
+def _arrow_parses(time_format):
+    # Arrow turns offsets into UTC while pandas keeps the local wall time, so
+    # offset layouts are read as text and parsed like the C engine does
+    return time_format is not None and '%z' not in time_format
+
+
+def _arrow_convert_options(columns, time_format):
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    column_types = {col: pa.float32() for col in columns}
+    timestamp_parsers = None
+    if _arrow_parses(time_format):
+        column_types[TIME_COL] = pa.timestamp('ns')
+        # Arrow's native ISO-8601 parser is much faster than strptime
+        timestamp_parsers = [pa_csv.ISO8601 if time_format in ISO_FORMATS else time_format]
+    else:
+        column_types[TIME_COL] = pa.string()
+
+    return pa_csv.ConvertOptions(
+        include_columns=[TIME_COL, *columns],
+        column_types=column_types,
+        timestamp_parsers=timestamp_parsers,
+    )
+
+
+def _read_pyarrow(source, columns, time_format):
+    from pyarrow import csv as pa_csv
+
+    # Arrow parses known timestamp layouts while reading
+    with stage('read_csv'):
+        table = pa_csv.read_csv(
+            _as_buffer(source),
+            convert_options=_arrow_convert_options(columns, time_format),
+        )
+        df1 = table.to_pandas()
+        set_rows(len(df1))
+    times = df1.pop(TIME_COL)
+    if not _arrow_parses(time_format):
+        with stage('to_datetime', len(df1)):
+            times = parse_times(times, time_format)
+    return df1, times
+
+
+def read_sensor_csv(source, engine=None):
+    """Load a CSV export as a time-indexed (sensor, temperatura, humedad) frame.
+
+    Only Time and the sensor columns are parsed; readings are stored as
+    float32 and timestamps are converted with a sniffed explicit format.
+    ``engine`` may be ``'c'`` or ``'pyarrow'``; by default pyarrow is used if
+    installed. Returns the frame and ``{sensor: {variable: column}}``.
+    """
+    column_mapping, time_format = sniff_header(source)
+    if engine is None:
+        engine = 'pyarrow' if have_pyarrow() else 'c'
+
+    read = _read_pyarrow if engine == 'pyarrow' else _read_c
+    wide, times = read(source, mapped_columns(column_mapping), time_format)
+    return to_long(wide, times, column_mapping), column_mapping
+
+
+def read_sensor_csv_untyped(source):
+    # Original loader: infer every column, then infer the timestamp format
+    df1 = pd.read_csv(_as_buffer(source))
+    temp_col, hum_col = detect_sensor_columns(df1.columns)
+    df1 = df1.rename(columns={temp_col: 'temperatura', hum_col: 'humedad'})
+    df1['Time'] = pd.to_datetime(df1['Time'])
+    return df1.set_index('Time')
+
+
+def _profile(engine, path):
+    # Runs in a fresh process so the RSS high-water mark belongs to one loader
+    import resource
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if engine == 'untyped':
+        frame = read_sensor_csv_untyped(data)
+    else:
+        frame, _ = read_sensor_csv(data, engine=engine)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'seconds': elapsed,
+        # ru_maxrss is reported in KiB on Linux
+        'peak_bytes': (rss_after - rss_before) * 1024,
+        'frame_bytes': int(frame.memory_usage(index=True, deep=True).sum()),
+        'rows': len(frame),
+    }
+
+
+def measure_ingestion(path, engines=('c', 'pyarrow')):
+    """Compare the untyped loader with the typed engines on one file."""
+    import multiprocessing
+
+    names = ['untyped'] + [e for e in engines if e != 'pyarrow' or have_pyarrow()]
+    results = {}
+    ctx = multiprocessing.get_context('spawn')
+    for name in names:
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(_profile, (name, path))
+
+    baseline = results['untyped']
+    for result in results.values():
+        result['speedup'] = baseline['seconds'] / result['seconds']
+        result['memory_factor'] = baseline['peak_bytes'] / max(result['peak_bytes'], 1)
+    return results
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print(path)
+        for name, r in measure_ingestion(path).items():
+            print(f"  {name:8s} {r['seconds']:7.3f}s  peak {r['peak_bytes'] / 1e6:8.1f} MB"
+                  f"  frame {r['frame_bytes'] / 1e6:7.1f} MB"
+                  f"  x{r['speedup']:.1f} time  x{r['memory_factor']:.1f} memory")
@@ -0,0 +1,243 @@
+import contextvars
+import json
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager, nullcontext
+
+# The profiler of the current rerun; library code calls ``stage`` blindly
+_current = contextvars.ContextVar('sensor_profiler', default=None)
+_DISABLED = nullcontext()
+METRIC_PREFIX = 'sensor_app'
+# Stage that receives frontend bytes sent outside any stage
+UNATTRIBUTED = 'other'
+
+# tracemalloc is process-wide: it runs while any session profiles memory
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        # Tracing started by someone else (e.g. python -X tracemalloc) stays on
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def stage(name, rows=None):
+    """Time the enclosed block under ``name`` if a profiler is active.
+
+    Without an active profiler this is one context-variable lookup and a
+    shared no-op context manager, so hot paths can be wrapped unconditionally.
+    """
+    profiler = _current.get()
+    if profiler is None:
+        return _DISABLED
+    return profiler.stage(name, rows)
+
+
+def set_rows(rows):
+    """Record rows processed by the innermost open stage (after the fact)."""
+    profiler = _current.get()
+    if profiler is not None:
+        profiler.set_rows(rows)
+
+
+def attach(profiler, run_context=None):
+    """Make ``profiler`` the one ``stage`` reports to (``None`` disables).
+
+    Called at the top of every rerun, so a run that stopped early cannot
+    leave a stale profiler behind. With a Streamlit ``run_context`` the bytes
+    sent to the browser are metered too.
+    """
+    _current.set(profiler)
+    if profiler is not None and profiler.memory:
+        profiler.trace()
+    if run_context is not None:
+        FrontendMeter.attach(run_context, profiler)
+    return profiler
+
+
+class StageStats:
+    __slots__ = ('name', 'calls', 'seconds', 'rows', 'bytes_sent', 'peak_bytes')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes_sent = 0
+        self.peak_bytes = None
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Profiler:
+    """Per-rerun timings, rows, frontend bytes and (optionally) memory per stage.
+
+    Stages nest; each keeps its own totals, so an outer stage includes the
+    time of the stages inside it. ``memory=True`` traces allocations with
+    tracemalloc, which slows the rerun down noticeably; peaks are relative to
+    the memory in use when the stage started. The tracer is shared by every
+    session and its peak is never reset, so a stage that stays below an
+    earlier high-water mark reports its net growth instead.
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.seconds = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tracing = None
+
+    def trace(self):
+        """Keep tracemalloc on until ``finish`` (or until this is collected)."""
+        if self._tracing is None:
+            _start_tracing()
+            # A run that stopped early never calls finish
+            self._tracing = weakref.finalize(self, _stop_tracing)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stats(self, name):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(name)
+        return stats
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        stats = self._stats(name)
+        stack = self._stack()
+        # [stats, memory at start, tracer peak at start]
+        frame = [stats, 0, 0]
+        if self.memory and tracemalloc.is_tracing():
+            frame[1], frame[2] = tracemalloc.get_traced_memory()
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                stats.calls += 1
+                stats.seconds += elapsed
+                if rows is not None:
+                    stats.rows += int(rows)
+            if self.memory and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                # Only a new high-water mark tells how far this stage went
+                top = peak if peak > frame[2] else current
+                stats.peak_bytes = max(stats.peak_bytes or 0, top - frame[1])
+
+    def set_rows(self, rows):
+        stack = self._stack()
+        if stack:
+            stack[-1][0].rows += int(rows)
+
+    def count_bytes(self, nbytes):
+        if self.seconds is not None:
+            return
+        stack = self._stack()
+        stats = stack[-1][0] if stack else self._stats(UNATTRIBUTED)
+        stats.bytes_sent += nbytes
+
+    def finish(self):
+        """Stop collecting; stages and frontend bytes after this are ignored."""
+        if _current.get() is self:
+            _current.set(None)
+        if self._tracing is not None:
+            self._tracing()
+        if self.seconds is None:
+            self.seconds = time.perf_counter() - self.started
+        return self
+
+    def records(self):
+        return [stats.as_dict() for stats in self.stages.values()]
+
+    def to_json(self):
+        return json.dumps({'seconds': self.seconds, 'stages': self.records()}, indent=1)
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """Prometheus text exposition format, one gauge family per measure."""
+        families = (
+            ('stage_seconds', 'seconds', "Tiempo por etapa en la última ejecución"),
+            ('stage_calls', 'calls', "Llamadas por etapa en la última ejecución"),
+            ('stage_rows', 'rows', "Registros procesados por etapa"),
+            ('stage_bytes_sent', 'bytes_sent', "Bytes enviados al navegador por etapa"),
+            ('stage_peak_bytes', 'peak_bytes', "Pico de memoria asignada por etapa"),
+        )
+        lines = []
+        for suffix, field, help_text in families:
+            name = f"{prefix}_{suffix}"
+            samples = [(stats.name, getattr(stats, field)) for stats in self.stages.values()
+                       if getattr(stats, field) is not None]
+            if not samples:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f'{name}{{stage="{_escape_label(stage_name)}"}} {value}' for stage_name, value in samples]
+        if self.seconds is not None:
+            lines += [f"# HELP {prefix}_rerun_seconds Duración total de la última ejecución",
+                      f"# TYPE {prefix}_rerun_seconds gauge", f"{prefix}_rerun_seconds {self.seconds}"]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class FrontendMeter:
+    """Counts the bytes of every message a Streamlit script run sends.
+
+    Installed once on the run context's enqueue callback; it forwards every
+    message and, only while a profiler is attached, adds its serialized size
+    to the innermost open stage. That callback is private to Streamlit: if a
+    release renames or drops it, frontend bytes are simply not metered.
+    """
+
+    def __init__(self, enqueue):
+        self.enqueue = enqueue
+        self.profiler = None
+
+    def __call__(self, msg):
+        if self.profiler is not None and self.profiler.seconds is None:
+            self.profiler.count_bytes(msg.ByteSize())
+        self.enqueue(msg)
+
+    @classmethod
+    def attach(cls, run_context, profiler):
+        """Meter ``run_context`` for ``profiler`` (``None`` detaches it)."""
+        meter = getattr(run_context, '_enqueue', None)
+        if not isinstance(meter, cls):
+            if profiler is None or not callable(meter):
+                return None
+            try:
+                run_context._enqueue = cls(meter)
+            except (AttributeError, TypeError):
+                return None
+            meter = run_context._enqueue
+        meter.profiler = profiler
+        return meter
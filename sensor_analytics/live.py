@@ -0,0 +1,323 @@
+import io
+import json
+import os
+import socketserver
+import threading
+import weakref
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .anomalies import AnomalyEngine
+from .ingest import (
+    DEFAULT_SENSOR, SENSOR_COL, TIME_COL, VALUE_DTYPE, VARIABLES, detect_sensor_pairs,
+    mapped_columns, parse_times, sniff_time_format, to_long,
+)
+from .streaming import SensorAccumulator
+
+# Readings kept for the live charts; 18 bytes each, so ~1.8 MB in total
+RING_CAPACITY = 100_000
+POLL_SECONDS = 2.0
+# Existing file content replayed when a tail starts (like `tail -c`)
+BACKFILL_BYTES = 4 * 1024 ** 2
+# Lines a socket listener holds between two polls before dropping the oldest
+SOCKET_BACKLOG = 100_000
+
+
+class RingBuffer:
+    """The last ``capacity`` readings in preallocated arrays.
+
+    Memory is fixed at construction: appends overwrite the oldest slots, and
+    ``frame()`` returns the retained readings in arrival order as a long
+    (sensor, temperatura, humedad) frame.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, len(VARIABLES)), np.nan, dtype=VALUE_DTYPE)
+        self.codes = np.zeros(capacity, dtype=np.int16)
+        self.sensors = []
+        self.head = 0
+        self.size = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes + self.codes.nbytes
+
+    def _codes(self, sensors):
+        for sensor in sensors.unique():
+            if sensor not in self.sensors:
+                self.sensors.append(sensor)
+        lookup = {sensor: code for code, sensor in enumerate(self.sensors)}
+        return sensors.map(lookup).to_numpy(dtype=np.int16)
+
+    def append(self, batch):
+        """Add a long-format batch, overwriting the oldest readings if full."""
+        n = len(batch)
+        if n == 0:
+            return
+        self.total += n
+        codes = self._codes(batch[SENSOR_COL].astype(str))
+        times = batch.index.as_unit('ns').asi8
+        values = batch[list(VARIABLES)].to_numpy(dtype=VALUE_DTYPE)
+        if n > self.capacity:
+            codes, times, values = codes[-self.capacity:], times[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+        slots = (self.head + np.arange(n)) % self.capacity
+        self.times[slots] = times
+        self.values[slots] = values
+        self.codes[slots] = codes
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def frame(self):
+        order = (self.head - self.size + np.arange(self.size)) % self.capacity
+        frame = pd.DataFrame(
+            {var: self.values[order, i] for i, var in enumerate(VARIABLES)},
+            index=pd.DatetimeIndex(self.times[order].view('datetime64[ns]'), name=TIME_COL),
+        )
+        frame.insert(0, SENSOR_COL, pd.Categorical.from_codes(self.codes[order], categories=self.sensors))
+        return frame
+
+
+def parse_lines(lines):
+    """Parse JSONL or ``time,sensor,temperatura,humedad`` lines into a long frame.
+
+    JSON objects may name the time ``time``/``Time``/``timestamp`` and omit
+    ``sensor``; CSV lines may omit the sensor field. Malformed lines are
+    skipped.
+    """
+    times, sensors, values = [], [], []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if line.startswith('{'):
+                record = json.loads(line)
+                stamp = record.get('time', record.get(TIME_COL, record.get('timestamp')))
+                sensor = record.get(SENSOR_COL, DEFAULT_SENSOR)
+                reading = [record.get(var) for var in VARIABLES]
+            else:
+                fields = line.split(',')
+                stamp, sensor = fields[0], fields[1] if len(fields) > 3 else DEFAULT_SENSOR
+                reading = fields[-2:]
+            reading = [np.nan if v in (None, '') else float(v) for v in reading]
+        except (ValueError, TypeError, IndexError):
+            continue
+        times.append(stamp)
+        sensors.append(str(sensor))
+        values.append(reading)
+
+    index = pd.DatetimeIndex(pd.to_datetime(times, format='ISO8601', errors='coerce'), name=TIME_COL)
+    values = np.asarray(values, dtype=VALUE_DTYPE).reshape(-1, len(VARIABLES))
+    frame = pd.DataFrame({var: values[:, i] for i, var in enumerate(VARIABLES)}, index=index)
+    frame.insert(0, SENSOR_COL, pd.Categorical(sensors))
+    return frame[frame.index.notna()]
+
+
+class FileTailer:
+    """Follow an append-only CSV or JSONL file from a saved byte offset.
+
+    Each ``poll()`` reads only the complete lines appended since the last one.
+    A file that shrinks (rotated or truncated) is followed from the start.
+    """
+
+    def __init__(self, path, backfill=BACKFILL_BYTES):
+        self.path = path
+        self.backfill = backfill
+        self.jsonl = path.lower().endswith(('.jsonl', '.json', '.ndjson'))
+        self.offset = None
+        self.header = None
+        self.column_mapping = None
+        self.time_format = None
+
+    def _start(self, f, size):
+        self.offset = None
+        if not self.jsonl:
+            self.header = f.readline()
+            if not self.header.endswith(b'\n'):
+                # Header not fully written yet
+                return False
+            columns = pd.read_csv(io.BytesIO(self.header), nrows=0).columns
+            self.column_mapping = detect_sensor_pairs(list(columns))
+        start = max(f.tell(), size - self.backfill)
+        if start > f.tell():
+            f.seek(start - 1)
+            f.readline()  # Skip the partial line the backfill window starts in
+        self.offset = f.tell()
+        return True
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return parse_lines([])
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            if (self.offset is None or size < self.offset) and not self._start(f, size):
+                return parse_lines([])
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        # Keep a trailing partial line for the next poll
+        complete = data.rfind(b'\n') + 1
+        self.offset += complete
+        data = data[:complete]
+        if not data:
+            return parse_lines([])
+        if self.jsonl or not self.column_mapping:
+            return parse_lines(data.decode('utf-8', errors='replace').splitlines())
+        return self._parse_csv(data)
+
+    def _parse_csv(self, data):
+        wide = pd.read_csv(io.BytesIO(self.header + data),
+                           usecols=[TIME_COL, *mapped_columns(self.column_mapping)])
+        times = wide.pop(TIME_COL)
+        if self.time_format is None:
+            self.time_format = sniff_time_format(times.head(64))
+        return to_long(wide, parse_times(times, self.time_format), self.column_mapping)
+
+    def close(self):
+        pass
+
+
+class _LineHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        lines = self.server.lines
+        if isinstance(self.request, tuple):
+            # UDP: one datagram may carry several lines
+            lines.extend(self.request[0].decode('utf-8', errors='replace').splitlines())
+            return
+        for raw in self.request.makefile('rb'):
+            lines.append(raw.decode('utf-8', errors='replace'))
+
+
+class _UDPServer(socketserver.UDPServer):
+    # No SO_REUSEADDR: on Linux a second UDP socket on the port would silently
+    # share the datagrams; binding twice must fail instead
+    pass
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SocketListener:
+    """Receive newline-delimited readings on a local UDP or TCP port.
+
+    A background thread appends raw lines to a bounded deque; ``poll()``
+    drains and parses whatever arrived since the last call. MQTT gateways
+    can bridge into it, e.g. ``mosquitto_sub -t sensores | nc -u host port``.
+    """
+
+    def __init__(self, host, port, protocol='udp', backlog=SOCKET_BACKLOG):
+        server_class = _UDPServer if protocol == 'udp' else _TCPServer
+        self.server = server_class((host, port), _LineHandler)
+        self.server.lines = deque(maxlen=backlog)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.2},
+                                       daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def poll(self):
+        lines = self.server.lines
+        batch = [lines.popleft() for _ in range(len(lines))]
+        return parse_lines(batch)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def open_source(spec, **kwargs):
+    """``udp://host:port``, ``tcp://host:port`` or the path of a file to tail."""
+    for protocol in ('udp', 'tcp'):
+        if spec.startswith(f'{protocol}://'):
+            host, _, port = spec[len(protocol) + 3:].rpartition(':')
+            return SocketListener(host or '127.0.0.1', int(port), protocol, **kwargs)
+    return FileTailer(spec, **kwargs)
+
+
+class LiveSession:
+    """A live source feeding a ring buffer and per-sensor running aggregates.
+
+    Each ``poll()`` only touches the readings that arrived since the previous
+    one: they are written into the ring buffer for the charts, folded into
+    ``streaming.SensorAccumulator`` objects for the all-time statistics and
+    scored by a per-sensor ``anomalies.AnomalyEngine``.
+    """
+
+    def __init__(self, source, capacity=RING_CAPACITY, detector='rolling_mad', **comfort):
+        self.source = source
+        self.buffer = RingBuffer(capacity)
+        self.accumulators = {}
+        self.anomalies = {}
+        self.detector = detector
+        self.comfort = comfort
+        # Several dashboard sessions may poll the same shared session
+        self._lock = threading.Lock()
+
+    def poll(self):
+        with self._lock:
+            batch = self.source.poll()
+            if batch.empty:
+                return 0
+            self.buffer.append(batch)
+            for sensor, group in batch.groupby(SENSOR_COL, observed=True, sort=False):
+                if sensor not in self.accumulators:
+                    self.accumulators[sensor] = SensorAccumulator(**self.comfort)
+                    self.anomalies[sensor] = AnomalyEngine(self.detector)
+                self.accumulators[sensor].update(group)
+                self.anomalies[sensor].update(group)
+            return len(batch)
+
+    def close(self):
+        self.source.close()
+
+
+# spec -> [LiveSession, subscribers]; a port can only be bound once per process
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _release(spec):
+    with _shared_lock:
+        entry = _shared.get(spec)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _shared[spec]
+    entry[0].close()
+
+
+class LiveSubscription:
+    """One dashboard session's use of the process-wide ``LiveSession`` of a spec.
+
+    Sessions watching the same file or port share one source, buffer and set
+    of aggregates. The source is closed when the last subscription is closed
+    or garbage collected, e.g. with the Streamlit session that held it, so a
+    reloaded page can bind the same port again.
+    """
+
+    def __init__(self, spec, capacity=RING_CAPACITY):
+        self.spec = spec
+        with _shared_lock:
+            entry = _shared.get(spec)
+            if entry is None:
+                entry = _shared[spec] = [LiveSession(open_source(spec), capacity), 0]
+            entry[1] += 1
+        self.session = entry[0]
+        self._finalizer = weakref.finalize(self, _release, spec)
+
+    def close(self):
+        self._finalizer()
@@ -0,0 +1,400 @@
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .background import TASKS
+from .comfort import COMFORT_FREQ, ZONE_SETS, comfort_report
+from .compact import PackedFrame
+from .config import COMPACT_STORAGE, DATASET_CACHE_BYTES
+from .filters import SortedIndex
+from .instrument import stage
+from .ingest import (  # noqa: F401
+    DEFAULT_SENSOR, SENSOR_COL, MissingColumnsError, detect_sensor_columns, read_sensor_csv,
+)
+from .quality import assess, clean_order, regularize
+from .rollups import RollupPyramid
+from .stats import compute_summary, sensor_statistics
+from .streaming import COMFORT_HUM, COMFORT_TEMP
+
+# File ids remembered per cached dataset (each re-upload gets a new id)
+ALIASES_PER_ENTRY = 4
+# Comfort reports kept per dataset, most recently used settings first
+COMFORT_REPORTS = 2
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_dataset(source):
+    """A ``Dataset`` from a CSV path, raw bytes or a binary file object."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            data = f.read()
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        data = source.read()
+    return Dataset(content_hash(data), *read_sensor_csv(data))
+
+
+@dataclass
+class Dataset:
+    """A loaded export: one frame, possibly holding several sensors.
+
+    Multi-sensor frames carry a categorical ``sensor`` column and are kept
+    grouped by sensor, so ``for_sensor`` is a contiguous slice. Per-sensor
+    views are plain (temperatura, humedad) frames with their own cached
+    summary and indexes. Rows are sorted by time within each sensor (only
+    when they arrive out of order) and duplicate timestamps are dropped.
+
+    A ``compact`` dataset keeps its rows packed (``compact.PackedFrame``)
+    and decodes ``frame`` when it is used; nothing else changes for callers.
+    """
+    digest: str
+    frame: pd.DataFrame
+    column_mapping: dict
+    _indexes: dict = field(default_factory=dict, repr=False)
+    _views: dict = field(default_factory=dict, repr=False)
+    out_of_order: int = field(default=0, init=False)
+    duplicates: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        # Packed sensor views arrive without a frame, already cleaned
+        if self.frame is None:
+            return
+        with stage('clean_order', len(self.frame)):
+            self.frame, self.out_of_order, self.duplicates = clean_order(self.frame)
+
+    def __getattr__(self, name):
+        # Only reached when ``frame`` is not an attribute, i.e. when packed
+        if name == 'frame' and '_packed' in self.__dict__:
+            return self._unpack()
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def compact(self):
+        """Keep this dataset packed and decode its frame only while it is in use.
+
+        Once decoded, the frame is kept until ``release``; after that it lives
+        only as long as a caller still holds it. Values are rounded to 0.01 (see
+        ``compact.PackedValues``); timestamps are exact.
+        """
+        if '_packed' not in self.__dict__:
+            with stage('pack', len(self.frame)):
+                packed = PackedFrame(self.frame)
+            # Views decode their own rows, so the whole frame is kept only while in use
+            self._pack(packed, weakref.ref(self.__dict__.pop('frame')))
+            for view in list(self._views.values()):
+                if isinstance(view, Dataset):
+                    view.compact()
+        return self
+
+    def release(self):
+        """Let the decoded frame of a packed dataset (and its views) be freed."""
+        decoded = self.__dict__.get('_decoded')
+        if isinstance(decoded, pd.DataFrame):
+            self._decoded = weakref.ref(decoded)
+        for view in list(self._views.values()):
+            if isinstance(view, Dataset):
+                view.release()
+
+    def _pack(self, packed, decoded=None):
+        self.__dict__.pop('frame', None)
+        self.__dict__.pop('nbytes', None)
+        self._packed = packed
+        self._decoded = decoded
+
+    def _unpack(self):
+        frame = self._decoded
+        if isinstance(frame, weakref.ref):
+            frame = frame()
+        if frame is None:
+            with stage('unpack', len(self._packed)):
+                frame = self._packed.to_frame()
+        self._decoded = frame
+        return frame
+
+    @property
+    def columns(self):
+        packed = self.__dict__.get('_packed')
+        return packed.columns if packed is not None else list(self.frame.columns)
+
+    def _sensor_codes(self):
+        packed = self.__dict__.get('_packed')
+        if packed is not None:
+            return packed.sensor_codes, packed.sensor_categories
+        column = self.frame[SENSOR_COL]
+        return column.cat.codes.to_numpy(), column.cat.categories
+
+    @cached_property
+    def sensors(self):
+        if SENSOR_COL not in self.columns:
+            return list(self.column_mapping)[:1] or [DEFAULT_SENSOR]
+        codes, categories = self._sensor_codes()
+        return [categories[code] for code in np.unique(codes) if code >= 0]
+
+    def for_sensor(self, sensor):
+        """Single-sensor view (temperatura, humedad) of this dataset."""
+        if SENSOR_COL not in self.columns:
+            return self
+        if sensor not in self._views:
+            codes, categories = self._sensor_codes()
+            code = categories.get_indexer([sensor])[0]
+            # Unknown sensors (e.g. an empty date range) give an empty view
+            lo, hi = np.searchsorted(codes, [code, code + 1]) if code >= 0 else (0, 0)
+            mapping = {sensor: self.column_mapping.get(sensor)}
+            packed = self.__dict__.get('_packed')
+            if packed is not None:
+                # A slice of the packed arrays: no copy and no decoding of the whole file
+                view = Dataset(f"{self.digest}/{sensor}", None, mapping)
+                view._pack(packed.slice(lo, hi, drop_sensor=True))
+            else:
+                frame = self.frame.iloc[lo:hi].drop(columns=SENSOR_COL)
+                view = Dataset(f"{self.digest}/{sensor}", frame, mapping)
+            # Cleaning happened on the whole file; report it with every sensor
+            view.out_of_order, view.duplicates = self.out_of_order, self.duplicates
+            self._views[sensor] = view
+        return self._views[sensor]
+
+    @cached_property
+    def quality(self):
+        with stage('quality', len(self.frame)):
+            return assess(self.frame, self.out_of_order, self.duplicates)
+
+    def regular(self, freq=None, fill='none'):
+        """This dataset resampled onto a regular grid (see ``quality.regularize``)."""
+        key = ('regular', freq, fill)
+        if key not in self._views:
+            with stage('regularize', len(self.frame)):
+                self._views[key] = regularize(self.frame, freq, fill)
+        return self._views[key]
+
+    def comfort(self, zone_sets=ZONE_SETS, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM,
+                freq=COMFORT_FREQ):
+        """Comfort occupancy per ``freq`` bucket (see ``comfort.ComfortEngine``).
+
+        Only the last ``COMFORT_REPORTS`` settings are kept, so dragging the
+        sliders does not pile reports up in the shared cache.
+        """
+        key = ('comfort', tuple(zone_sets), tuple(comfort_temp), tuple(comfort_hum), freq)
+        report = self._views.pop(key, None)
+        if report is None:
+            with stage('comfort', len(self.frame)):
+                report = comfort_report(self.frame, zone_sets, comfort_temp, comfort_hum, freq)
+            older = [view for view in self._views if isinstance(view, tuple) and view[0] == 'comfort']
+            for view in older[:len(older) - COMFORT_REPORTS + 1]:
+                self._views.pop(view, None)
+        self._views[key] = report
+        return report
+
+    @cached_property
+    def rollups(self):
+        with stage('rollups', len(self.frame)):
+            return RollupPyramid(self.frame)
+
+    @cached_property
+    def sensor_statistics(self):
+        with stage('sensor_statistics', len(self.frame)):
+            return sensor_statistics(self.frame)
+
+    @cached_property
+    def nbytes(self):
+        packed = self.__dict__.get('_packed')
+        if packed is not None:
+            return packed.nbytes
+        return int(self.frame.memory_usage(index=True, deep=True).sum())
+
+    def resident_bytes(self):
+        """Bytes held by this dataset and everything derived from it so far.
+
+        Sensor views are slices of this frame, so only what they derived
+        themselves is added for them.
+        """
+        total = self.nbytes
+        decoded = self.__dict__.get('_decoded')
+        if isinstance(decoded, pd.DataFrame):
+            total += int(decoded.memory_usage(index=True, deep=True).sum())
+        for view in list(self._views.values()):
+            if isinstance(view, Dataset):
+                total += view.resident_bytes() - view.nbytes
+            elif isinstance(view, pd.DataFrame):
+                total += int(view.memory_usage(index=True).sum())
+            else:
+                total += view.nbytes
+        total += sum(index.nbytes for index in list(self._indexes.values()))
+        rollups = self.__dict__.get('rollups')
+        if rollups is not None:
+            total += rollups.nbytes
+        return total
+
+    @cached_property
+    def summary(self):
+        # Computed on first use and kept with the cached dataset
+        with stage('summary', len(self.frame)):
+            return compute_summary(self.frame)
+
+    def sorted_index(self, var):
+        if var not in self._indexes:
+            with stage('sorted_index', len(self.frame)):
+                self._indexes[var] = SortedIndex(self.frame[var].to_numpy())
+        return self._indexes[var]
+
+
+class DatasetCache:
+    """LRU cache of parsed datasets keyed by the hash of the uploaded bytes.
+
+    One instance (``DATASETS``) is shared by every session of the server, so
+    analysts opening the same export share one parsed copy and everything
+    derived from it. pandas copy-on-write keeps that copy read-only in
+    practice: a session that modifies a frame gets its own copy.
+
+    With ``compact`` every dataset is stored packed, and only the one used
+    last keeps its decoded frame; the others are decoded again when next
+    used (see ``Dataset.compact``).
+
+    Entries are evicted least-recently-used first once either ``max_entries``
+    or ``max_bytes`` is exceeded. Sizes are measured on every access, since
+    views, indexes and rollups are added to a dataset as it is used; the
+    dataset being returned is always kept even if it alone is larger than
+    the budget. Concurrent requests for the same key wait for a single parse.
+
+    Results of ``tasks`` (a ``background.TaskCache``) count against the same
+    ``max_bytes``: they are dropped with the dataset they came from, and the
+    oldest go first when the datasets that remain leave no room for them.
+    """
+
+    def __init__(self, max_entries=16, max_bytes=DATASET_CACHE_BYTES, compact=COMPACT_STORAGE,
+                 tasks=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self.tasks = tasks
+        self._entries = OrderedDict()
+        # Streamlit file ids -> content digest, so reruns skip re-hashing
+        self._aliases = OrderedDict()
+        self._building = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, digest):
+        return digest in self._entries
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(entry.resident_bytes() for entry in self._entries.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'resident_bytes': self.nbytes,
+                'task_bytes': self.tasks.nbytes if self.tasks is not None else 0,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'compact': self.compact,
+            }
+
+    def load(self, uploaded_file):
+        file_id = getattr(uploaded_file, 'file_id', None)
+        with self._lock:
+            digest = self._aliases.get(file_id) if file_id is not None else None
+            if digest is not None and digest in self._entries:
+                self._aliases.move_to_end(file_id)
+                return self._hit(digest)
+
+        data = uploaded_file.getvalue()
+        dataset = self.get_or_parse(data)
+        if file_id is not None:
+            with self._lock:
+                self._aliases[file_id] = dataset.digest
+                self._aliases.move_to_end(file_id)
+                self._prune_aliases()
+        return dataset
+
+    def get_or_parse(self, data):
+        digest = content_hash(data)
+        return self.get_or_build(
+            digest, lambda: Dataset(digest, *read_sensor_csv(data))
+        )
+
+    def get_or_build(self, key, build):
+        """Return the dataset cached under ``key``, calling ``build()`` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                return self._hit(key)
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:
+            with self._lock:
+                # Built by another session while this one waited
+                if key in self._entries:
+                    return self._hit(key)
+                self.misses += 1
+            try:
+                dataset = build()
+                if self.compact:
+                    dataset.compact()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            with self._lock:
+                self._building.pop(key, None)
+                self._entries[key] = dataset
+                self._evict(key)
+        return dataset
+
+    def _hit(self, key):
+        self.hits += 1
+        self._entries.move_to_end(key)
+        self._evict(key)
+        return self._entries[key]
+
+    def _evict(self, keep):
+        if self.compact:
+            for key, entry in self._entries.items():
+                if key != keep:
+                    entry.release()
+        sizes = {key: entry.resident_bytes() for key, entry in self._entries.items()}
+        total = sum(sizes.values())
+        task_bytes = self.tasks.nbytes if self.tasks is not None else 0
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and total + task_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= sizes[key]
+            self.evictions += 1
+            if self.tasks is not None:
+                # Tasks are keyed by dataset digest, which may differ from the cache key
+                task_bytes -= self.tasks.forget(entry.digest)
+        if self.tasks is not None and total + task_bytes > self.max_bytes:
+            self.tasks.trim(max(self.max_bytes - total, 0))
+        self._prune_aliases()
+
+    def _prune_aliases(self):
+        # Ids of evicted datasets, and the oldest beyond the limit
+        limit = ALIASES_PER_ENTRY * self.max_entries
+        for file_id, digest in list(self._aliases.items()):
+            if digest not in self._entries or len(self._aliases) > limit:
+                del self._aliases[file_id]
+
+
+# Shared by every session of the server process
+DATASETS = DatasetCache(tasks=TASKS)
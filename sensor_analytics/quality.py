@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .ingest import SENSOR_COL, TIME_COL, VARIABLES
+
+# A pause longer than this many sampling intervals counts as a gap
+GAP_FACTOR = 3.0
+FILL_LABELS = {'none': 'Sin relleno', 'ffill': 'Último valor', 'linear': 'Interpolación lineal'}
+FILL_METHODS = tuple(FILL_LABELS)
+# Largest regular grid we are willing to allocate
+MAX_GRID = 5_000_000
+
+
+def clean_order(frame):
+    """Sort by (sensor, time) only when needed and drop duplicate timestamps.
+
+    Returns the cleaned frame plus how many rows were out of order and how
+    many duplicates (same sensor and time; the last reading wins) were
+    removed. Already clean frames are returned as is, after one O(n) check.
+    """
+    times = frame.index.as_unit('ns').asi8
+    codes = frame[SENSOR_COL].cat.codes.to_numpy() if SENSOR_COL in frame else np.zeros(len(frame), np.int8)
+
+    same_sensor = codes[1:] == codes[:-1]
+    backwards = (codes[1:] < codes[:-1]) | (same_sensor & (times[1:] < times[:-1]))
+    out_of_order = int(backwards.sum())
+    if out_of_order:
+        order = np.lexsort((times, codes))
+        frame, times, codes = frame.iloc[order], times[order], codes[order]
+        same_sensor = codes[1:] == codes[:-1]
+
+    repeated = same_sensor & (times[1:] == times[:-1])
+    duplicates = int(repeated.sum())
+    if duplicates:
+        frame = frame[~np.r_[repeated, False]]
+    return frame, out_of_order, duplicates
+
+
+def sampling_interval(times):
+    """Typical spacing of ``times`` (int64 ns): the median positive step."""
+    steps = np.diff(times)
+    steps = steps[steps > 0]
+    return pd.Timedelta(int(np.median(steps))) if len(steps) else None
+
+
+def find_gaps(times, interval, factor=GAP_FACTOR):
+    """Start/end (int64 ns) of every pause longer than ``factor`` intervals."""
+    if interval is None or len(times) < 2:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    steps = np.diff(times)
+    at = np.flatnonzero(steps > factor * interval.value)
+    return times[at], times[at + 1]
+
+
+@dataclass(frozen=True)
+class QualityReport:
+    rows: int
+    interval: object
+    start: object
+    end: object
+    expected: int
+    coverage: dict
+    gap_starts: np.ndarray
+    gap_ends: np.ndarray
+    out_of_order: int = 0
+    duplicates: int = 0
+    tz: object = None
+
+    @property
+    def gap_count(self):
+        return len(self.gap_starts)
+
+    @property
+    def missing(self):
+        return pd.Timedelta(int((self.gap_ends - self.gap_starts).sum()))
+
+    @property
+    def largest_gap(self):
+        if not self.gap_count:
+            return pd.Timedelta(0)
+        return pd.Timedelta(int((self.gap_ends - self.gap_starts).max()))
+
+    def gaps_frame(self):
+        start = pd.DatetimeIndex(self.gap_starts.view('datetime64[ns]'))
+        end = pd.DatetimeIndex(self.gap_ends.view('datetime64[ns]'))
+        if self.tz is not None:
+            # Gap bounds are UTC ticks; show them in the data's own offset
+            start = start.tz_localize('UTC').tz_convert(self.tz)
+            end = end.tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame({'inicio': start, 'fin': end, 'duración': end - start})
+
+
+def assess(frame, out_of_order=0, duplicates=0, factor=GAP_FACTOR):
+    """Sampling interval, gaps and per-variable coverage of a single-sensor frame."""
+    times = frame.index.as_unit('ns').asi8
+    interval = sampling_interval(times)
+    gap_starts, gap_ends = find_gaps(times, interval, factor)
+    if interval is None:
+        expected = len(times)
+    else:
+        expected = int((times[-1] - times[0]) // interval.value) + 1
+    coverage = {
+        var: float(frame[var].notna().sum() / expected * 100) if expected else np.nan
+        for var in VARIABLES
+    }
+    return QualityReport(
+        rows=len(frame), interval=interval,
+        start=frame.index[0] if len(frame) else None, end=frame.index[-1] if len(frame) else None,
+        expected=expected, coverage=coverage, gap_starts=gap_starts, gap_ends=gap_ends,
+        out_of_order=out_of_order, duplicates=duplicates, tz=frame.index.tz,
+    )
+
+
+def _fill(values, method, limit):
+    valid = np.isfinite(values)
+    if method == 'none' or valid.all() or not valid.any():
+        return values
+    positions = np.arange(len(values))
+    previous = np.maximum.accumulate(np.where(valid, positions, -1))
+    if method == 'ffill':
+        fill = (~valid) & (previous >= 0) & (positions - previous <= limit)
+        out = values.copy()
+        out[fill] = values[previous[fill]]
+        return out
+    # Linear: interpolate, but leave holes wider than `limit` slots empty
+    following = np.minimum.accumulate(np.where(valid, positions, len(values))[::-1])[::-1]
+    out = np.interp(positions, positions[valid], values[valid])
+    hole = following - previous - 1
+    out[~valid & ((previous < 0) | (following >= len(values)) | (hole > limit))] = np.nan
+    return out
+
+
+def regularize(frame, freq=None, fill='none', limit=None):
+    """Resample a single-sensor frame onto a regular ``freq`` grid.
+
+    Readings are averaged per slot with ``np.bincount``; empty slots stay NaN
+    (``fill='none'``) or are filled forward or linearly across at most
+    ``limit`` slots (by default, anything shorter than a gap).
+    """
+    if fill not in FILL_METHODS:
+        raise ValueError(f"Método de relleno desconocido: {fill}")
+    # Slots follow wall time, like the rollups, so days start at local midnight
+    tz = frame.index.tz
+    index = frame.index.as_unit('ns')
+    times = (index.tz_localize(None) if tz is not None else index).asi8
+    step = pd.Timedelta(freq) if freq is not None else sampling_interval(times)
+    if step is None or not len(times):
+        return frame[list(VARIABLES)].copy()
+    start = pd.Timestamp(times.min()).floor(step).value
+    slots = (times - start) // step.value
+    n = int(slots.max()) + 1
+    if n > MAX_GRID:
+        raise ValueError(f"La malla de {n:,} intervalos es demasiado grande; use una frecuencia mayor.")
+    if limit is None:
+        limit = max(int(GAP_FACTOR) - 1, 0)
+
+    columns = {}
+    for var in VARIABLES:
+        values = frame[var].to_numpy(dtype=np.float64)
+        valid = np.isfinite(values)
+        counts = np.bincount(slots[valid], minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.bincount(slots[valid], weights=values[valid], minlength=n) / counts
+        columns[var] = _fill(means, fill, limit).astype(frame[var].dtype)
+    index = pd.date_range(pd.Timestamp(start), periods=n, freq=step, name=TIME_COL)
+    if tz is not None:
+        index = index.tz_localize(tz)
+    return pd.DataFrame(columns, index=index)
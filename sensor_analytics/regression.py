@@ -0,0 +1,112 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class OLSFit:
+    slope: float
+    intercept: float
+    r2: float
+    p_value: float
+    n: int
+
+    def predict(self, x):
+        return self.slope * np.asarray(x, dtype=np.float64) + self.intercept
+
+
+def _betacf(a, b, x, max_iter=500, eps=1e-14):
+    # Continued fraction for the incomplete beta function (modified Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < eps:
+            break
+    return h
+
+
+def betainc(a, b, x):
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1.0) / (a + b + 2.0):
+        return math.exp(log_front) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _betacf(b, a, 1.0 - x) / b
+
+
+def t_two_sided_p(t, df):
+    # Exact at every df: the normal tail is off by ~0.2% even at df=20000, and
+    # the continued fraction still converges in a few dozen steps at df=1e8
+    if not np.isfinite(t):
+        return 0.0 if np.isinf(t) else np.nan
+    return betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def ols_from_moments(n, mean_x, mean_y, sxx, syy, sxy):
+    """Closed-form simple regression y = slope * x + intercept.
+
+    ``sxx``, ``syy`` and ``sxy`` are the centered sums of squares and
+    cross-products, as kept by the streaming accumulators.
+    """
+    if n < 3 or sxx <= 0:
+        return OLSFit(np.nan, np.nan, np.nan, np.nan, int(n))
+
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    r2 = sxy * sxy / (sxx * syy) if syy > 0 else 1.0
+    df = n - 2
+    sse = max(syy - slope * sxy, 0.0)
+    if sse == 0:
+        p_value = 0.0
+    else:
+        t = slope / math.sqrt(sse / df / sxx)
+        p_value = t_two_sided_p(t, df)
+    return OLSFit(float(slope), float(intercept), float(r2), float(p_value), int(n))
+
+
+def ols_fit(x, y):
+    """Fit y on x over the rows where both are present, in one O(n) pass."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    if x.size == 0:
+        return OLSFit(np.nan, np.nan, np.nan, np.nan, 0)
+
+    mean_x, mean_y = x.mean(), y.mean()
+    dx, dy = x - mean_x, y - mean_y
+    return ols_from_moments(x.size, mean_x, mean_y, dx @ dx, dy @ dy, dx @ dy)
+
+
+def ols_from_pair(pair):
+    """OLS fit from a ``streaming.PairStats`` co-moment accumulator."""
+    return ols_from_moments(pair.count, pair.mean_x, pair.mean_y, pair.m2_x, pair.m2_y, pair.c_xy)
+
+
+def format_p_value(p):
+    # Below double precision the t tail underflows; show a bound instead
+    if not np.isfinite(p):
+        return 'N/A'
+    return f"{p:.2g}" if p >= 1e-16 else "< 1e-16"
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+from .downsample import time_window
+from .ingest import VARIABLES
+
+# Finest to coarsest; each level is aggregated from the one before it
+LEVELS = ('1min', '15min', '1h', '1D')
+LEVEL_LABELS = {'1min': '1 minuto', '15min': '15 minutos', '1h': '1 hora', '1D': '1 día'}
+STATS = ('sum', 'count', 'min', 'max')
+# Calendar patterns and the rollup level they are read from
+PATTERNS = {
+    'hora': ('1h', lambda index: index.hour),
+    'dia_semana': ('1D', lambda index: index.dayofweek),
+    'mes': ('1D', lambda index: index.month),
+}
+PATTERN_LEVELS = {freq for freq, _ in PATTERNS.values()}
+# Axis title and tick names of each pattern (hours are shown as numbers)
+PATTERN_AXES = {
+    'hora': ("Hora del día", None),
+    'dia_semana': ("Día de la semana", ('Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom')),
+    'mes': ("Mes", ('Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic')),
+}
+
+
+def pattern_ticks(key, index):
+    """Tick labels for the index of ``RollupPyramid.pattern(key)``."""
+    names = PATTERN_AXES[key][1]
+    if names is None:
+        return list(index)
+    # dayofweek starts at 0, month at 1
+    offset = 0 if key == 'dia_semana' else 1
+    return [names[i - offset] for i in index]
+
+
+def _reduce(keys, sums, counts, mins, maxs):
+    """Fold rows sharing a (sorted) bucket key; arrays are (n, n_vars)."""
+    if not len(keys):
+        return keys, sums, counts, mins, maxs
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return (
+        keys[starts],
+        np.add.reduceat(sums, starts, axis=0),
+        np.add.reduceat(counts, starts, axis=0),
+        # fmin/fmax skip NaN, like the empty slots of a sparse bucket
+        np.fmin.reduceat(mins, starts, axis=0),
+        np.fmax.reduceat(maxs, starts, axis=0),
+    )
+
+
+def _floor(times, freq):
+    return pd.DatetimeIndex(times).floor(freq).asi8
+
+
+class RollupPyramid:
+    """Per-bucket sum/count/min/max of every reading at several resolutions.
+
+    The finest level is built from the time-sorted rows with one ``reduceat``
+    per statistic and each coarser level from the previous one, so the whole
+    pyramid costs little more than a single pass. Only non-empty buckets are
+    stored, and levels no coarser than the raw sampling are skipped.
+    """
+
+    def __init__(self, frame, levels=LEVELS):
+        # Buckets are floored in local wall time, in nanoseconds whatever the
+        # parser produced (pandas may give µs or a fixed UTC offset)
+        index = frame.index.as_unit('ns')
+        self.tz = index.tz
+        times = (index.tz_localize(None) if self.tz is not None else index).asi8
+        values = frame[list(VARIABLES)].to_numpy(dtype=np.float64)
+        if len(times) and not (np.diff(times) >= 0).all():
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+        valid = np.isfinite(values)
+        arrays = (np.where(valid, values, 0.0), valid.astype(np.int64), values, values)
+
+        self.levels = {}
+        for freq in levels:
+            times, *arrays = _reduce(_floor(times, freq), *arrays)
+            # A level as dense as the raw rows adds nothing to the charts (the
+            # rows are used instead) unless a calendar pattern reads from it
+            if len(times) <= len(frame) // 2 or freq in PATTERN_LEVELS:
+                self.levels[freq] = self._frame(times, arrays, frame.index.name, self.tz)
+
+    @staticmethod
+    def _frame(times, arrays, name, tz=None):
+        columns = {}
+        for i, var in enumerate(VARIABLES):
+            for stat, array in zip(STATS, arrays):
+                dtype = np.float64 if stat == 'sum' else np.int32 if stat == 'count' else np.float32
+                columns[(var, stat)] = array[:, i].astype(dtype)
+        index = pd.DatetimeIndex(times.view('datetime64[ns]'), name=name)
+        return pd.DataFrame(columns, index=index.tz_localize(tz) if tz is not None else index)
+
+    @property
+    def nbytes(self):
+        return sum(int(level.memory_usage(index=True).sum()) for level in self.levels.values())
+
+    def buckets(self, freq, start=None, end=None):
+        level = self.levels[freq]
+        if start is not None:
+            start = pd.Timestamp(start).floor(freq)
+        return time_window(level, start, end)
+
+    def choose(self, start, end, max_points, raw_rows):
+        """Coarsest level with at least ``max_points`` buckets in the window.
+
+        Returns ``None`` when no level fills the chart, i.e. when the raw
+        rows (downsampled) are the better source.
+        """
+        if raw_rows <= max_points:
+            return None
+        for freq in reversed(list(self.levels)):
+            n = len(self.buckets(freq, start, end))
+            if n >= max_points:
+                return freq if n < raw_rows else None
+        return None
+
+    def means(self, freq, start=None, end=None):
+        """Bucket means (one column per variable) of a level, windowed."""
+        level = self.buckets(freq, start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                var: level[(var, 'sum')] / level[(var, 'count')].where(level[(var, 'count')] > 0)
+                for var in VARIABLES
+            })
+
+    def pattern(self, key):
+        """Mean of each variable by hour of day, day of week or month."""
+        freq, keys = PATTERNS[key]
+        level = self.levels[freq]
+        moments = level[[(var, stat) for var in VARIABLES for stat in ('sum', 'count')]]
+        totals = moments.groupby(keys(level.index)).sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pattern = pd.DataFrame({
+                var: totals[(var, 'sum')] / totals[(var, 'count')].where(totals[(var, 'count')] > 0)
+                for var in VARIABLES
+            })
+        pattern.index.name = key
+        return pattern
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import SENSOR_LOCATIONS_FILE
+
+DEFAULT_LOCATION = (6.2479, -75.6081)
+DEFAULT_LOCATION_NAME = 'Universidad EAFIT'
+# Radius (degrees, ~50 m) of the ring unplaced sensors are spread on
+SPREAD_RADIUS = 0.0005
+
+
+def _known_locations(path):
+    if not path or not os.path.isfile(path):
+        return pd.DataFrame(columns=['lat', 'lon', 'location'])
+    known = pd.read_csv(path, dtype={'sensor': str})
+    # A sensor listed twice (e.g. after being moved) keeps its last position
+    known = known.drop_duplicates('sensor', keep='last').set_index('sensor')
+    if 'location' not in known:
+        known['location'] = known.index
+    return known[['lat', 'lon', 'location']]
+
+
+def sensor_locations(sensors, path=SENSOR_LOCATIONS_FILE):
+    """Map coordinates for each sensor, one row per sensor.
+
+    Sensors listed in ``path`` use their coordinates; the rest are placed on a
+    small circle around the campus so every node stays visible on the map.
+    """
+    sensors = [str(sensor) for sensor in sensors]
+    known = _known_locations(path)
+    angles = 2 * np.pi * np.arange(len(sensors)) / max(len(sensors), 1)
+    radius = SPREAD_RADIUS if len(sensors) > 1 else 0.0
+
+    rows = []
+    for sensor, angle in zip(sensors, angles):
+        if sensor in known.index:
+            lat, lon, location = known.loc[sensor, ['lat', 'lon', 'location']]
+        else:
+            lat = DEFAULT_LOCATION[0] + radius * np.sin(angle)
+            lon = DEFAULT_LOCATION[1] + radius * np.cos(angle)
+            location = DEFAULT_LOCATION_NAME
+        rows.append({'sensor': sensor, 'lat': float(lat), 'lon': float(lon), 'location': location})
+    return pd.DataFrame(rows, columns=['sensor', 'lat', 'lon', 'location'])
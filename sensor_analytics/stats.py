@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .regression import ols_from_moments
+from .ingest import SENSOR_COL, VARIABLES
+from .streaming import COMFORT_HUM, COMFORT_TEMP
+
+Z_THRESHOLD = 2.0
+HISTOGRAM_BINS = 20
+QUANTILES = (0.25, 0.50, 0.75)
+
+
+@dataclass(frozen=True)
+class ColumnSummary:
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    quantiles: tuple
+    lower: float
+    upper: float
+    anomaly_positions: np.ndarray
+    hist_counts: np.ndarray
+    hist_edges: np.ndarray
+
+    @property
+    def anomaly_count(self):
+        return len(self.anomaly_positions)
+
+    def describe(self, name=None):
+        # Same layout as Series.describe()
+        q25, q50, q75 = self.quantiles
+        return pd.Series({
+            'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min,
+            '25%': q25, '50%': q50, '75%': q75, 'max': self.max,
+        }, name=name)
+
+    def histogram_frame(self, name):
+        return pd.DataFrame({
+            name: (self.hist_edges[:-1] + self.hist_edges[1:]) / 2,
+            'count': self.hist_counts,
+        })
+
+
+@dataclass(frozen=True)
+class SensorSummary:
+    rows: int
+    columns: dict
+    correlation: float
+    fit: object
+
+    def __getitem__(self, var):
+        return self.columns[var]
+
+
+def compute_summary(frame, z=Z_THRESHOLD, bins=HISTOGRAM_BINS):
+    """Every per-column statistic the dashboard shows, from one (n, 2) array."""
+    values = frame[list(VARIABLES)].to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    counts = valid.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(values, axis=0) / counts
+        centered = values - means
+        sq = np.nansum(centered * centered, axis=0)
+        stds = np.where(counts > 1, np.sqrt(sq / (counts - 1)), np.nan)
+    mins = np.min(np.where(valid, values, np.inf), axis=0, initial=np.inf)
+    maxs = np.max(np.where(valid, values, -np.inf), axis=0, initial=-np.inf)
+    quantiles = np.nanquantile(values, QUANTILES, axis=0) if len(values) else np.full((3, 2), np.nan)
+
+    lower, upper = means - z * stds, means + z * stds
+    outside = (values > upper) | (values < lower)
+
+    columns = {}
+    for i, var in enumerate(VARIABLES):
+        col = values[valid[:, i], i]
+        if col.size:
+            hist_counts, hist_edges = np.histogram(col, bins=bins)
+        else:
+            hist_counts, hist_edges = np.zeros(0, dtype=np.int64), np.zeros(1)
+        columns[var] = ColumnSummary(
+            count=int(counts[i]), mean=means[i], std=stds[i],
+            min=mins[i] if counts[i] else np.nan, max=maxs[i] if counts[i] else np.nan,
+            quantiles=tuple(quantiles[:, i]), lower=lower[i], upper=upper[i],
+            anomaly_positions=np.flatnonzero(outside[:, i]),
+            hist_counts=hist_counts, hist_edges=hist_edges,
+        )
+
+    # Pairwise moments over rows where both readings exist (as Series.corr)
+    both = valid.all(axis=1)
+    if both.all():
+        pair_centered, pair_means, n_pair = centered, means, len(values)
+    else:
+        pair_values = values[both]
+        n_pair = len(pair_values)
+        pair_means = pair_values.mean(axis=0) if n_pair else np.full(2, np.nan)
+        pair_centered = pair_values - pair_means
+    sxx, syy = (pair_centered * pair_centered).sum(axis=0)
+    sxy = (pair_centered[:, 0] * pair_centered[:, 1]).sum()
+    correlation = sxy / np.sqrt(sxx * syy) if sxx > 0 and syy > 0 else np.nan
+    fit = ols_from_moments(n_pair, pair_means[0], pair_means[1], sxx, syy, sxy)
+
+    return SensorSummary(
+        rows=len(values),
+        columns=columns,
+        correlation=float(correlation),
+        fit=fit,
+    )
+
+
+def sensor_statistics(frame, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM):
+    """One row of headline statistics per sensor of a long-format frame.
+
+    Everything is a single grouped reduction over the sensor codes, so the
+    comparison table costs one pass regardless of how many nodes there are.
+    """
+    temp = frame['temperatura'].to_numpy(dtype=np.float64)
+    hum = frame['humedad'].to_numpy(dtype=np.float64)
+    both = np.isfinite(temp) & np.isfinite(hum)
+    tx, hx = np.where(both, temp, np.nan), np.where(both, hum, np.nan)
+    in_temp = (temp >= comfort_temp[0]) & (temp <= comfort_temp[1])
+    in_hum = (hum >= comfort_hum[0]) & (hum <= comfort_hum[1])
+
+    work = pd.DataFrame({
+        'temperatura': temp, 'humedad': hum,
+        'pair': both, 'tx': tx, 'hx': hx, 'txx': tx * tx, 'hxx': hx * hx, 'txh': tx * hx,
+        'confort_total': in_temp & in_hum,
+    })
+    if SENSOR_COL in frame:
+        keys = frame[SENSOR_COL].to_numpy()
+    else:
+        keys = np.full(len(frame), SENSOR_COL, dtype=object)
+    grouped = work.groupby(pd.Categorical(keys), observed=True)
+
+    table = grouped[list(VARIABLES)].agg(['count', 'mean', 'std', 'min', 'max'])
+    table.columns = [f"{var}_{stat}" for var, stat in table.columns]
+
+    # Pearson r from grouped raw moments over rows where both readings exist
+    sums = grouped[['pair', 'tx', 'hx', 'txx', 'hxx', 'txh']].sum()
+    n = sums['pair'].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = sums['txx'] - sums['tx'] ** 2 / n
+        syy = sums['hxx'] - sums['hx'] ** 2 / n
+        sxy = sums['txh'] - sums['tx'] * sums['hx'] / n
+        table['correlacion'] = (sxy / np.sqrt(sxx * syy)).where((sxx > 0) & (syy > 0))
+    table['confort_total_%'] = grouped['confort_total'].mean() * 100
+    table.index.name = SENSOR_COL
+    return table
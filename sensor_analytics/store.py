@@ -0,0 +1,135 @@
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+
+from .config import STORE_DIR
+from .downsample import time_window
+from .ingest import SENSOR_COL, VARIABLES
+from .loader import Dataset
+
+MANIFEST = 'manifest.json'
+# One Parquet file per calendar month ('M'); 'D' gives daily partitions
+PARTITION_FREQ = 'M'
+
+
+def _safe_name(name):
+    return re.sub(r'[^\w.-]+', '_', name).strip('._') or 'dataset'
+
+
+def _timestamp(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+class DatasetStore:
+    """Local time-partitioned Parquet copies of ingested sensor datasets.
+
+    Each dataset lives in ``<root>/<name>/`` as one Parquet file per time
+    partition plus a ``manifest.json`` holding the per-partition time range,
+    row count and min/max of every reading, so a time-range query only opens
+    the partitions it overlaps.
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _dir(self, name):
+        return os.path.join(self.root, _safe_name(name))
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, entry, MANIFEST))
+        )
+
+    def manifest(self, name):
+        with open(os.path.join(self._dir(name), MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+
+    def ingest(self, name, dataset, freq=PARTITION_FREQ):
+        """Write ``dataset`` as partitioned Parquet, replacing any older copy."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame = dataset.frame.sort_index()
+        target = self._dir(name)
+        staging = target + '.tmp'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        partitions = []
+        for period, part in frame.groupby(frame.index.to_period(freq).start_time, sort=True):
+            file_name = f"{period:%Y-%m-%d}.parquet"
+            table = pa.Table.from_pandas(part, preserve_index=True)
+            pq.write_table(table, os.path.join(staging, file_name))
+            partitions.append({
+                'file': file_name,
+                'start': part.index[0].isoformat(),
+                'end': part.index[-1].isoformat(),
+                'rows': len(part),
+                'min': {col: float(part[col].min()) for col in VARIABLES},
+                'max': {col: float(part[col].max()) for col in VARIABLES},
+            })
+
+        manifest = {
+            'name': _safe_name(name),
+            'digest': dataset.digest,
+            'column_mapping': dataset.column_mapping,
+            'rows': len(frame),
+            'sensors': list(dataset.sensors),
+            'start': partitions[0]['start'] if partitions else None,
+            'end': partitions[-1]['end'] if partitions else None,
+            'partitions': partitions,
+        }
+        with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+        return manifest
+
+    def partitions(self, name, start=None, end=None):
+        """Partitions overlapping ``[start, end]`` according to the manifest."""
+        start, end = _timestamp(start), _timestamp(end)
+        selected = []
+        for part in self.manifest(name)['partitions']:
+            if start is not None and pd.Timestamp(part['end']) < start:
+                continue
+            if end is not None and pd.Timestamp(part['start']) > end:
+                continue
+            selected.append(part)
+        return selected
+
+    def read(self, name, start=None, end=None):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        directory = self._dir(name)
+        tables = [
+            pq.read_table(os.path.join(directory, part['file']), memory_map=True)
+            for part in self.partitions(name, start, end)
+        ]
+        if not tables:
+            frame = pd.DataFrame({var: [] for var in VARIABLES}, dtype='float32',
+                                 index=pd.DatetimeIndex([], name='Time'))
+            frame.insert(0, SENSOR_COL, pd.Categorical([]))
+        else:
+            frame = pa.concat_tables(tables).to_pandas()
+        return time_window(frame, _timestamp(start), _timestamp(end))
+
+    def open(self, name, start=None, end=None):
+        """Load a stored dataset, pruned to ``[start, end]``, as a ``Dataset``."""
+        manifest = self.manifest(name)
+        frame = self.read(name, start, end)
+        digest = f"{manifest['digest']}@{_timestamp(start)}..{_timestamp(end)}"
+        dataset = Dataset(digest, frame, manifest['column_mapping'])
+        # Partitions interleave sensors; regrouping them is not a data problem
+        dataset.out_of_order = 0
+        return dataset
+
+    def delete(self, name):
+        shutil.rmtree(self._dir(name), ignore_errors=True)
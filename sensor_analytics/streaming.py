@@ -0,0 +1,315 @@
+import numpy as np
+import pandas as pd
+
+from .ingest import (
+    SENSOR_COL, TIME_COL, VALUE_DTYPE, VARIABLES, _arrow_convert_options, _arrow_parses, _as_buffer,
+    have_pyarrow, mapped_columns, parse_times, sniff_header, to_long,
+)
+
+COMFORT_TEMP = (18, 26)
+COMFORT_HUM = (30, 70)
+# Histogram resolution per variable (°C and % respectively)
+HISTOGRAM_WIDTHS = {'temperatura': 0.5, 'humedad': 1.0}
+# Histogram range per variable; faulty readings beyond it fall in the edge bins
+HISTOGRAM_LIMITS = {'temperatura': (-60.0, 80.0), 'humedad': (0.0, 100.0)}
+CHUNK_ROWS = 500_000
+
+
+def iter_sensor_chunks(source, chunksize=CHUNK_ROWS, engine=None):
+    """Yield long-format (sensor, temperatura, humedad) chunks of the file."""
+    column_mapping, time_format = sniff_header(source)
+    columns = mapped_columns(column_mapping)
+    if engine is None:
+        engine = 'pyarrow' if have_pyarrow() else 'c'
+
+    if engine == 'pyarrow':
+        from pyarrow import csv as pa_csv
+
+        reader = pa_csv.open_csv(
+            _as_buffer(source),
+            # Roughly 30 bytes per row in Grafana exports
+            read_options=pa_csv.ReadOptions(block_size=chunksize * 32),
+            convert_options=_arrow_convert_options(columns, time_format),
+        )
+        chunks = (batch.to_pandas() for batch in reader)
+    else:
+        dtypes = {col: VALUE_DTYPE for col in columns}
+        dtypes[TIME_COL] = object
+        chunks = pd.read_csv(
+            _as_buffer(source),
+            usecols=[TIME_COL, *columns],
+            dtype=dtypes,
+            chunksize=chunksize,
+        )
+
+    for chunk in chunks:
+        times = chunk.pop(TIME_COL)
+        if not (engine == 'pyarrow' and _arrow_parses(time_format)):
+            times = parse_times(times, time_format)
+        yield to_long(chunk, times, column_mapping)
+
+
+class RunningStats:
+    """Count, mean, variance (Welford/Chan merge), min and max of a stream."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        other = RunningStats()
+        other.count = values.size
+        other.mean = values.mean()
+        other.m2 = ((values - other.mean) ** 2).sum()
+        other.min = values.min()
+        other.max = values.max()
+        self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def var(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.var)
+
+
+class PairStats:
+    """Streaming co-moment of two variables over rows where both are present."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+        if x.size == 0:
+            return
+        other = PairStats()
+        other.count = x.size
+        other.mean_x, other.mean_y = x.mean(), y.mean()
+        dx, dy = x - other.mean_x, y - other.mean_y
+        other.m2_x, other.m2_y, other.c_xy = (dx * dx).sum(), (dy * dy).sum(), (dx * dy).sum()
+        self.merge(other)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.count * other.count / count
+        self.m2_x += other.m2_x + dx * dx * weight
+        self.m2_y += other.m2_y + dy * dy * weight
+        self.c_xy += other.c_xy + dx * dy * weight
+        self.mean_x += dx * other.count / count
+        self.mean_y += dy * other.count / count
+        self.count = count
+
+    @property
+    def corr(self):
+        denom = np.sqrt(self.m2_x * self.m2_y)
+        return self.c_xy / denom if denom > 0 else np.nan
+
+
+class StreamingHistogram:
+    """Fixed-width histogram whose bin range grows with the data.
+
+    With ``limits`` the range never grows past ``(low, high)``: values beyond
+    are counted in the first or last bin, so a single outlier such as 1e9
+    cannot allocate billions of empty bins.
+    """
+
+    def __init__(self, width, limits=None):
+        self.width = width
+        self.limits = None
+        if limits is not None:
+            self.limits = (int(np.floor(limits[0] / width)), int(np.floor(limits[1] / width)))
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        if self.limits is not None:
+            # Clip before the division so huge values cannot overflow int64
+            values = np.clip(values, self.limits[0] * self.width, self.limits[1] * self.width)
+        bins = np.floor(values / self.width).astype(np.int64)
+        if self.limits is not None:
+            np.clip(bins, *self.limits, out=bins)
+        lo = int(bins.min())
+        self._add(lo, np.bincount(bins - lo))
+
+    def merge(self, other):
+        if other.counts.size:
+            self._add(other.offset, other.counts)
+
+    def _add(self, lo, counts):
+        if self.counts.size == 0:
+            self.offset, self.counts = lo, counts.astype(np.int64)
+            return
+        start = min(self.offset, lo)
+        stop = max(self.offset + self.counts.size, lo + counts.size)
+        if start != self.offset or stop != self.offset + self.counts.size:
+            grown = np.zeros(stop - start, dtype=np.int64)
+            grown[self.offset - start:self.offset - start + self.counts.size] = self.counts
+            self.offset, self.counts = start, grown
+        self.counts[lo - self.offset:lo - self.offset + counts.size] += counts
+
+    @property
+    def edges(self):
+        return (self.offset + np.arange(self.counts.size + 1)) * self.width
+
+    def quantile(self, q):
+        # Linear interpolation inside the bin holding the q-th observation
+        total = self.counts.sum()
+        if total == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        target = q * total
+        i = int(np.searchsorted(cumulative, target))
+        i = min(i, self.counts.size - 1)
+        before = cumulative[i] - self.counts[i]
+        fraction = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        return self.edges[i] + fraction * self.width
+
+
+class SensorAccumulator:
+    """Fold sensor chunks into every aggregate the dashboard needs."""
+
+    def __init__(self, comfort_temp=COMFORT_TEMP, comfort_hum=COMFORT_HUM):
+        self.comfort_temp = comfort_temp
+        self.comfort_hum = comfort_hum
+        self.rows = 0
+        self.start = None
+        self.end = None
+        self.stats = {var: RunningStats() for var in VARIABLES}
+        self.histograms = {var: StreamingHistogram(HISTOGRAM_WIDTHS[var], HISTOGRAM_LIMITS[var]) for var in VARIABLES}
+        self.pair = PairStats()
+        self.hourly_sums = np.zeros((24, len(VARIABLES)))
+        self.hourly_counts = np.zeros((24, len(VARIABLES)), dtype=np.int64)
+        self.comfort_counts = {'confort_temp': 0, 'confort_hum': 0, 'confort_total': 0}
+
+    def update(self, chunk):
+        if chunk.empty:
+            return self
+        self.rows += len(chunk)
+        first, last = chunk.index.min(), chunk.index.max()
+        self.start = first if self.start is None else min(self.start, first)
+        self.end = last if self.end is None else max(self.end, last)
+
+        hours = chunk.index.hour.to_numpy()
+        columns = {}
+        for i, var in enumerate(VARIABLES):
+            values = chunk[var].to_numpy(dtype=np.float64)
+            columns[var] = values
+            self.stats[var].update(values)
+            self.histograms[var].update(values)
+            valid = np.isfinite(values)
+            self.hourly_sums[:, i] += np.bincount(hours[valid], weights=values[valid], minlength=24)
+            self.hourly_counts[:, i] += np.bincount(hours[valid], minlength=24)
+
+        temp, hum = columns['temperatura'], columns['humedad']
+        self.pair.update(temp, hum)
+
+        confort_temp = (temp >= self.comfort_temp[0]) & (temp <= self.comfort_temp[1])
+        confort_hum = (hum >= self.comfort_hum[0]) & (hum <= self.comfort_hum[1])
+        self.comfort_counts['confort_temp'] += int(confort_temp.sum())
+        self.comfort_counts['confort_hum'] += int(confort_hum.sum())
+        self.comfort_counts['confort_total'] += int((confort_temp & confort_hum).sum())
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for bound, pick in (('start', min), ('end', max)):
+            ours, theirs = getattr(self, bound), getattr(other, bound)
+            setattr(self, bound, theirs if ours is None else ours if theirs is None else pick(ours, theirs))
+        for var in VARIABLES:
+            self.stats[var].merge(other.stats[var])
+            self.histograms[var].merge(other.histograms[var])
+        self.pair.merge(other.pair)
+        self.hourly_sums += other.hourly_sums
+        self.hourly_counts += other.hourly_counts
+        for key in self.comfort_counts:
+            self.comfort_counts[key] += other.comfort_counts[key]
+        return self
+
+    def describe(self, var):
+        # Same layout as Series.describe(); quantiles come from the histogram
+        stats, histogram = self.stats[var], self.histograms[var]
+        return pd.Series({
+            'count': stats.count,
+            'mean': stats.mean,
+            'std': stats.std,
+            'min': stats.min,
+            '25%': histogram.quantile(0.25),
+            '50%': histogram.quantile(0.50),
+            '75%': histogram.quantile(0.75),
+            'max': stats.max,
+        }, name=var)
+
+    @property
+    def correlation(self):
+        return self.pair.corr
+
+    def hourly_mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.hourly_sums / self.hourly_counts
+        hourly = pd.DataFrame(means, columns=list(VARIABLES))
+        hourly.index.name = 'hora'
+        return hourly[self.hourly_counts.sum(axis=1) > 0]
+
+    def comfort_percentages(self):
+        if self.rows == 0:
+            return {key: np.nan for key in self.comfort_counts}
+        return {key: count / self.rows * 100 for key, count in self.comfort_counts.items()}
+
+    def histogram_frame(self, var):
+        histogram = self.histograms[var]
+        edges = histogram.edges
+        return pd.DataFrame({
+            var: (edges[:-1] + edges[1:]) / 2,
+            'count': histogram.counts,
+        })
+
+
+def stream_sensor_csv(source, chunksize=CHUNK_ROWS, engine=None, **comfort):
+    """Aggregate a CSV export chunk by chunk into one accumulator per sensor.
+
+    ``source`` may be a path, so files larger than memory never have to be
+    uploaded whole.
+    """
+    accumulators = {}
+    for chunk in iter_sensor_chunks(source, chunksize=chunksize, engine=engine):
+        for sensor, group in chunk.groupby(SENSOR_COL, observed=True, sort=False):
+            if sensor not in accumulators:
+                accumulators[sensor] = SensorAccumulator(**comfort)
+            accumulators[sensor].update(group)
+    return accumulators
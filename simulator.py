@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from sensor_analytics.ingest import TIME_COL
+
+
+def synthetic_readings(sensors, when, rng):
+    """One reading per sensor at ``when``: a daily cycle plus noise per node."""
+    hour = when.hour + when.minute / 60 + when.second / 3600
+    phase = np.sin((hour - 9) / 24 * 2 * np.pi)
+    for i, sensor in enumerate(sensors):
+        temp = 22 + 0.7 * i + 4 * phase + rng.normal(0, 0.4)
+        hum = 60 - 2 * i - 10 * phase + rng.normal(0, 1.5)
+        # Occasional spike, so anomaly views have something to show
+        if rng.random() < 0.002:
+            temp += 10
+        yield sensor, round(float(temp), 2), round(float(hum), 2)
+
+
+class _Writer:
+    def __init__(self, target, fmt, sensors):
+        self.fmt = fmt
+        self.sensors = sensors
+        self.sock = None
+        if target.startswith(('udp://', 'tcp://')):
+            protocol, address = target.split('://', 1)
+            host, _, port = address.rpartition(':')
+            kind = socket.SOCK_DGRAM if protocol == 'udp' else socket.SOCK_STREAM
+            self.sock = socket.socket(socket.AF_INET, kind)
+            self.sock.connect((host or '127.0.0.1', int(port)))
+            self.file = None
+        else:
+            new = not os.path.exists(target) or os.path.getsize(target) == 0
+            self.file = open(target, 'a', encoding='utf-8')
+            if new and fmt == 'csv':
+                # Grafana-style wide header: one column pair per sensor
+                columns = [f"{var} {sensor}" for sensor in sensors for var in ('temperatura', 'humedad')]
+                self.file.write(','.join([TIME_COL, *columns]) + '\n')
+
+    def write(self, when, readings):
+        stamp = when.isoformat(sep=' ', timespec='seconds')
+        if self.file is not None and self.fmt == 'csv':
+            values = [str(v) for _, temp, hum in readings for v in (temp, hum)]
+            lines = [','.join([stamp, *values])]
+        elif self.fmt == 'csv':
+            lines = [f"{stamp},{sensor},{temp},{hum}" for sensor, temp, hum in readings]
+        else:
+            lines = [json.dumps({'time': stamp, 'sensor': sensor, 'temperatura': temp, 'humedad': hum})
+                     for sensor, temp, hum in readings]
+        payload = ''.join(line + '\n' for line in lines)
+        if self.sock is not None:
+            self.sock.sendall(payload.encode('utf-8'))
+        else:
+            self.file.write(payload)
+            self.file.flush()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        else:
+            self.file.close()
+
+
+def simulate(target, sensors=('nodo1',), rate=1.0, count=None, fmt='jsonl', step=None, seed=0):
+    """Emit synthetic ESP32 readings to a file or ``udp://``/``tcp://`` address.
+
+    ``rate`` is batches per second (one reading per sensor each). Timestamps
+    follow the wall clock unless ``step`` (seconds) is given, which lets a
+    fast simulation cover several days of data.
+    """
+    rng = np.random.default_rng(seed)
+    writer = _Writer(target, fmt, list(sensors))
+    when = pd.Timestamp.now().floor('s')
+    sent = 0
+    try:
+        while count is None or sent < count:
+            if step is None:
+                when = pd.Timestamp.now().floor('s')
+            writer.write(when, list(synthetic_readings(sensors, when, rng)))
+            sent += 1
+            if step is not None:
+                when += pd.Timedelta(seconds=step)
+            if rate:
+                time.sleep(1 / rate)
+    finally:
+        writer.close()
+    return sent
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulador de sensores ESP32 para el modo en vivo")
+    parser.add_argument('target', help="archivo .csv/.jsonl, udp://host:puerto o tcp://host:puerto")
+    parser.add_argument('--sensors', type=int, default=1, help="número de nodos")
+    parser.add_argument('--rate', type=float, default=1.0, help="lotes por segundo (0 = sin pausa)")
+    parser.add_argument('--count', type=int, default=None, help="lotes a emitir (por defecto, sin fin)")
+    parser.add_argument('--step', type=float, default=None, help="segundos simulados entre lotes")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default=None)
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.target.lower().endswith('.csv') else 'jsonl')
+    names = [f"nodo{i + 1}" for i in range(args.sensors)]
+    try:
+        simulate(args.target, names, args.rate, args.count, fmt, args.step)
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from sensor_analytics.analysis import analyze, stream_report
+
+CSV = ''.join(
+    ['Time,nodo1 temperatura,nodo1 humedad,nodo2 temperatura,nodo2 humedad\n']
+    + [f'2024-01-01 {h:02d}:{m:02d}:00,{20 + h / 10:.1f},{60 - h / 5:.1f},{25 - m / 100:.2f},{70 + m / 10:.1f}\n'
+       for h in range(24) for m in range(0, 60, 5)]
+).encode()
+
+
+def test_headless_report_per_sensor(tmp_path):
+    reports = analyze(CSV)
+    assert sorted(reports) == ['nodo1', 'nodo2']
+    assert reports['nodo1']['rows'] == 24 * 12
+    assert np.isclose(reports['nodo1']['temperatura_max'], 22.3)
+
+    path = tmp_path / 'datos.csv'
+    path.write_bytes(CSV)
+    streamed = stream_report(str(path), chunksize=50)
+    for sensor, report in reports.items():
+        for key in ('rows', 'temperatura_mean', 'humedad_std', 'correlacion', 'confort_total_%'):
+            assert np.isclose(streamed[sensor][key], report[key], equal_nan=True), key
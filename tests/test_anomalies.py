@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.anomalies import AnomalyEngine, detect_anomalies
+
+
+def readings(n=2000, spikes=(500, 1500)):
+    rng = np.random.default_rng(1)
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', name='Time', unit='us')
+    temp = rng.normal(20, 0.2, n)
+    temp[list(spikes)] += 10
+    return pd.DataFrame({'temperatura': temp, 'humedad': rng.normal(60, 1, n)}, index=index)
+
+
+@pytest.mark.parametrize('detector', ['rolling_z', 'rolling_mad'])
+def test_batches_match_one_pass(detector):
+    frame = readings()
+    whole = detect_anomalies(frame, detector)
+    engine = AnomalyEngine(detector)
+    for lo in range(0, len(frame), 300):
+        engine.update(frame.iloc[lo:lo + 300])
+    for var in ('temperatura', 'humedad'):
+        np.testing.assert_array_equal(engine.intervals[var].events, whole.intervals[var].events)
+
+
+def test_out_of_order_batch_drops_late_readings():
+    frame = readings()
+    engine = AnomalyEngine('rolling_mad')
+    engine.update(frame.iloc[:1000])
+    # A second batch reaching back before the carried tail, unsorted
+    late = frame.iloc[990:1600].sample(frac=1, random_state=0)
+    engine.update(late)
+    assert engine.late == 10
+    assert engine.rows == 1600
+    starts = engine.intervals['temperatura'].frame()['inicio']
+    assert pd.Timestamp(frame.index[1500]) in set(starts)
+    # Entirely stale batches are ignored
+    engine.update(frame.iloc[:5])
+    assert engine.late == 15
+
+
+def test_seasonal_baseline_uses_the_local_hour():
+    # Half-hour offset: UTC hours straddle two local hours
+    index = pd.date_range('2024-01-01', periods=20 * 96, freq='15min', name='Time', tz='Asia/Kolkata')
+    noise = 0.1 * (-1.0) ** np.arange(len(index))
+    temp = np.where(index.hour == 15, 30.0, 20.0) + noise
+    spike = index.get_loc(pd.Timestamp('2024-01-10 14:45', tz='Asia/Kolkata'))
+    temp[spike] = 30.0
+    frame = pd.DataFrame({'temperatura': temp, 'humedad': 60 + noise}, index=index)
+    events = detect_anomalies(frame, 'seasonal').intervals['temperatura'].frame()
+    assert list(events['inicio']) == [index[spike]]
+    assert events['inicio'].dt.tz == index.tz
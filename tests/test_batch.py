@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from sensor_analytics.batch import find_csv_files, run_batch
+
+
+def write_export(path, sensors, n=500):
+    rng = np.random.default_rng(6)
+    frame = pd.DataFrame({'Time': pd.date_range('2024-01-01', periods=n, freq='1min')})
+    for sensor in sensors:
+        frame[f'temperatura {sensor}'] = rng.normal(20, 2, n).round(1)
+        frame[f'humedad {sensor}'] = rng.normal(60, 5, n).round(1)
+    frame.to_csv(path, index=False)
+
+
+def test_run_consolidates_two_files(tmp_path):
+    write_export(tmp_path / 'planta.csv', ['nodo1', 'nodo2'])
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'roto.csv').write_text('Time,presion\n2024-01-01 00:00:00,1013\n')
+    files = find_csv_files([str(tmp_path)])
+    assert [f.rsplit('/', 1)[-1] for f in files] == ['planta.csv', 'roto.csv']
+
+    table = run_batch(files, workers=2)
+    assert list(table['archivo']) == [files[0], files[0], files[1]]
+    assert list(table['sensor'].iloc[:2]) == ['nodo1', 'nodo2']
+    assert table['error'].iloc[:2].isna().all() and table['error'].iloc[2]
+    # A tiny memory budget streams the same file instead of loading it
+    streamed = run_batch(files[:1], workers=1, max_bytes=1)
+    assert (streamed['modo'] == 'streaming').all()
+    np.testing.assert_allclose(streamed['temperatura_mean'], table['temperatura_mean'].iloc[:2])
+    assert list(streamed['rows']) == list(table['rows'].iloc[:2])
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.background import TaskCache
+from sensor_analytics.loader import Dataset, DatasetCache
+
+MAPPING = {'sensor': {'temperatura': 'temperatura', 'humedad': 'humedad'}}
+
+
+def dataset(digest, n=10_000):
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', name='Time')
+    frame = pd.DataFrame({'temperatura': np.zeros(n, np.float32), 'humedad': np.zeros(n, np.float32)},
+                         index=index)
+    return Dataset(digest, frame, MAPPING)
+
+
+def finished(tasks, key, nbytes):
+    future = tasks.submit(key, np.ones, nbytes // 8)
+    future.result()
+    return future
+
+
+def test_task_results_are_charged_to_the_dataset_budget():
+    tasks = TaskCache(max_workers=1)
+    size = dataset('a').resident_bytes()
+    cache = DatasetCache(max_bytes=3 * size, tasks=tasks)
+    cache.get_or_build('a', lambda: dataset('a'))
+    finished(tasks, ('a', 'big'), 2 * size)
+    cache.get_or_build('b', lambda: dataset('b'))
+    # Two datasets and the result of 'a' exceed the budget: 'a' goes with it
+    assert 'a' not in cache and 'b' in cache
+    assert len(tasks) == 0
+
+
+def test_oldest_results_trimmed_when_datasets_fill_the_budget():
+    tasks = TaskCache(max_workers=1)
+    size = dataset('a').resident_bytes()
+    cache = DatasetCache(max_bytes=2 * size, tasks=tasks)
+    cache.get_or_build('a', lambda: dataset('a'))
+    finished(tasks, ('a', 'old'), size // 2)
+    finished(tasks, ('a', 'new'), size // 2)
+    finished(tasks, ('a', 'newest'), size // 2)
+    cache.get_or_build('a', lambda: dataset('a'))
+    assert tasks.nbytes <= size
+    assert ('a', 'old') not in tasks and ('a', 'newest') in tasks
+
+
+class Upload:
+    def __init__(self, file_id, data):
+        self.file_id, self.data = file_id, data
+
+    def getvalue(self):
+        return self.data
+
+
+def test_aliases_follow_the_entries():
+    data = b'Time,temperatura,humedad\n2024-01-01 00:00:00,20,50\n2024-01-01 00:01:00,21,51\n'
+    cache = DatasetCache(max_entries=1)
+    for i in range(20):
+        cache.load(Upload(f'id{i}', data))
+    assert len(cache._aliases) <= 4
+    cache.load(Upload('other', data.replace(b'20,50', b'22,50')))
+    assert list(cache._aliases) == ['other']
+
+
+def two_sensor_dataset(digest, n=10_000):
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', name='Time')
+    frame = pd.DataFrame({
+        'sensor': pd.Categorical(np.repeat(['nodo1', 'nodo2'], n // 2)),
+        'temperatura': np.zeros(n, np.float32), 'humedad': np.zeros(n, np.float32),
+    }, index=index.sort_values())
+    return Dataset(digest, frame, {})
+
+
+def test_sensor_view_tasks_go_with_their_dataset():
+    tasks = TaskCache(max_workers=1)
+    cache = DatasetCache(max_entries=1, tasks=tasks)
+    parent = cache.get_or_build('a', lambda: two_sensor_dataset('a'))
+    view = parent.for_sensor('nodo1')
+    finished(tasks, (view.digest, 'dispersion'), 8_000_000)
+    cache.get_or_build('b', lambda: dataset('b'))
+    assert 'a' not in cache
+    assert len(tasks) == 0
+
+
+def test_stored_range_tasks_go_with_their_dataset(tmp_path):
+    from sensor_analytics.store import DatasetStore
+
+    store = DatasetStore(str(tmp_path))
+    store.ingest('datos', dataset('raw'))
+    tasks = TaskCache(max_workers=1)
+    cache = DatasetCache(max_entries=1, tasks=tasks)
+    start, end = '2024-01-02', '2024-01-03'
+    stored = cache.get_or_build(f'store:datos:raw:{start}..{end}', lambda: store.open('datos', start, end))
+    assert stored.digest != f'store:datos:raw:{start}..{end}'
+    finished(tasks, (stored.digest, 'anomalias'), 8_000_000)
+    finished(tasks, (stored.for_sensor(stored.sensors[0]).digest, 'confort'), 8_000_000)
+    cache.get_or_build('b', lambda: dataset('b'))
+    assert len(tasks) == 0
+
+
+def test_failed_tasks_are_resubmitted():
+    tasks = TaskCache(max_workers=1)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("disco lleno")
+        return 'ok'
+
+    failed = tasks.submit(('a', 'figura'), flaky)
+    with pytest.raises(OSError):
+        failed.result()
+    retried = tasks.submit(('a', 'figura'), flaky)
+    assert retried is not failed and retried.result() == 'ok'
+    # A finished result is shared, not recomputed
+    assert tasks.submit(('a', 'figura'), flaky) is retried
+    assert len(attempts) == 2
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from sensor_analytics.comfort import ZONE_SETS, bucket_starts, comfort_report
+from sensor_analytics.loader import COMFORT_REPORTS, Dataset
+
+
+def readings(n=60 * 24 * 30, freq='1min', start='2024-01-03'):
+    rng = np.random.default_rng(2)
+    index = pd.date_range(start, periods=n, freq=freq, name='Time', unit='us')
+    return pd.DataFrame({
+        'temperatura': rng.normal(24, 4, n).astype(np.float32),
+        'humedad': rng.normal(65, 12, n).astype(np.float32),
+    }, index=index)
+
+
+def test_weeks_start_on_monday():
+    frame = readings()
+    report = comfort_report(frame, freq='W-MON')
+    assert (report.buckets.dayofweek == 0).all()
+    assert report.buckets[0] == pd.Timestamp('2024-01-01')
+    weeks = frame.groupby(bucket_starts(frame.index, 'W-MON')).size()
+    np.testing.assert_array_equal(report.rows, weeks.to_numpy())
+
+
+def test_zone_chart_merges_buckets():
+    frame = readings()
+    report = comfort_report(frame, freq='1h')
+    merged = report.zone_frame(ZONE_SETS[0].name, max_buckets=100)
+    assert len(report.buckets) == 30 * 24 and len(merged) <= 100
+    assert merged.index[0] == report.buckets[0]
+    np.testing.assert_array_equal(merged.to_numpy().sum(axis=0),
+                                  report.zone_totals(ZONE_SETS[0].name).to_numpy())
+    shares = report.zone_frame(ZONE_SETS[0].name, percent=True, max_buckets=100)
+    np.testing.assert_allclose(shares.sum(axis=1), 100)
+
+
+def test_dataset_keeps_few_comfort_reports():
+    dataset = Dataset('abc', readings(n=1000), {'sensor': {}})
+    for low in range(18, 24):
+        dataset.comfort(comfort_temp=(low, 26))
+    kept = [key for key in dataset._views if key[0] == 'comfort']
+    assert len(kept) == COMFORT_REPORTS
+    assert kept[-1][2] == (23, 26)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.compact import INT16_LIMIT, PackedFrame, PackedTimes, PackedValues
+from sensor_analytics.loader import Dataset
+
+
+def long_frame(n=500, unit='us', tz=None, regular=True):
+    rng = np.random.default_rng(4)
+    if regular:
+        index = pd.date_range('2024-03-01', periods=n, freq='30s', unit=unit, tz=tz, name='Time')
+    else:
+        offsets = np.sort(rng.integers(0, 10**9, n)) * 1000
+        index = pd.DatetimeIndex(pd.Timestamp('2024-03-01', tz=tz).as_unit(unit) + pd.to_timedelta(offsets, 'ns'),
+                                 name='Time').as_unit(unit)
+    temp = np.round(rng.normal(20, 5, n), 2).astype(np.float32)
+    temp[::50] = np.nan
+    return pd.DataFrame({
+        'sensor': pd.Categorical(rng.choice(['nodo1', 'nodo2'], n)),
+        'temperatura': temp,
+        'humedad': np.round(rng.uniform(30, 90, n), 1).astype(np.float32),
+    }, index=index)
+
+
+@pytest.mark.parametrize('unit, tz, regular', [
+    ('us', None, True), ('ns', None, False), ('us', 'UTC-05:00', False), ('s', None, True),
+])
+def test_frame_round_trip(unit, tz, regular):
+    frame = long_frame(unit=unit, tz=tz, regular=regular)
+    decoded = PackedFrame(frame).to_frame()
+    pd.testing.assert_index_equal(decoded.index, frame.index)
+    # Decoded frames carry no freq, like frames parsed from CSV
+    pd.testing.assert_frame_equal(decoded, frame, check_freq=False)
+
+
+def test_values_out_of_range_stay_float32():
+    values = np.array([1.5, np.nan, INT16_LIMIT + 1], dtype=np.float32)
+    packed = PackedValues.encode(values)
+    assert packed.data.dtype == np.float32
+    np.testing.assert_array_equal(packed.decode(), values)
+
+
+def test_times_slice_without_decoding_all():
+    index = long_frame(regular=False).index
+    packed = PackedTimes.encode(index)
+    assert packed.offsets.dtype == np.int32
+    pd.testing.assert_index_equal(packed[100:200].decode(), index[100:200])
+
+
+def test_compact_dataset_matches_the_frame():
+    frame = long_frame().sort_values('sensor', kind='stable')
+    dataset = Dataset('abc', frame, {})
+    sensors = {sensor: dataset.for_sensor(sensor).frame for sensor in dataset.sensors}
+    dataset.compact()
+    # int16 values, int32 time offsets and int8 sensor codes
+    assert dataset.nbytes == 500 * (2 + 2 + 4 + 1)
+    for sensor, expected in sensors.items():
+        pd.testing.assert_frame_equal(dataset.for_sensor(sensor).frame, expected, check_freq=False)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.downsample import downsample_series, lttb_indices, minmax_indices, time_window
+
+
+def series(n=10_000, unit='us'):
+    rng = np.random.default_rng(3)
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', name='Time', unit=unit)
+    return pd.Series(np.cumsum(rng.normal(0, 1, n)), index=index, name='temperatura')
+
+
+@pytest.mark.parametrize('n_out', [3, 100, 2000])
+def test_lttb_keeps_the_ends_and_exactly_n_points(n_out):
+    data = series()
+    kept = lttb_indices(data.index.values, data.to_numpy(), n_out)
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == len(data) - 1
+    assert (np.diff(kept) > 0).all()
+    assert len(downsample_series(data, n_out)) == n_out
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    values = series(n=1000).to_numpy()
+    kept = set(minmax_indices(values, 20))
+    for bucket in np.array_split(np.arange(1000), 10):
+        assert bucket[np.argmin(values[bucket])] in kept
+        assert bucket[np.argmax(values[bucket])] in kept
+    assert {0, 999} <= kept
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2024-01-02 03:00', '2024-01-03 12:30:30'),
+    (None, '2024-01-02'),
+    ('2024-01-05', None),
+    ('2024-01-03', '2024-01-02'),
+    # Nanosecond end of day against microsecond data
+    (None, pd.Timestamp('2024-01-02') - pd.Timedelta(1, 'ns')),
+])
+@pytest.mark.parametrize('shuffled', [False, True])
+def test_time_window_matches_a_boolean_slice(start, end, shuffled):
+    data = series()
+    if shuffled:
+        data = data.sample(frac=1, random_state=0)
+    mask = np.ones(len(data), dtype=bool)
+    if start is not None:
+        mask &= data.index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= data.index <= pd.Timestamp(end)
+    pd.testing.assert_series_equal(time_window(data, start, end), data[mask])
@@ -0,0 +1,35 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.export import available_formats, export_file, export_rows
+
+
+@pytest.fixture
+def frame():
+    index = pd.date_range('2024-01-01', periods=1000, freq='1min', name='Time')
+    return pd.DataFrame({'temperatura': np.arange(1000, dtype=np.float32) / 10,
+                         'humedad': np.full(1000, 55.5, dtype=np.float32)}, index=index)
+
+
+@pytest.mark.parametrize('fmt', available_formats())
+def test_file_export_matches_spooled_export(frame, fmt):
+    positions = np.arange(999, 0, -3)
+    exported = export_file(frame, positions, fmt, chunk_rows=100)
+    # st.download_button reads open binary files itself
+    assert isinstance(exported, io.BufferedReader)
+    data = exported.read()
+    exported.close()
+    expected = export_rows(frame, positions, fmt, chunk_rows=100).read()
+    if fmt == 'csv.gz':
+        data, expected = gzip.decompress(data), gzip.decompress(expected)
+    if fmt == 'parquet':
+        back = pd.read_parquet(io.BytesIO(data))
+        pd.testing.assert_frame_equal(back, frame.iloc[np.sort(positions)], check_freq=False)
+    else:
+        assert data == expected
+        back = pd.read_csv(io.BytesIO(data), index_col='Time', parse_dates=True)
+        assert len(back) == len(positions)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from sensor_analytics.filters import SortedIndex, page_count, paginate
+
+
+def readings(n=1000):
+    rng = np.random.default_rng(4)
+    values = np.round(rng.normal(20, 3, n), 1)
+    values[rng.choice(n, 50, replace=False)] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('lower, upper', [
+    (18.0, 22.0),
+    (None, 20.0),
+    (21.5, None),
+    (None, None),
+    # Bounds equal to the extremes exclude them
+    ('min', 'max'),
+    # Empty and reversed ranges
+    (20.0, 20.0),
+    (25.0, 15.0),
+    (100.0, None),
+])
+def test_range_queries_match_a_boolean_mask(lower, upper):
+    values = readings()
+    lower = np.nanmin(values) if lower == 'min' else lower
+    upper = np.nanmax(values) if upper == 'max' else upper
+    mask = ~np.isnan(values)
+    if lower is not None:
+        mask &= values > lower
+    if upper is not None:
+        mask &= values < upper
+    index = SortedIndex(values)
+    positions = index.positions(lower, upper)
+    np.testing.assert_array_equal(np.sort(positions), np.flatnonzero(mask))
+    assert index.count(lower, upper) == mask.sum()
+
+
+@pytest.mark.parametrize('n_rows', [0, 1, 99, 100, 101, 250])
+def test_pages_cover_the_result_in_time_order(n_rows):
+    positions = np.random.default_rng(5).permutation(10 * n_rows)[:n_rows]
+    pages = [paginate(positions, page) for page in range(1, page_count(n_rows) + 1)]
+    assert page_count(n_rows) == max(1, -(-n_rows // 100))
+    assert all(len(page) == 100 for page in pages[:-1])
+    np.testing.assert_array_equal(np.concatenate(pages), np.sort(positions))
+    assert len(paginate(positions, page_count(n_rows) + 1)) == 0
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from sensor_analytics.ingest import read_sensor_csv
+from sensor_analytics.streaming import iter_sensor_chunks
+
+pytest.importorskip('pyarrow')
+
+FILES = {
+    'iso': (
+        'Time,ESP32 temperatura,ESP32 humedad\n'
+        '2024-01-01 00:00:00,20.1,50\n'
+        '2024-01-01 00:01:00,20.2,51.5\n'
+    ),
+    'offset': (
+        'Time,ESP32 temperatura,ESP32 humedad\n'
+        '2024-01-01T15:00:00-05:00,20.1,50\n'
+        '2024-01-01T16:30:00-05:00,21.1,51\n'
+    ),
+    'day_first': (
+        'Time,nodo1 temperatura,nodo1 humedad,nodo2 temperatura,nodo2 humedad\n'
+        '31/01/2024 10:00:00,20.1,50,19.5,\n'
+        '31/01/2024 10:05:00,20.3,49,19.6,48\n'
+    ),
+}
+
+
+@pytest.mark.parametrize('name', sorted(FILES))
+def test_engines_agree(name):
+    data = FILES[name].encode()
+    c_frame, c_mapping = read_sensor_csv(data, engine='c')
+    arrow_frame, arrow_mapping = read_sensor_csv(data, engine='pyarrow')
+    assert c_mapping == arrow_mapping
+    # Units may differ between engines; the instants and wall time may not
+    assert c_frame.index.tz == arrow_frame.index.tz
+    assert (c_frame.index == arrow_frame.index).all()
+    assert (c_frame.index.hour == arrow_frame.index.hour).all()
+    assert list(c_frame.columns) == list(arrow_frame.columns)
+    for col in ('temperatura', 'humedad'):
+        np.testing.assert_array_equal(c_frame[col].to_numpy(), arrow_frame[col].to_numpy())
+
+
+@pytest.mark.parametrize('name', sorted(FILES))
+def test_streaming_engines_agree(name):
+    data = FILES[name].encode()
+    c_chunk, = iter_sensor_chunks(data, engine='c')
+    arrow_chunk, = iter_sensor_chunks(data, engine='pyarrow')
+    assert (c_chunk.index == arrow_chunk.index).all()
+    assert (c_chunk.index.hour == arrow_chunk.index.hour).all()
+    np.testing.assert_array_equal(c_chunk['temperatura'].to_numpy(), arrow_chunk['temperatura'].to_numpy())
@@ -0,0 +1,42 @@
+import tracemalloc
+
+import numpy as np
+
+from sensor_analytics.instrument import Profiler, attach, stage
+
+
+def test_tracing_is_shared_between_profilers():
+    first, second = Profiler(memory=True), Profiler(memory=True)
+    first.trace()
+    second.trace()
+    first.finish()
+    assert tracemalloc.is_tracing()
+    second.finish()
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_peaks_do_not_reset_the_tracer():
+    other = Profiler(memory=True)
+    other.trace()
+    profiler = attach(Profiler(memory=True))
+    try:
+        with stage('big'):
+            data = np.ones(4_000_000)
+            del data
+        with stage('small'):
+            data = np.ones(1000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        attach(None)
+        profiler.finish()
+    assert peak >= 32_000_000
+    assert profiler.stages['big'].peak_bytes >= 32_000_000
+    assert profiler.stages['small'].peak_bytes < 1_000_000
+    assert tracemalloc.is_tracing()
+    other.finish()
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_collected_without_finish_stops_tracing():
+    Profiler(memory=True).trace()
+    assert not tracemalloc.is_tracing()
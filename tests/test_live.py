@@ -0,0 +1,82 @@
+import gc
+import socket
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.live import FileTailer, LiveSubscription, RingBuffer, parse_lines
+
+
+def batch(start, n, sensor='nodo1'):
+    index = pd.date_range(start, periods=n, freq='1min', name='Time')
+    return pd.DataFrame({
+        'sensor': pd.Categorical([sensor] * n),
+        'temperatura': np.arange(n, dtype=np.float32),
+        'humedad': np.full(n, 50, dtype=np.float32),
+    }, index=index)
+
+
+def test_ring_buffer_keeps_the_latest_in_order():
+    ring = RingBuffer(capacity=10)
+    ring.append(batch('2024-01-01 00:00', 6))
+    ring.append(batch('2024-01-01 00:06', 7, sensor='nodo2'))
+    frame = ring.frame()
+    assert len(ring) == 10 and ring.total == 13
+    assert frame.index.is_monotonic_increasing
+    assert frame.index[0] == pd.Timestamp('2024-01-01 00:03')
+    assert list(frame['sensor'].value_counts().sort_index()) == [3, 7]
+    # A batch larger than the buffer keeps only its tail
+    ring.append(batch('2024-01-02', 25))
+    assert ring.frame().index[0] == pd.Timestamp('2024-01-02 00:15')
+
+
+def test_parse_lines_accepts_json_and_csv():
+    frame = parse_lines([
+        '{"time": "2024-01-01T00:00:00", "sensor": "nodo1", "temperatura": 20.5, "humedad": 50}',
+        '{"timestamp": "2024-01-01T00:01:00", "temperatura": 21}',
+        '2024-01-01 00:02:00,nodo2,22.5,55',
+        '2024-01-01 00:03:00,23.0,',
+        'no es una lectura',
+        '{"time": "mañana", "temperatura": 1, "humedad": 2}',
+        '',
+    ])
+    assert list(frame['sensor']) == ['nodo1', 'sensor', 'nodo2', 'sensor']
+    np.testing.assert_array_equal(frame['temperatura'], [20.5, 21, 22.5, 23])
+    assert np.isnan(frame['humedad'].iloc[1]) and np.isnan(frame['humedad'].iloc[3])
+
+
+def test_file_tailer_reads_only_new_complete_lines(tmp_path):
+    path = tmp_path / 'lecturas.csv'
+    path.write_bytes(b'Time,temperatura nodo1,humedad nodo1\n2024-01-01 00:00:00,20,50\n')
+    tailer = FileTailer(str(path))
+    assert len(tailer.poll()) == 1
+    with open(path, 'ab') as f:
+        f.write(b'2024-01-01 00:01:00,21,51\n2024-01-01 00:02')
+    assert list(tailer.poll()['temperatura']) == [21]
+    with open(path, 'ab') as f:
+        f.write(b':00,22,52\n')
+    assert list(tailer.poll()['temperatura']) == [22]
+    assert tailer.poll().empty
+    # Truncated (rotated) files are followed from the start
+    path.write_bytes(b'Time,temperatura nodo1,humedad nodo1\n2024-01-02 00:00:00,30,60\n')
+    assert list(tailer.poll()['temperatura']) == [30]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.parametrize('protocol', ['tcp', 'udp'])
+def test_listener_is_shared_and_freed_with_the_last_session(protocol):
+    spec = f'{protocol}://127.0.0.1:{free_port()}'
+    first, second = LiveSubscription(spec), LiveSubscription(spec)
+    assert first.session is second.session
+    first.close()
+    del second
+    gc.collect()
+    # The port is free again: a reloaded page can listen on it
+    third = LiveSubscription(spec)
+    third.close()
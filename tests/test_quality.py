@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.quality import assess, clean_order, regularize
+
+
+def sensor_frame(times, sensors=None, tz=None):
+    index = pd.DatetimeIndex(pd.to_datetime(times), name='Time')
+    if tz is not None:
+        index = index.tz_localize(tz)
+    n = len(index)
+    return pd.DataFrame({
+        'sensor': pd.Categorical(sensors or ['nodo1'] * n),
+        'temperatura': np.arange(n, dtype=np.float32),
+        'humedad': np.full(n, 50, dtype=np.float32),
+    }, index=index)
+
+
+def test_clean_order_sorts_and_drops_duplicates():
+    frame = sensor_frame(
+        ['2024-01-01 00:02', '2024-01-01 00:00', '2024-01-01 00:01', '2024-01-01 00:01', '2024-01-01 00:00'],
+        ['nodo1', 'nodo1', 'nodo1', 'nodo1', 'nodo2'],
+    )
+    cleaned, out_of_order, duplicates = clean_order(frame)
+    assert (out_of_order, duplicates) == (1, 1)
+    assert list(cleaned['sensor']) == ['nodo1', 'nodo1', 'nodo1', 'nodo2']
+    assert list(cleaned.index.minute) == [0, 1, 2, 0]
+    # Clean frames come back untouched
+    assert clean_order(cleaned)[0] is cleaned
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC-05:00'])
+def test_assess_finds_gaps_and_coverage(tz):
+    times = list(pd.date_range('2024-01-01 15:00', periods=10, freq='1min'))
+    times += list(pd.date_range('2024-01-01 15:30', periods=10, freq='1min'))
+    frame = sensor_frame(times, tz=tz)
+    frame.iloc[:5, frame.columns.get_loc('humedad')] = np.nan
+    report = assess(frame)
+    assert report.interval == pd.Timedelta('1min')
+    assert report.expected == 40 and report.gap_count == 1
+    assert report.coverage['temperatura'] == pytest.approx(50) and report.coverage['humedad'] == pytest.approx(37.5)
+    gaps = report.gaps_frame()
+    # Gap bounds read in the data's own offset
+    assert gaps['inicio'].iloc[0] == frame.index[9] and gaps['fin'].iloc[0] == frame.index[10]
+    assert gaps['duración'].iloc[0] == pd.Timedelta('21min')
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC-05:00'])
+def test_regularize_averages_slots_on_wall_time(tz):
+    frame = sensor_frame(['2024-01-01 15:00:10', '2024-01-01 15:00:50', '2024-01-01 15:03:00'], tz=tz)
+    grid = regularize(frame, '1min')
+    assert grid.index.tz == frame.index.tz
+    assert grid.index[0] == pd.Timestamp('2024-01-01 15:00', tz=tz)
+    assert list(grid.index.hour) == [15] * 4
+    np.testing.assert_array_equal(grid['temperatura'], [0.5, np.nan, np.nan, 2])
+    filled = regularize(frame, '1min', fill='linear')
+    np.testing.assert_allclose(filled['temperatura'], [0.5, 1, 1.5, 2])
+    assert list(regularize(frame, '1min', fill='ffill')['temperatura']) == [0.5, 0.5, 0.5, 2]
+
+
+def test_regularize_rejects_unknown_fill():
+    with pytest.raises(ValueError):
+        regularize(sensor_frame(['2024-01-01']), fill='spline')
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from sensor_analytics.regression import ols_fit, t_two_sided_p
+
+stats = pytest.importorskip('scipy.stats')
+
+
+@pytest.mark.parametrize('df', [3, 30, 9_999, 20_000, 10**6, 10**8])
+@pytest.mark.parametrize('t', [0.1, 2.0, 3.36, 8.0])
+def test_p_value_matches_scipy(t, df):
+    expected = 2 * stats.t.sf(t, df)
+    assert t_two_sided_p(t, df) == pytest.approx(expected, rel=1e-6)
+    assert t_two_sided_p(-t, df) == pytest.approx(expected, rel=1e-6)
+
+
+def test_fit_matches_linregress():
+    rng = np.random.default_rng(3)
+    x = rng.normal(20, 3, 20_000)
+    y = 0.008 * x + rng.normal(0, 1, x.size)
+    fit = ols_fit(x, y)
+    expected = stats.linregress(x, y)
+    assert fit.slope == pytest.approx(expected.slope)
+    assert fit.r2 == pytest.approx(expected.rvalue ** 2)
+    assert fit.p_value == pytest.approx(expected.pvalue, rel=1e-6)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.rollups import RollupPyramid
+
+
+def sensor_frame(unit, tz=None, n=3 * 24 * 60):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2024-01-01', periods=n, freq='1min', name='Time', unit=unit, tz=tz)
+    return pd.DataFrame({
+        'temperatura': rng.normal(20, 3, n).astype(np.float32),
+        'humedad': rng.normal(60, 10, n).astype(np.float32),
+    }, index=index)
+
+
+@pytest.mark.parametrize('unit, tz', [('ns', None), ('us', None), ('us', 'UTC-05:00')])
+def test_hourly_pattern_matches_groupby(unit, tz):
+    frame = sensor_frame(unit, tz)
+    pattern = RollupPyramid(frame).pattern('hora')
+    expected = frame.groupby(frame.index.hour).mean()
+    assert len(pattern) == 24
+    np.testing.assert_allclose(pattern.to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+
+def test_levels_keep_the_frame_dates():
+    frame = sensor_frame('us', 'UTC-05:00')
+    means = RollupPyramid(frame).means('1h', frame.index[60], frame.index[-1])
+    assert means.index[0] == frame.index[60]
+    assert means.index.tz == frame.index.tz
@@ -0,0 +1,32 @@
+import pytest
+
+from sensor_analytics.ingest import MissingColumnsError, detect_sensor_pairs
+from sensor_analytics.sensors import DEFAULT_LOCATION_NAME, sensor_locations
+
+
+@pytest.mark.parametrize('columns, sensor', [
+    (['Temperatura (°C)', 'Humedad (%)'], 'sensor'),
+    (['temperatura ESP32 (°C)', 'humedad ESP32 (%)'], 'ESP32'),
+    (['Temperatura [ºC] nodo2', 'Humedad [% HR] nodo2'], 'nodo2'),
+    (['temperatura{sensor="nodo3"}', 'humedad{sensor="nodo3"}'], 'nodo3'),
+])
+def test_unit_suffixes_are_not_sensor_ids(columns, sensor):
+    assert list(detect_sensor_pairs(columns)) == [sensor]
+
+
+def test_duplicate_sensor_rows_keep_the_last(tmp_path):
+    path = tmp_path / 'sensores.csv'
+    path.write_text('sensor,lat,lon,location\n'
+                    'nodo1,6.20,-75.50,Bloque 1\n'
+                    'nodo2,6.21,-75.51,Bloque 2\n'
+                    'nodo1,6.25,-75.55,Bloque 7\n', encoding='utf-8')
+    locations = sensor_locations(['nodo1', 'nodo2', 'nodo9'], str(path)).set_index('sensor')
+    assert locations.loc['nodo1', 'location'] == 'Bloque 7'
+    assert locations.loc['nodo1', 'lat'] == 6.25
+    assert locations.loc['nodo9', 'location'] == DEFAULT_LOCATION_NAME
+
+
+def test_repeated_sensor_columns_are_rejected():
+    columns = ['Time', 'temperatura nodo1', 'humedad nodo1', 'temperatura nodo1 (°C)']
+    with pytest.raises(MissingColumnsError, match="nodo1"):
+        detect_sensor_pairs(columns)
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_analytics.stats import compute_summary
+
+
+def test_summary_matches_pandas_with_missing_readings():
+    frame = pd.DataFrame({
+        'temperatura': [20.1, np.nan, 22.5, 19.8, 25.0, 21.3, np.nan, 23.9],
+        'humedad': [55.0, 60.2, np.nan, 58.1, 49.5, 62.0, 57.3, np.nan],
+    }, index=pd.date_range('2024-01-01', periods=8, freq='1min', name='Time'))
+    summary = compute_summary(frame)
+    for var in ('temperatura', 'humedad'):
+        pd.testing.assert_series_equal(summary[var].describe(var), frame[var].describe(), check_dtype=False)
+    # Correlation and fit over the rows where both readings exist
+    assert summary.correlation == pytest.approx(frame['temperatura'].corr(frame['humedad']))
+    pairs = frame.dropna()
+    slope, intercept = np.polyfit(pairs['temperatura'], pairs['humedad'], 1)
+    assert (summary.fit.slope, summary.fit.intercept) == pytest.approx((slope, intercept))
+    assert summary['temperatura'].anomaly_count == int(
+        (np.abs(frame['temperatura'] - frame['temperatura'].mean()) > 2 * frame['temperatura'].std()).sum())
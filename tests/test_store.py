@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from sensor_analytics.loader import Dataset
+from sensor_analytics.store import DatasetStore
+
+
+def stored_dataset(tmp_path, unit):
+    n = 3 * 24 * 60
+    index = pd.date_range('2024-01-31', periods=n, freq='1min', name='Time', unit=unit)
+    frame = pd.DataFrame({
+        'temperatura': np.linspace(15, 25, n, dtype=np.float32),
+        'humedad': np.linspace(40, 80, n, dtype=np.float32),
+    }, index=index)
+    dataset = Dataset('abc', frame, {'sensor': {'temperatura': 'temperatura', 'humedad': 'humedad'}})
+    store = DatasetStore(str(tmp_path))
+    store.ingest('datos', dataset)
+    return store, frame
+
+
+def test_day_range_on_microsecond_data(tmp_path):
+    store, frame = stored_dataset(tmp_path, 'us')
+    # The app asks for whole days: midnight to the last nanosecond of the day
+    start = pd.Timestamp('2024-02-01')
+    end = pd.Timestamp('2024-02-01') + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+    opened = store.open('datos', start, end)
+    assert len(opened.frame) == 24 * 60
+    assert opened.frame.index[0] == start
+    assert opened.frame.index[-1] == pd.Timestamp('2024-02-01 23:59')
+
+
+def test_round_trip_keeps_readings(tmp_path):
+    store, frame = stored_dataset(tmp_path, 'us')
+    opened = store.open('datos')
+    assert opened.frame.index.equals(frame.index)
+    np.testing.assert_array_equal(opened.frame['temperatura'], frame['temperatura'])
@@ -0,0 +1,23 @@
+import numpy as np
+
+from sensor_analytics.streaming import StreamingHistogram
+
+
+def test_outliers_fall_in_the_edge_bins():
+    histogram = StreamingHistogram(0.5, limits=(-60, 80))
+    histogram.update([20.1, 20.4, 21.0, 1e9, -1e12, np.inf, np.nan])
+    assert histogram.counts.size <= (80 + 60) / 0.5 + 1
+    assert histogram.counts.sum() == 5
+    assert histogram.edges[0] == -60 and histogram.edges[-1] == 80.5
+
+
+def test_quantiles_close_to_numpy():
+    rng = np.random.default_rng(5)
+    values = rng.normal(22, 3, 100_000)
+    histogram = StreamingHistogram(0.5, limits=(-60, 80))
+    for chunk in np.array_split(values, 7):
+        part = StreamingHistogram(0.5, limits=(-60, 80))
+        part.update(chunk)
+        histogram.merge(part)
+    for q in (0.25, 0.5, 0.75):
+        assert abs(histogram.quantile(q) - np.quantile(values, q)) < 0.05